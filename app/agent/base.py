@@ -1,12 +1,17 @@
+import asyncio
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
 from typing import List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
+from app.cancellation import CancellationToken
+from app.config import config
+from app.event_bus import EVENT_TYPE, AgentEvent, EventBus
+from app.exceptions import AgentCancelled
 from app.llm import LLM
 from app.logger import logger
-from app.sandbox.client import SANDBOX_CLIENT
+from app.loop_detection import LoopDetector
 from app.schema import ROLE_TYPE, AgentState, Memory, Message
 
 
@@ -41,6 +46,12 @@ class BaseAgent(BaseModel, ABC):
     current_step: int = Field(default=0, description="Current step in execution")
 
     duplicate_threshold: int = 2
+    # Detects repeated steps, None unless enabled in [loop_detection]
+    loop_detector: Optional[LoopDetector] = None
+    # Receives progress events of runs, e.g. for streaming them to a client
+    event_bus: Optional[EventBus] = None
+    # Cancellation state of the current run, see cancel()
+    cancel_token: Optional[CancellationToken] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -53,6 +64,12 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        if (
+            self.loop_detector is None
+            and config.loop_detection
+            and config.loop_detection.enabled
+        ):
+            self.loop_detector = LoopDetector(repeat_threshold=self.duplicate_threshold)
         return self
 
     @asynccontextmanager
@@ -124,37 +141,80 @@ class BaseAgent(BaseModel, ABC):
 
         Raises:
             RuntimeError: If the agent is not in IDLE state at start.
+            AgentCancelled: If the run was cancelled with `cancel`.
         """
         if self.state != AgentState.IDLE:
             raise RuntimeError(f"Cannot run agent from state: {self.state}")
 
         # Reset current step for new run
         self.current_step = 0
+        token = self.cancel_token = CancellationToken()
+        token.bind(asyncio.current_task())
+        if self.loop_detector:
+            self.loop_detector.reset()
 
         if request:
             self.update_memory("user", request)
+        self.publish_event("run_started", request=request)
 
         results: List[str] = []
-        async with self.state_context(AgentState.RUNNING):
-            while (
-                self.current_step < self.max_steps and self.state != AgentState.FINISHED
-            ):
-                self.current_step += 1
-                logger.info(f"Executing step {self.current_step}/{self.max_steps}")
-                step_result = await self.step()
-
-                # Check for stuck state
-                if self.is_stuck():
-                    self.handle_stuck_state()
-
-                results.append(f"Step {self.current_step}: {step_result}")
-
-            if self.current_step >= self.max_steps:
-                self.current_step = 0
-                self.state = AgentState.IDLE
-                results.append(f"Terminated: Reached max steps ({self.max_steps})")
-        await SANDBOX_CLIENT.cleanup()
-        return "\n".join(results) if results else "No steps executed"
+        try:
+            async with self.state_context(AgentState.RUNNING):
+                while (
+                    self.current_step < self.max_steps
+                    and self.state != AgentState.FINISHED
+                ):
+                    token.raise_if_cancelled()
+                    self.current_step += 1
+                    logger.info(f"Executing step {self.current_step}/{self.max_steps}")
+                    self.publish_event("step_started", max_steps=self.max_steps)
+                    step_result = await self.step()
+
+                    # Check for stuck state
+                    if self.is_stuck():
+                        self.handle_stuck_state()
+
+                    self.publish_event("step_finished", result=step_result)
+                    results.append(f"Step {self.current_step}: {step_result}")
+
+                if self.current_step >= self.max_steps:
+                    self.current_step = 0
+                    self.state = AgentState.IDLE
+                    results.append(f"Terminated: Reached max steps ({self.max_steps})")
+        except (asyncio.CancelledError, AgentCancelled) as e:
+            # Our own cancellation ends here, so cleanup can still await;
+            # cancellation of the task from elsewhere propagates
+            if token.release() or not token.cancelled:
+                self.publish_event("run_failed", error=str(e) or type(e).__name__)
+                raise
+            self.publish_event("run_cancelled", reason=token.reason)
+            raise AgentCancelled(token.reason) from None
+        except BaseException as e:
+            self.publish_event("run_failed", error=str(e) or type(e).__name__)
+            raise
+        result = "\n".join(results) if results else "No steps executed"
+        self.publish_event("run_finished", result=result)
+        return result
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel the current run, interrupting any in-flight LLM or tool call.
+
+        Returns:
+            bool: False if no run is in progress or it was already cancelled.
+        """
+        if self.cancel_token is None or self.state != AgentState.RUNNING:
+            return False
+        logger.warning(f"Cancelling {self.name}: {reason}")
+        return self.cancel_token.cancel(reason)
+
+    def publish_event(self, type: EVENT_TYPE, **data) -> None:
+        """Publish a progress event of the current run, if anyone listens."""
+        if self.event_bus:
+            self.event_bus.publish(
+                AgentEvent(
+                    type=type, agent=self.name, step=self.current_step, data=data
+                )
+            )
 
     @abstractmethod
     async def step(self) -> str:
@@ -164,29 +224,34 @@ class BaseAgent(BaseModel, ABC):
         """
 
     def handle_stuck_state(self):
-        """Handle stuck state by adding a prompt to change strategy"""
-        stuck_prompt = "\
-        Observed duplicate responses. Consider new strategies and avoid repeating ineffective paths already attempted."
-        self.next_step_prompt = f"{stuck_prompt}\n{self.next_step_prompt}"
+        """Apply the loop detection policy: a corrective prompt or ending the run"""
+        detector = self.loop_detector
+        settings = detector.settings
+        if settings.policy == "terminate" or (
+            0 < settings.terminate_after <= detector.consecutive
+        ):
+            logger.warning(f"Agent stuck in a loop ({detector.last_loop}), terminating")
+            self.memory.add_message(
+                Message.assistant_message(
+                    f"Stopped: stuck in a loop, {detector.last_loop}."
+                )
+            )
+            self.state = AgentState.FINISHED
+            return
+
+        stuck_prompt = detector.prompt()
+        self.add_stuck_prompt(stuck_prompt)
         logger.warning(f"Agent detected stuck state. Added prompt: {stuck_prompt}")
 
-    def is_stuck(self) -> bool:
-        """Check if the agent is stuck in a loop by detecting duplicate content"""
-        if len(self.memory.messages) < 2:
-            return False
+    def add_stuck_prompt(self, prompt: str) -> None:
+        """Show a corrective prompt to the LLM once, on the next step."""
+        self.memory.add_message(Message.user_message(prompt))
 
-        last_message = self.memory.messages[-1]
-        if not last_message.content:
+    def is_stuck(self) -> bool:
+        """Check if the agent is stuck repeating a step or a short cycle of steps"""
+        if self.loop_detector is None:
             return False
-
-        # Count identical content occurrences
-        duplicate_count = sum(
-            1
-            for msg in reversed(self.memory.messages[:-1])
-            if msg.role == "assistant" and msg.content == last_message.content
-        )
-
-        return duplicate_count >= self.duplicate_threshold
+        return self.loop_detector.observe(self.memory.messages)
 
     @property
     def messages(self) -> List[Message]:
@@ -1,5 +1,5 @@
 import json
-from typing import TYPE_CHECKING, Optional
+from typing import Optional
 
 from pydantic import Field, model_validator
 
@@ -7,25 +7,22 @@ from app.agent.toolcall import ToolCallAgent
 from app.logger import logger
 from app.prompt.browser import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, ToolChoice
-from app.tool import BrowserUseTool, Terminate, ToolCollection
+from app.tool import Terminate, ToolCollection
+from app.tool.browser_use_schema import BROWSER_TOOL_NAME
+from app.tool.registry import lazy_tool
 from app.tool.sandbox.sb_browser_tool import SandboxBrowserTool
 
 
-# Avoid circular import if BrowserAgent needs BrowserContextHelper
-if TYPE_CHECKING:
-    from app.agent.base import BaseAgent  # Or wherever memory is defined
-
-
 class BrowserContextHelper:
-    def __init__(self, agent: "BaseAgent"):
+    def __init__(self, agent: ToolCallAgent):
         self.agent = agent
         self._current_base64_image: Optional[str] = None
 
     async def get_browser_state(self) -> Optional[dict]:
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        browser_tool = self.agent.available_tools.get_tool(BROWSER_TOOL_NAME)
         if not browser_tool:
             browser_tool = self.agent.available_tools.get_tool(
-                SandboxBrowserTool().name
+                SandboxBrowserTool.model_fields["name"].default
             )
         if not browser_tool or not hasattr(browser_tool, "get_current_state"):
             logger.warning("BrowserUseTool not found or doesn't have get_current_state")
@@ -67,7 +64,7 @@ class BrowserContextHelper:
                     content="Current browser screenshot:",
                     base64_image=self._current_base64_image,
                 )
-                self.agent.memory.add_message(image_message)
+                self.agent.add_step_message(image_message)
                 self._current_base64_image = None  # Consume the image after adding
 
         return NEXT_STEP_PROMPT.format(
@@ -79,7 +76,7 @@ class BrowserContextHelper:
         )
 
     async def cleanup_browser(self):
-        browser_tool = self.agent.available_tools.get_tool(BrowserUseTool().name)
+        browser_tool = self.agent.available_tools.get_tool(BROWSER_TOOL_NAME)
         if browser_tool and hasattr(browser_tool, "cleanup"):
             await browser_tool.cleanup()
 
@@ -103,7 +100,9 @@ class BrowserAgent(ToolCallAgent):
 
     # Configure the available tools
     available_tools: ToolCollection = Field(
-        default_factory=lambda: ToolCollection(BrowserUseTool(), Terminate())
+        default_factory=lambda: ToolCollection(
+            lazy_tool(BROWSER_TOOL_NAME), Terminate()
+        )
     )
 
     # Use Auto for tool choice to allow both tool usage and free-form responses
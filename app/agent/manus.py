@@ -9,9 +9,10 @@ from app.logger import logger
 from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.tool import Terminate, ToolCollection
 from app.tool.ask_human import AskHuman
-from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.browser_use_schema import BROWSER_TOOL_NAME
 from app.tool.mcp import MCPClients, MCPClientTool
 from app.tool.python_execute import PythonExecute
+from app.tool.registry import lazy_tool
 from app.tool.str_replace_editor import StrReplaceEditor
 
 
@@ -34,7 +35,7 @@ class Manus(ToolCallAgent):
     available_tools: ToolCollection = Field(
         default_factory=lambda: ToolCollection(
             PythonExecute(),
-            BrowserUseTool(),
+            lazy_tool(BROWSER_TOOL_NAME),
             StrReplaceEditor(),
             AskHuman(),
             Terminate(),
@@ -146,7 +147,7 @@ class Manus(ToolCallAgent):
         original_prompt = self.next_step_prompt
         recent_messages = self.memory.messages[-3:] if self.memory.messages else []
         browser_in_use = any(
-            tc.function.name == BrowserUseTool().name
+            tc.function.name == BROWSER_TOOL_NAME
             for msg in recent_messages
             if msg.tool_calls
             for tc in msg.tool_calls
@@ -1,15 +1,20 @@
 import asyncio
 import json
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr, model_validator
 
 from app.agent.react import ReActAgent
+from app.compaction import ContextCompactor
+from app.config import config
 from app.exceptions import TokenLimitExceeded
 from app.logger import logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tool.cache import get_tool_cache
+from app.tool.policy import ToolBudget
+from app.tool.scheduler import ToolConcurrency, ToolScheduler
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
@@ -33,18 +38,95 @@ class ToolCallAgent(ReActAgent):
     tool_calls: List[ToolCall] = Field(default_factory=list)
     _current_base64_image: Optional[str] = None
 
+    # Stream the LLM response and start each tool as soon as its call is complete
+    stream_tool_calls: bool = False
+    _pending_tool_tasks: Dict[str, asyncio.Task] = PrivateAttr(default_factory=dict)
+    # Orders tool calls that use the same resource, runs the others in parallel
+    _tool_scheduler: ToolScheduler = PrivateAttr(default_factory=ToolScheduler)
+    # Tool call and wall-clock budgets of the current run, see [tool_policy]
+    _tool_budget: Optional[ToolBudget] = PrivateAttr(default=None)
+
+    # Per-step context sent as the request tail when the LLM keeps a stable prefix
+    _step_messages: List[Message] = PrivateAttr(default_factory=list)
+
+    # One-step tool_choice used to break a loop, see handle_stuck_state
+    _tool_choice_override: Optional[TOOL_CHOICE_TYPE] = PrivateAttr(default=None)  # type: ignore
+
+    # Keeps memory within the context window, None unless enabled in [compaction]
+    compactor: Optional[ContextCompactor] = None
+
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
 
+    @model_validator(mode="after")
+    def initialize_compactor(self) -> "ToolCallAgent":
+        """Create the context compactor if compaction is enabled."""
+        if self.compactor is None and config.compaction and config.compaction.enabled:
+            self.compactor = ContextCompactor(self.llm)
+        return self
+
+    def add_step_message(self, message: Message) -> None:
+        """Add per-step context, such as a browser screenshot, for the next request.
+
+        With a stable prompt prefix the message is sent once after the history
+        instead of being stored, so it never shifts the cached prefix.
+        """
+        if self.llm.stable_prompt_prefix:
+            self._step_messages.append(message)
+        else:
+            self.memory.add_message(message)
+
+    def add_stuck_prompt(self, prompt: str) -> None:
+        """Show a corrective prompt to the LLM once, on the next step."""
+        self.add_step_message(Message.user_message(prompt))
+
+    def handle_stuck_state(self):
+        """Apply the loop detection policy, optionally forcing another tool_choice"""
+        super().handle_stuck_state()
+        detector = self.loop_detector
+        if (
+            self.state != AgentState.FINISHED
+            and detector.settings.policy == "tool_choice"
+            and self.tool_choices != ToolChoice.NONE
+        ):
+            # A repeated tool call is broken by asking for a plain answer, a
+            # repeated answer by requiring a tool call
+            self._tool_choice_override = (
+                ToolChoice.NONE
+                if detector.last_message and detector.last_message.tool_calls
+                else ToolChoice.REQUIRED
+            )
+            logger.warning(
+                f"Forcing tool_choice={self._tool_choice_override} for the next step"
+            )
+
+    async def step(self) -> str:
+        """Execute a single step, with a one-step tool_choice override if set."""
+        if self._tool_choice_override is None:
+            return await super().step()
+        tool_choices, self.tool_choices = self.tool_choices, self._tool_choice_override
+        self._tool_choice_override = None
+        try:
+            return await super().step()
+        finally:
+            self.tool_choices = tool_choices
+
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
+        if self.compactor:
+            await self.compactor.compact(self.memory)
+
+        volatile_msgs, self._step_messages = self._step_messages, []
         if self.next_step_prompt:
             user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
+            if self.llm.stable_prompt_prefix:
+                volatile_msgs.append(user_msg)
+            else:
+                self.messages += [user_msg]
 
         try:
             # Get response with tool options
-            response = await self.llm.ask_tool(
+            request = dict(
                 messages=self.messages,
                 system_msgs=(
                     [Message.system_message(self.system_prompt)]
@@ -53,16 +135,28 @@ class ToolCallAgent(ReActAgent):
                 ),
                 tools=self.available_tools.to_params(),
                 tool_choice=self.tool_choices,
+                volatile_msgs=volatile_msgs or None,
             )
+            if self.stream_tool_calls:
+                response = await self.llm.ask_tool_stream(
+                    **request,
+                    on_tool_call=(
+                        self._dispatch_tool_call
+                        if self.tool_choices != ToolChoice.NONE
+                        else None
+                    ),
+                )
+            else:
+                response = await self.llm.ask_tool(**request)
         except ValueError:
+            self._cancel_pending_tools()
             raise
         except Exception as e:
-            # Check if this is a RetryError containing TokenLimitExceeded
-            if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
-                token_limit_error = e.__cause__
-                logger.error(
-                    f"🚨 Token limit error (from RetryError): {token_limit_error}"
-                )
+            self._cancel_pending_tools()
+            # TokenLimitExceeded is not retried, but may still arrive wrapped
+            token_limit_error = e if isinstance(e, TokenLimitExceeded) else e.__cause__
+            if isinstance(token_limit_error, TokenLimitExceeded):
+                logger.error(f"🚨 Token limit error: {token_limit_error}")
                 self.memory.add_message(
                     Message.assistant_message(
                         f"Maximum token limit reached, cannot continue execution: {str(token_limit_error)}"
@@ -79,6 +173,11 @@ class ToolCallAgent(ReActAgent):
 
         # Log response info
         logger.info(f"✨ {self.name}'s thoughts: {content}")
+        self.publish_event(
+            "thought",
+            content=content,
+            tool_calls=[call.function.name for call in tool_calls],
+        )
         logger.debug(
             f"🛠️ {self.name} selected {len(tool_calls) if tool_calls else 0} tools to use"
         )
@@ -120,6 +219,7 @@ class ToolCallAgent(ReActAgent):
 
             return bool(self.tool_calls)
         except Exception as e:
+            self._cancel_pending_tools()
             logger.error(f"🚨 Oops! The {self.name}'s thinking process hit a snag: {e}")
             self.memory.add_message(
                 Message.assistant_message(
@@ -137,12 +237,22 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
-        # Create tasks for parallel execution
-        tasks = [self.execute_tool(command) for command in self.tool_calls]
-        
-        # Execute all tools in parallel
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+        # Schedule the calls, reusing any started while streaming
+        tasks = [
+            self._pending_tool_tasks.pop(command.id, None)
+            or self._schedule_tool_call(command)
+            for command in self.tool_calls
+        ]
+        self._cancel_pending_tools()
+
+        # Independent calls run in parallel, conflicting ones in issue order
         # return_exceptions=True allows other tools to complete even if one fails
         results_with_images = await asyncio.gather(*tasks, return_exceptions=True)
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
 
         results = []
         for i, result_pair in enumerate(results_with_images):
@@ -176,6 +286,37 @@ class ToolCallAgent(ReActAgent):
 
         return "\n\n".join(results)
 
+    def _dispatch_tool_call(self, command: ToolCall) -> None:
+        """Start executing a tool call while the rest of the response streams in"""
+        logger.debug(f"⚡ Early dispatch of tool '{command.function.name}'")
+        self._pending_tool_tasks[command.id] = self._schedule_tool_call(command)
+
+    def _schedule_tool_call(self, command: ToolCall) -> asyncio.Task:
+        """Submit a tool call to the scheduler with its tool's concurrency metadata"""
+        return self._tool_scheduler.submit(
+            command.function.name,
+            self._tool_concurrency(command),
+            lambda: self.execute_tool(command),
+        )
+
+    def _tool_concurrency(self, command: ToolCall) -> ToolConcurrency:
+        """Get the concurrency metadata of a call; invalid calls have none"""
+        tool = self.available_tools.get_tool(command.function.name)
+        try:
+            args = json.loads(command.function.arguments or "{}")
+            if tool and isinstance(args, dict):
+                return tool.concurrency(**args)
+        except Exception:
+            # execute_tool reports invalid arguments
+            pass
+        return ToolConcurrency()
+
+    def _cancel_pending_tools(self) -> None:
+        """Cancel early-dispatched tool calls that will not be awaited"""
+        for task in self._pending_tool_tasks.values():
+            task.cancel()
+        self._pending_tool_tasks.clear()
+
     async def execute_tool(self, command: ToolCall) -> tuple[str, Optional[str]]:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
@@ -191,7 +332,12 @@ class ToolCallAgent(ReActAgent):
 
             # Execute the tool
             logger.debug(f"🔧 Activating tool: '{name}'...")
-            result = await self.available_tools.execute(name=name, tool_input=args)
+            self.publish_event(
+                "tool_started", tool=name, call_id=command.id, arguments=args
+            )
+            result = await self.available_tools.execute(
+                name=name, tool_input=args, budget=self._tool_budget
+            )
 
             # Handle special tools
             await self._handle_special_tool(name=name, result=result)
@@ -207,6 +353,13 @@ class ToolCallAgent(ReActAgent):
                 if result
                 else f"Cmd `{name}` completed with no output"
             )
+            self.publish_event(
+                "tool_finished",
+                tool=name,
+                call_id=command.id,
+                output=observation,
+                error=bool(getattr(result, "error", None)),
+            )
 
             return observation, base64_image
         except json.JSONDecodeError:
@@ -218,6 +371,13 @@ class ToolCallAgent(ReActAgent):
         except Exception as e:
             error_msg = f"⚠️ Tool '{name}' encountered a problem: {str(e)}"
             logger.exception(error_msg)
+            self.publish_event(
+                "tool_finished",
+                tool=name,
+                call_id=command.id,
+                output=error_msg,
+                error=True,
+            )
             return f"Error: {error_msg}", None
 
     async def _handle_special_tool(self, name: str, result: Any, **kwargs):
@@ -257,7 +417,17 @@ class ToolCallAgent(ReActAgent):
 
     async def run(self, request: Optional[str] = None) -> str:
         """Run the agent with cleanup when done."""
+        self._tool_budget = ToolBudget()
         try:
             return await super().run(request)
         finally:
+            # Early-dispatched tool calls must not outlive a cancelled run
+            self._cancel_pending_tools()
+            if self.compactor:
+                self.compactor.cancel()
+            tool_cache = get_tool_cache()
+            if tool_cache:
+                logger.info(
+                    f"📦 Tool cache hit rates: {tool_cache.get_stats()['tools']}"
+                )
             await self.cleanup()
@@ -6,14 +6,13 @@ from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.ask_human import AskHuman
 from app.agent.browser import BrowserContextHelper
 from app.tool.base import ToolResult
+from app.session import current_session
 import json
 from agentscope.tool import ToolResponse
 from agentscope.message import TextBlock
 
-# Global context holder to maintain state across tool calls
+# Per-session context holder to maintain state across tool calls
 class ToolContext:
-    _instance = None
-    
     def __init__(self):
         self.browser_helper: Optional[BrowserContextHelper] = None
         self.browser_tool = BrowserUseTool()
@@ -23,9 +22,11 @@ class ToolContext:
         
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        # One context per session, so concurrent users don't share a browser
+        return current_session().get_state("agentscope.tool_context", cls)
+
+    async def cleanup(self):
+        await self.browser_tool.cleanup()
 
     def set_browser_helper(self, helper: BrowserContextHelper):
         self.browser_helper = helper
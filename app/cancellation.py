@@ -0,0 +1,79 @@
+"""Cooperative cancellation of agent runs.
+
+Each run gets a `CancellationToken`. Cancelling it stops the run at its next
+checkpoint (between steps, before and after tool calls) and also cancels the
+task running it, so an in-flight LLM request or tool call is interrupted
+instead of awaited. The run then raises `AgentCancelled` after the agent has
+cleaned up.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.exceptions import AgentCancelled
+
+
+class CancellationToken:
+    """Cancellation state of one agent run."""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._interrupted = False
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the run has been cancelled."""
+        return self._event.is_set()
+
+    def bind(self, task: Optional[asyncio.Task]) -> None:
+        """Set the task interrupted on cancellation, usually the run's own."""
+        self._task = task
+        if self.cancelled:
+            self._interrupt()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel the run.
+
+        Args:
+            reason: Why the run is cancelled, reported by AgentCancelled.
+
+        Returns:
+            bool: False if the run was already cancelled.
+        """
+        if self.cancelled:
+            return False
+        self.reason = reason
+        self._event.set()
+        self._interrupt()
+        return True
+
+    def _interrupt(self) -> None:
+        # A task cannot interrupt itself; it stops at the next checkpoint
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._interrupted = self._task.cancel()
+
+    def release(self) -> bool:
+        """Undo the token's own cancellation of the task once the run stopped.
+
+        Lets the run clean up and report AgentCancelled instead of ending
+        with CancelledError.
+
+        Returns:
+            bool: Whether the task is still being cancelled by someone else.
+        """
+        if self._interrupted and self._task is not None and self._task.cancelling():
+            self._task.uncancel()
+        self._interrupted = False
+        return self._task is not None and self._task.cancelling() > 0
+
+    def raise_if_cancelled(self) -> None:
+        """Checkpoint: raise AgentCancelled if the run has been cancelled."""
+        if self.cancelled:
+            raise AgentCancelled(self.reason)
+
+    async def wait(self) -> str:
+        """Wait until the run is cancelled, returning the reason."""
+        await self._event.wait()
+        return self.reason
@@ -0,0 +1,258 @@
+"""
+Context Compaction
+
+Keeps an agent's memory within a token budget so long runs do not stop on
+the context window. Compaction works on whole turns, so an assistant message
+and the tool results answering its tool calls are always kept or removed
+together. Stages, cheapest first:
+
+1. Screenshots older than the newest few are dropped.
+2. Past a fraction of the budget, older turns are summarized by the LLM in a
+   background task; the summary replaces them once it is ready.
+3. Over the budget, old tool outputs are elided.
+4. Still over the budget, the oldest turns are dropped.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import CompactionSettings, config
+from app.llm import LLM, MULTIMODAL_MODELS
+from app.logger import logger
+from app.schema import Memory, Message, Role
+
+
+SUMMARY_PREFIX = "[Summary of earlier conversation]"
+ELIDED_SUFFIX = " characters elided]"
+MAX_RENDERED_CHARS = 4000
+
+SUMMARY_PROMPT = """You compress the history of an AI agent's work into a summary that replaces it.
+Keep every fact the agent still needs: what has been done, results and data found, URLs, file paths, \
+commands, errors met and how they were handled, decisions made, and what remains to do.
+Drop chit-chat and repeated attempts. Write concise plain text, most important information first."""
+
+
+class ContextCompactor:
+    """Token-budget-aware compaction of an agent's memory.
+
+    The leading system messages and the first user message (the task) are
+    pinned, and the newest `keep_recent_messages` messages are never touched.
+    """
+
+    def __init__(self, llm: LLM, settings: Optional[CompactionSettings] = None):
+        """Initializes the compactor.
+
+        Args:
+            llm: Model used to count tokens and to write summaries.
+            settings: Compaction configuration. Defaults to the `[compaction]` section.
+        """
+        self.llm = llm
+        self.settings = settings or config.compaction
+
+        self._summary_task: Optional[asyncio.Task] = None
+        self._summarized: List[Message] = []
+
+        self.screenshots_dropped = 0
+        self.outputs_elided = 0
+        self.chars_elided = 0
+        self.summaries = 0
+        self.messages_summarized = 0
+        self.messages_dropped = 0
+
+    def count_tokens(self, messages: List[Message]) -> int:
+        """Counts the request tokens of a list of messages."""
+        supports_images = self.llm.model in MULTIMODAL_MODELS
+        return self.llm.count_message_tokens(
+            LLM.format_messages(messages, supports_images)
+        )
+
+    async def compact(self, memory: Memory) -> None:
+        """Compacts memory in place to fit the token budget.
+
+        Args:
+            memory: The agent's memory.
+        """
+        self._drop_old_screenshots(memory.messages)
+        self._apply_summary(memory)
+
+        budget = self.settings.max_context_tokens
+        tokens = self.count_tokens(memory.messages)
+        if self.settings.summarize and tokens > budget * self.settings.summarize_ratio:
+            self._start_summary(memory.messages)
+
+        if tokens > budget and self._elide_tool_outputs(memory.messages):
+            tokens = self.count_tokens(memory.messages)
+        if tokens > budget:
+            self._drop_oldest(memory, tokens, budget)
+
+    def cancel(self) -> None:
+        """Cancels a running background summary."""
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+        self._summary_task = None
+        self._summarized = []
+
+    def _pinned_count(self, messages: List[Message]) -> int:
+        """Number of leading messages that are never compacted."""
+        index = 0
+        while index < len(messages) and messages[index].role == Role.SYSTEM:
+            index += 1
+        if (
+            index < len(messages)
+            and messages[index].role == Role.USER
+            and not (messages[index].content or "").startswith(SUMMARY_PREFIX)
+        ):
+            index += 1
+        return index
+
+    def _recent_start(self, messages: List[Message], pinned: int) -> int:
+        """Index of the first message of the protected recent window."""
+        start = max(pinned, len(messages) - self.settings.keep_recent_messages)
+        # Keep tool results together with the assistant message that called them
+        while pinned < start < len(messages) and messages[start].role == Role.TOOL:
+            start -= 1
+        return start
+
+    @staticmethod
+    def _turns(messages: List[Message], start: int, end: int) -> List[Tuple[int, int]]:
+        """Splits messages[start:end] into (start, stop) ranges of whole turns."""
+        turns = []
+        index = start
+        while index < end:
+            stop = index + 1
+            if messages[index].tool_calls or messages[index].role == Role.TOOL:
+                while stop < end and messages[stop].role == Role.TOOL:
+                    stop += 1
+            turns.append((index, stop))
+            index = stop
+        return turns
+
+    def _drop_old_screenshots(self, messages: List[Message]) -> None:
+        seen = 0
+        for message in reversed(messages):
+            if message.base64_image:
+                seen += 1
+                if seen > self.settings.keep_screenshots:
+                    message.base64_image = None
+                    self.screenshots_dropped += 1
+
+    def _elide_tool_outputs(self, messages: List[Message]) -> bool:
+        """Shortens old tool outputs; returns whether anything changed."""
+        limit = self.settings.max_tool_output_chars
+        pinned = self._pinned_count(messages)
+        changed = False
+        for message in messages[pinned : self._recent_start(messages, pinned)]:
+            content = message.content
+            if (
+                message.role != Role.TOOL
+                or not content
+                or len(content) <= limit
+                or content.endswith(ELIDED_SUFFIX)
+            ):
+                continue
+            elided = len(content) - limit
+            message.content = f"{content[:limit]}\n... [{elided}{ELIDED_SUFFIX}"
+            self.outputs_elided += 1
+            self.chars_elided += elided
+            changed = True
+        return changed
+
+    def _drop_oldest(self, memory: Memory, tokens: int, budget: int) -> None:
+        messages = memory.messages
+        pinned = self._pinned_count(messages)
+        cut = pinned
+        for start, stop in self._turns(
+            messages, pinned, self._recent_start(messages, pinned)
+        ):
+            if tokens <= budget:
+                break
+            tokens -= self.count_tokens(messages[start:stop])
+            cut = stop
+
+        if cut > pinned:
+            memory.messages = messages[:pinned] + messages[cut:]
+            self.messages_dropped += cut - pinned
+            logger.warning(
+                f"Context over budget, dropped {cut - pinned} oldest messages"
+            )
+
+    def _start_summary(self, messages: List[Message]) -> None:
+        if self._summary_task is not None:
+            return
+        pinned = self._pinned_count(messages)
+        end = self._recent_start(messages, pinned)
+        if end - pinned < 2:
+            return
+        self._summarized = messages[pinned:end]
+        self._summary_task = asyncio.create_task(
+            self._summarize(list(self._summarized))
+        )
+
+    async def _summarize(self, messages: List[Message]) -> str:
+        transcript = "\n\n".join(self._render(message) for message in messages)
+        return await self.llm.ask(
+            [Message.user_message(transcript)],
+            system_msgs=[Message.system_message(SUMMARY_PROMPT)],
+            stream=False,
+            temperature=0,
+        )
+
+    def _apply_summary(self, memory: Memory) -> None:
+        """Splices a finished summary in place of the turns it covers."""
+        task = self._summary_task
+        if task is None or not task.done():
+            return
+        summarized = self._summarized
+        self._summary_task, self._summarized = None, []
+        if task.cancelled():
+            return
+        if task.exception():
+            logger.warning(f"Context summarization failed: {task.exception()}")
+            return
+
+        messages = memory.messages
+        pinned = self._pinned_count(messages)
+        covered = messages[pinned : pinned + len(summarized)]
+        # Memory may have been trimmed while the summary was written
+        if len(covered) != len(summarized) or any(
+            a is not b for a, b in zip(covered, summarized)
+        ):
+            return
+
+        summary = Message.user_message(f"{SUMMARY_PREFIX}\n{task.result()}")
+        memory.messages = (
+            messages[:pinned] + [summary] + messages[pinned + len(summarized) :]
+        )
+        self.summaries += 1
+        self.messages_summarized += len(summarized)
+        logger.info(f"Summarized {len(summarized)} earlier messages")
+
+    @staticmethod
+    def _render(message: Message) -> str:
+        text = message.content or ""
+        if message.tool_calls:
+            calls = ", ".join(
+                f"{call.function.name}({call.function.arguments})"
+                for call in message.tool_calls
+            )
+            text = f"{text}\n[called {calls}]".strip()
+        if len(text) > MAX_RENDERED_CHARS:
+            text = f"{text[:MAX_RENDERED_CHARS]}..."
+        return f"{message.role}: {text}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets compaction statistics.
+
+        Returns:
+            Dict: Counts of dropped screenshots, elided outputs, summaries and
+                dropped messages.
+        """
+        return {
+            "screenshots_dropped": self.screenshots_dropped,
+            "outputs_elided": self.outputs_elided,
+            "chars_elided": self.chars_elided,
+            "summaries": self.summaries,
+            "messages_summarized": self.messages_summarized,
+            "messages_dropped": self.messages_dropped,
+            "summary_pending": self._summary_task is not None,
+        }
@@ -4,7 +4,7 @@ import re
 import threading
 import tomllib
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -53,6 +53,245 @@ class LLMSettings(BaseModel):
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
 
+    # HTTP connection pool, shared by every LLM using the same endpoint and key
+    max_connections: int = Field(
+        100, description="Maximum concurrent connections to the endpoint"
+    )
+    max_keepalive_connections: int = Field(
+        20, description="Maximum idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle connection is kept alive"
+    )
+    http2: bool = Field(False, description="Use HTTP/2 (requires the h2 package)")
+    connect_timeout: float = Field(10.0, description="Connection timeout in seconds")
+    request_timeout: float = Field(
+        600.0, description="Default request timeout in seconds"
+    )
+
+    # Client-side rate limits, shared like the connection pool (None for unlimited)
+    requests_per_minute: Optional[int] = Field(
+        None, description="Maximum requests per minute to the endpoint"
+    )
+    tokens_per_minute: Optional[int] = Field(
+        None, description="Maximum input tokens per minute to the endpoint"
+    )
+    max_concurrent_requests: Optional[int] = Field(
+        None, description="Maximum requests in flight to the endpoint"
+    )
+
+    # Request layout for provider-side prompt caching
+    stable_prompt_prefix: bool = Field(
+        False,
+        description="Keep system prompt, tools and history byte-stable and send "
+        "per-step prompts only as the request tail",
+    )
+    prompt_cache_control: bool = Field(
+        False,
+        description="Mark the end of the stable prefix with an Anthropic-style "
+        "cache_control breakpoint (for compatible gateways)",
+    )
+
+    # Pricing, used to report the cost of routed calls
+    input_cost_per_million_tokens: Optional[float] = Field(
+        None, description="Price of one million input tokens"
+    )
+    output_cost_per_million_tokens: Optional[float] = Field(
+        None, description="Price of one million output tokens"
+    )
+
+
+# Optional [llm] keys that apply whichever provider was auto-configured
+LLM_OPTIONAL_FIELDS = (
+    "max_connections",
+    "max_keepalive_connections",
+    "keepalive_expiry",
+    "http2",
+    "connect_timeout",
+    "request_timeout",
+    "requests_per_minute",
+    "tokens_per_minute",
+    "max_concurrent_requests",
+    "stable_prompt_prefix",
+    "prompt_cache_control",
+    "input_cost_per_million_tokens",
+    "output_cost_per_million_tokens",
+)
+
+
+class LLMCacheSettings(BaseModel):
+    """Configuration for the LLM response cache"""
+
+    enabled: bool = Field(False, description="Whether to cache LLM responses")
+    cache_nondeterministic: bool = Field(
+        False,
+        description="Also cache requests with a non-zero temperature",
+    )
+    max_memory_entries: int = Field(
+        256, description="Maximum responses kept in the in-memory LRU tier"
+    )
+    path: Optional[str] = Field(
+        None,
+        description="SQLite file for the on-disk tier, relative to the project root (None to disable)",
+    )
+    ttl: int = Field(
+        86400, description="Seconds before a cached response expires (0 for never)"
+    )
+    max_disk_bytes: int = Field(
+        100 * 1024 * 1024, description="Maximum total size of the on-disk tier"
+    )
+
+
+class LLMRoutingSettings(BaseModel):
+    """Configuration for routing auxiliary LLM calls to cheaper model tiers"""
+
+    enabled: bool = Field(False, description="Whether to route auxiliary calls")
+    tiers: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Task class (classify/extract/summarize/plan/act) to [llm.<name>] config",
+    )
+    fallback: bool = Field(
+        True,
+        description="Retry with the caller's main model when a tier fails or its "
+        "result is rejected",
+    )
+
+
+class CompactionSettings(BaseModel):
+    """Configuration for agent context compaction"""
+
+    enabled: bool = Field(False, description="Whether to compact agent memory")
+    max_context_tokens: int = Field(
+        64000, description="Token budget for the conversation history per request"
+    )
+    keep_recent_messages: int = Field(
+        12, description="Newest messages that are never compacted"
+    )
+    keep_screenshots: int = Field(
+        2, description="Number of newest screenshots kept in memory"
+    )
+    max_tool_output_chars: int = Field(
+        2000, description="Length old tool outputs are elided to over budget"
+    )
+    summarize: bool = Field(
+        True, description="Summarize older turns with the LLM in the background"
+    )
+    summarize_ratio: float = Field(
+        0.7,
+        description="Fraction of max_context_tokens at which summarization starts",
+    )
+
+
+class LoopDetectionSettings(BaseModel):
+    """Configuration for detecting agents stuck repeating themselves"""
+
+    enabled: bool = Field(True, description="Whether to detect repeated steps")
+    window: int = Field(20, description="Number of recent steps checked for repeats")
+    max_cycle_length: int = Field(
+        3, description="Longest cycle of alternating steps to detect, e.g. 2 for A-B"
+    )
+    cycle_repeats: int = Field(
+        2, description="Consecutive repetitions that make a cycle a loop"
+    )
+    policy: Literal["prompt", "tool_choice", "terminate"] = Field(
+        "prompt",
+        description="Reaction to a loop: a corrective prompt, a prompt plus a "
+        "forced different tool_choice for one step, or ending the run",
+    )
+    terminate_after: int = Field(
+        3, description="Consecutive loop detections that end the run, 0 to never"
+    )
+
+
+class ToolCacheSettings(BaseModel):
+    """Configuration for memoizing results of idempotent tools"""
+
+    enabled: bool = Field(False, description="Whether to cache tool results")
+    max_memory_entries: int = Field(
+        512, description="Maximum results kept in the in-memory LRU tier"
+    )
+    max_memory_bytes: int = Field(
+        32 * 1024 * 1024, description="Maximum total size of the in-memory LRU tier"
+    )
+    path: Optional[str] = Field(
+        None,
+        description="SQLite file for the on-disk tier, relative to the project root (None to disable)",
+    )
+    max_disk_bytes: int = Field(
+        100 * 1024 * 1024, description="Maximum total size of the on-disk tier"
+    )
+    ttl: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-tool TTL overrides in seconds by tool name, 0 to disable",
+    )
+
+
+class AgentPoolSettings(BaseModel):
+    """Configuration for the pool of warm agents serving A2A requests"""
+
+    min_size: int = Field(1, description="Agents kept ready, even when idle")
+    max_size: int = Field(4, description="Maximum agents, and concurrent requests")
+    idle_timeout: float = Field(
+        600.0, description="Seconds an agent above min_size may stay idle"
+    )
+    max_requests_per_agent: int = Field(
+        50, description="Requests after which an agent is replaced (0 for no limit)"
+    )
+
+
+class PythonExecuteSettings(BaseModel):
+    """Configuration for running python_execute code"""
+
+    mode: Literal["process", "pool"] = Field(
+        "process",
+        description="Run each call in a new process, or in a pool of warm workers",
+    )
+    pool_size: int = Field(2, description="Warm worker processes kept by the pool")
+    preload_modules: List[str] = Field(
+        default_factory=list,
+        description="Modules each worker imports before its first call",
+    )
+    max_executions_per_worker: int = Field(
+        50, description="Calls after which a worker is replaced (0 for no limit)"
+    )
+    memory_limit_mb: Optional[int] = Field(
+        None, description="Address space limit of a worker in MB (RLIMIT_AS)"
+    )
+    cpu_time_limit: Optional[int] = Field(
+        None, description="CPU seconds a single call may use (RLIMIT_CPU)"
+    )
+    persist_state: bool = Field(
+        False,
+        description="Pin a worker to each session so variables persist between calls",
+    )
+
+
+class ToolLimitSettings(BaseModel):
+    """Execution limits of a single tool"""
+
+    timeout: Optional[float] = Field(
+        None, description="Seconds after which a call is cancelled"
+    )
+    max_calls: Optional[int] = Field(None, description="Maximum calls per agent run")
+
+
+class ToolPolicySettings(BaseModel):
+    """Configuration for tool execution timeouts and budgets"""
+
+    timeout: Optional[float] = Field(
+        None, description="Default seconds after which a tool call is cancelled"
+    )
+    max_calls: Optional[int] = Field(
+        None, description="Maximum tool calls per agent run"
+    )
+    max_seconds: Optional[float] = Field(
+        None,
+        description="Wall-clock seconds per agent run after which tools are refused",
+    )
+    tools: Dict[str, ToolLimitSettings] = Field(
+        default_factory=dict, description="Per-tool limits by tool name"
+    )
+
 
 class ProxySettings(BaseModel):
     server: str = Field(None, description="Proxy server address")
@@ -132,6 +371,21 @@ class SandboxSettings(BaseModel):
     )
 
 
+class SandboxPoolSettings(BaseModel):
+    """Configuration for keeping pre-started sandboxes ready for use"""
+
+    enabled: bool = Field(False, description="Whether to pool sandboxes")
+    size: int = Field(2, description="Idle sandboxes kept ready per configuration")
+    max_age: float = Field(
+        1800.0, description="Seconds after which a sandbox is replaced (0 for no limit)"
+    )
+    reset_on_return: bool = Field(
+        False,
+        description="Kill the processes of returned sandboxes, empty their working "
+        "directory and /tmp, and reuse them instead of discarding them",
+    )
+
+
 class DaytonaSettings(BaseModel):
     daytona_api_key: str = Field("", description="Daytona API key (required only when using Daytona sandbox)")
     daytona_server_url: Optional[str] = Field(
@@ -200,9 +454,36 @@ class MCPSettings(BaseModel):
 
 class AppConfig(BaseModel):
     llm: Dict[str, LLMSettings]
+    llm_cache: Optional[LLMCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    compaction: Optional[CompactionSettings] = Field(
+        None, description="Agent context compaction configuration"
+    )
+    llm_routing: Optional[LLMRoutingSettings] = Field(
+        None, description="LLM routing tier configuration"
+    )
+    loop_detection: Optional[LoopDetectionSettings] = Field(
+        None, description="Agent loop detection configuration"
+    )
+    tool_policy: Optional[ToolPolicySettings] = Field(
+        None, description="Tool execution timeouts and budgets"
+    )
+    tool_cache: Optional[ToolCacheSettings] = Field(
+        None, description="Tool result cache configuration"
+    )
+    agent_pool: Optional[AgentPoolSettings] = Field(
+        None, description="A2A agent pool configuration"
+    )
+    python_execute: Optional[PythonExecuteSettings] = Field(
+        None, description="Python code execution configuration"
+    )
     sandbox: Optional[SandboxSettings] = Field(
         None, description="Sandbox configuration"
     )
+    sandbox_pool: Optional[SandboxPoolSettings] = Field(
+        None, description="Sandbox pool configuration"
+    )
     browser_config: Optional[BrowserSettings] = Field(
         None, description="Browser configuration"
     )
@@ -360,6 +641,10 @@ class Config:
         # Apply auto-configuration
         default_settings = self._auto_configure_llm(default_settings)
 
+        default_settings.update(
+            {k: base_llm[k] for k in LLM_OPTIONAL_FIELDS if k in base_llm}
+        )
+
         # handle browser config.
         browser_config = raw_config.get("browser", {})
         browser_settings = None
@@ -402,6 +687,12 @@ class Config:
             sandbox_settings = SandboxSettings(**sandbox_config)
         else:
             sandbox_settings = SandboxSettings()
+
+        sandbox_pool_config = raw_config.get("sandbox_pool")
+        if sandbox_pool_config:
+            sandbox_pool_settings = SandboxPoolSettings(**sandbox_pool_config)
+        else:
+            sandbox_pool_settings = SandboxPoolSettings()
         daytona_config = raw_config.get("daytona", {})
         if daytona_config:
             daytona_settings = DaytonaSettings(**daytona_config)
@@ -417,6 +708,54 @@ class Config:
         else:
             mcp_settings = MCPSettings(servers=MCPSettings.load_server_config())
 
+        llm_cache_config = raw_config.get("llm_cache")
+        if llm_cache_config:
+            llm_cache_settings = LLMCacheSettings(**llm_cache_config)
+        else:
+            llm_cache_settings = LLMCacheSettings()
+
+        compaction_config = raw_config.get("compaction")
+        if compaction_config:
+            compaction_settings = CompactionSettings(**compaction_config)
+        else:
+            compaction_settings = CompactionSettings()
+
+        llm_routing_config = raw_config.get("llm_routing")
+        if llm_routing_config:
+            llm_routing_settings = LLMRoutingSettings(**llm_routing_config)
+        else:
+            llm_routing_settings = LLMRoutingSettings()
+
+        loop_detection_config = raw_config.get("loop_detection")
+        if loop_detection_config:
+            loop_detection_settings = LoopDetectionSettings(**loop_detection_config)
+        else:
+            loop_detection_settings = LoopDetectionSettings()
+
+        tool_policy_config = raw_config.get("tool_policy")
+        if tool_policy_config:
+            tool_policy_settings = ToolPolicySettings(**tool_policy_config)
+        else:
+            tool_policy_settings = ToolPolicySettings()
+
+        tool_cache_config = raw_config.get("tool_cache")
+        if tool_cache_config:
+            tool_cache_settings = ToolCacheSettings(**tool_cache_config)
+        else:
+            tool_cache_settings = ToolCacheSettings()
+
+        agent_pool_config = raw_config.get("agent_pool")
+        if agent_pool_config:
+            agent_pool_settings = AgentPoolSettings(**agent_pool_config)
+        else:
+            agent_pool_settings = AgentPoolSettings()
+
+        python_execute_config = raw_config.get("python_execute")
+        if python_execute_config:
+            python_execute_settings = PythonExecuteSettings(**python_execute_config)
+        else:
+            python_execute_settings = PythonExecuteSettings()
+
         run_flow_config = raw_config.get("runflow")
         if run_flow_config:
             run_flow_settings = RunflowSettings(**run_flow_config)
@@ -430,7 +769,16 @@ class Config:
                     for name, override_config in llm_overrides.items()
                 },
             },
+            "llm_cache": llm_cache_settings,
+            "compaction": compaction_settings,
+            "llm_routing": llm_routing_settings,
+            "loop_detection": loop_detection_settings,
+            "tool_policy": tool_policy_settings,
+            "tool_cache": tool_cache_settings,
+            "agent_pool": agent_pool_settings,
+            "python_execute": python_execute_settings,
             "sandbox": sandbox_settings,
+            "sandbox_pool": sandbox_pool_settings,
             "browser_config": browser_settings,
             "search_config": search_settings,
             "mcp_config": mcp_settings,
@@ -444,10 +792,55 @@ class Config:
     def llm(self) -> Dict[str, LLMSettings]:
         return self._config.llm
 
+    @property
+    def llm_cache(self) -> LLMCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.llm_cache
+
+    @property
+    def compaction(self) -> CompactionSettings:
+        """Get the agent context compaction configuration"""
+        return self._config.compaction
+
+    @property
+    def llm_routing(self) -> LLMRoutingSettings:
+        """Get the LLM routing tier configuration"""
+        return self._config.llm_routing
+
+    @property
+    def loop_detection(self) -> LoopDetectionSettings:
+        """Get the agent loop detection configuration"""
+        return self._config.loop_detection
+
+    @property
+    def tool_policy(self) -> ToolPolicySettings:
+        """Get the tool execution timeouts and budgets"""
+        return self._config.tool_policy
+
+    @property
+    def tool_cache(self) -> ToolCacheSettings:
+        """Get the tool result cache configuration"""
+        return self._config.tool_cache
+
+    @property
+    def agent_pool(self) -> AgentPoolSettings:
+        """Get the A2A agent pool configuration"""
+        return self._config.agent_pool
+
+    @property
+    def python_execute(self) -> PythonExecuteSettings:
+        """Get the Python code execution configuration"""
+        return self._config.python_execute
+
     @property
     def sandbox(self) -> SandboxSettings:
         return self._config.sandbox
 
+    @property
+    def sandbox_pool(self) -> SandboxPoolSettings:
+        """Get the sandbox pool configuration"""
+        return self._config.sandbox_pool
+
     @property
     def daytona(self) -> DaytonaSettings:
         return self._config.daytona_config
@@ -0,0 +1,124 @@
+"""Progress events of agent runs.
+
+An agent with an `event_bus` publishes what it is doing as it runs: run and
+step boundaries, its thoughts, and tool calls as they start and finish.
+Subscribers such as the A2A server read the events as an async stream and
+forward them to clients while the run is still going.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.logger import logger
+
+
+EVENT_TYPE = Literal[
+    "run_started",
+    "step_started",
+    "thought",
+    "tool_started",
+    "tool_finished",
+    "step_finished",
+    "run_finished",
+    "run_failed",
+    "run_cancelled",
+]
+
+# Events after which a run publishes nothing more
+TERMINAL_EVENTS = {"run_finished", "run_failed", "run_cancelled"}
+
+
+class AgentEvent(BaseModel):
+    """A single progress event of an agent run."""
+
+    type: EVENT_TYPE
+    agent: str = Field(..., description="Name of the publishing agent")
+    step: int = Field(0, description="Step the event belongs to, 0 outside steps")
+    data: Dict[str, Any] = Field(default_factory=dict)
+    timestamp: float = Field(default_factory=time.time)
+
+    @property
+    def terminal(self) -> bool:
+        """Whether the event ends the run."""
+        return self.type in TERMINAL_EVENTS
+
+
+class EventSubscription:
+    """Async iterator over the events published after it subscribed.
+
+    Iteration ends after a terminal event or when the bus is closed.
+    """
+
+    def __init__(self, bus: "EventBus", max_queue: int):
+        self._bus = bus
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._max_queue = max_queue
+        self._ended = False
+        self.dropped = 0
+
+    def _put(self, event: Optional[AgentEvent]) -> None:
+        if self._ended:
+            return
+        # Publishing never blocks the agent: a slow subscriber loses the
+        # oldest progress events, never the end of the stream
+        while event is not None and self._queue.qsize() >= self._max_queue:
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+        if event is None or event.terminal:
+            self._ended = True
+            if event is not None:
+                self._queue.put_nowait(None)
+
+    def __aiter__(self) -> AsyncIterator[AgentEvent]:
+        return self
+
+    async def __anext__(self) -> AgentEvent:
+        event = await self._queue.get()
+        if event is None:
+            self.close()
+            raise StopAsyncIteration
+        return event
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fan-out of agent events to any number of subscribers."""
+
+    def __init__(self, max_queue: int = 1000):
+        """Initializes a bus without subscribers.
+
+        Args:
+            max_queue: Events buffered per subscriber before the oldest are dropped.
+        """
+        self.max_queue = max_queue
+        self._subscriptions: List[EventSubscription] = []
+
+    def subscribe(self) -> EventSubscription:
+        """Subscribe to events published from now on."""
+        subscription = EventSubscription(self, self.max_queue)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def publish(self, event: AgentEvent) -> None:
+        """Deliver an event to all subscribers without waiting for them."""
+        for subscription in list(self._subscriptions):
+            try:
+                subscription._put(event)
+            except Exception as e:
+                logger.warning(f"Failed to deliver {event.type} event: {e}")
+
+    def close(self) -> None:
+        """End the streams of all subscribers."""
+        for subscription in list(self._subscriptions):
+            subscription._put(None)
@@ -11,3 +11,15 @@ class OpenManusError(Exception):
 
 class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
+
+
+class EmptyResponseError(OpenManusError, ValueError):
+    """Exception raised when the LLM returns no content; worth retrying"""
+
+
+class AgentCancelled(OpenManusError):
+    """Exception raised when an agent run is cancelled"""
+
+    def __init__(self, reason: str = "cancelled"):
+        super().__init__(reason)
+        self.reason = reason
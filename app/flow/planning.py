@@ -8,6 +8,7 @@ from pydantic import Field
 from app.agent.base import BaseAgent
 from app.flow.base import BaseFlow
 from app.llm import LLM
+from app.llm_router import LLM_ROUTER, TaskClass
 from app.logger import logger
 from app.schema import AgentState, Message, ToolChoice
 from app.tool import PlanningTool
@@ -417,8 +418,11 @@ class PlanningFlow(BaseFlow):
                 f"The plan has been completed. Here is the final plan status:\n\n{plan_text}\n\nPlease provide a summary of what was accomplished and any final thoughts."
             )
 
-            response = await self.llm.ask(
-                messages=[user_message], system_msgs=[system_message]
+            response = await LLM_ROUTER.ask(
+                TaskClass.SUMMARIZE,
+                messages=[user_message],
+                fallback=self.llm,
+                system_msgs=[system_message],
             )
 
             return f"Plan completed:\n\n{response}"
@@ -1,26 +1,37 @@
+import functools
+import inspect
+import json
 import math
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
 
 import tiktoken
-from openai import (
-    APIError,
-    AsyncAzureOpenAI,
-    AsyncOpenAI,
-    AuthenticationError,
-    OpenAIError,
-    RateLimitError,
+from openai import APIError, AuthenticationError, OpenAIError, RateLimitError
+from openai.types import CompletionUsage
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
 )
-from openai.types.chat import ChatCompletion, ChatCompletionMessage
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+from openai.types.chat.chat_completion_chunk import ChoiceDeltaToolCall
+from openai.types.chat.chat_completion_message_tool_call import (
+    Function as ToolCallFunction,
 )
+from tenacity import AsyncRetrying, retry, retry_if_exception, stop_after_attempt
 
 from app.bedrock import BedrockClient
 from app.config import LLMSettings, config
-from app.exceptions import TokenLimitExceeded
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
+from app.llm_batch import (
+    BatchItemResult,
+    BatchResult,
+    describe_error,
+    gather_bounded,
+    run_offline_batch,
+)
+from app.llm_cache import get_response_cache
+from app.llm_pool import CLIENT_POOL
+from app.llm_rate_limit import is_retryable_error, retry_wait
 from app.logger import logger  # Assuming a logger is set up in your app
 from app.schema import (
     ROLE_VALUES,
@@ -29,6 +40,7 @@ from app.schema import (
     Message,
     ToolChoice,
 )
+from app.session import TokenUsage, current_session
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -54,12 +66,25 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
+    # Cache constants
+    MAX_CACHE_ENTRIES = 4096
+
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
+        # Per-message and per-tool token counts, so only new history gets tokenized
+        self._message_cache: OrderedDict[tuple, int] = OrderedDict()
+        self._tool_cache: OrderedDict[str, int] = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.tokens_encoded = 0
 
     def count_text(self, text: str) -> int:
         """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        if not text:
+            return 0
+        token_count = len(self.tokenizer.encode(text))
+        self.tokens_encoded += token_count
+        return token_count
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -144,31 +169,117 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
+    def count_single_message(self, message: dict) -> int:
+        """Calculate tokens for one message, excluding the list format tokens"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
+
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
+
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
+
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
+
+        return tokens
+
     def count_message_tokens(self, messages: List[dict]) -> int:
         """Calculate the total number of tokens in a message list"""
         total_tokens = self.FORMAT_TOKENS  # Base format tokens
 
         for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+            key = self._message_key(message)
+            tokens = self._cache_get(self._message_cache, key)
+            if tokens is None:
+                tokens = self.count_single_message(message)
+                self._cache_put(self._message_cache, key, tokens)
+            total_tokens += tokens
 
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+        return total_tokens
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+    def count_tools_tokens(self, tools: Optional[List[dict]]) -> int:
+        """Calculate tokens for a list of tool schemas"""
+        token_count = 0
+        for tool in tools or []:
+            text = str(tool)
+            tokens = self._cache_get(self._tool_cache, text)
+            if tokens is None:
+                tokens = self.count_text(text)
+                self._cache_put(self._tool_cache, text, tokens)
+            token_count += tokens
+        return token_count
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get token count cache statistics"""
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "tokens_encoded": self.tokens_encoded,
+            "cached_messages": len(self._message_cache),
+            "cached_tools": len(self._tool_cache),
+        }
+
+    def clear_cache(self) -> None:
+        """Drop all cached token counts"""
+        self._message_cache.clear()
+        self._tool_cache.clear()
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+    @staticmethod
+    def _content_item_key(item: Union[str, dict]):
+        """Build a hashable key for one multimodal content item"""
+        if isinstance(item, str):
+            return item
+        if "text" in item:
+            return ("text", item["text"])
+        if "image_url" in item:
+            # Image tokens depend on detail and dimensions only, never on the URL
+            return ("image", item.get("detail"), tuple(item.get("dimensions", ())))
+        return None
+
+    @classmethod
+    def _message_key(cls, message: dict) -> tuple:
+        """Build a hashable key from the fields that contribute to a message's tokens"""
+        content = message.get("content")
+        if isinstance(content, list):
+            content = tuple(cls._content_item_key(item) for item in content)
+        tool_calls = message.get("tool_calls")
+        if tool_calls:
+            tool_calls = tuple(
+                (
+                    tool_call["function"].get("name", ""),
+                    tool_call["function"].get("arguments", ""),
+                )
+                for tool_call in tool_calls
+                if "function" in tool_call
+            )
+        return (
+            message.get("role", ""),
+            content,
+            tool_calls,
+            message.get("name", ""),
+            message.get("tool_call_id", ""),
+        )
 
-            total_tokens += tokens
+    def _cache_get(self, cache: OrderedDict, key) -> Optional[int]:
+        tokens = cache.get(key)
+        if tokens is None:
+            self.cache_misses += 1
+            return None
+        cache.move_to_end(key)
+        self.cache_hits += 1
+        return tokens
 
-        return total_tokens
+    def _cache_put(self, cache: OrderedDict, key, tokens: int) -> None:
+        cache[key] = tokens
+        if len(cache) > self.MAX_CACHE_ENTRIES:
+            cache.popitem(last=False)
 
 
 class LLM:
@@ -197,15 +308,25 @@ class LLM:
             self.api_version = llm_config.api_version
             self.base_url = llm_config.base_url
 
-            # Add token counting related attributes
-            self.total_input_tokens = 0
-            self.total_completion_tokens = 0
+            # Token counters live in the current session, see `usage`
+            self.config_name = config_name
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
                 else None
             )
 
+            # Request layout for provider-side prompt caching
+            self.stable_prompt_prefix = llm_config.stable_prompt_prefix
+            self.prompt_cache_control = llm_config.prompt_cache_control
+
+            self.input_cost_per_million_tokens = (
+                llm_config.input_cost_per_million_tokens
+            )
+            self.output_cost_per_million_tokens = (
+                llm_config.output_cost_per_million_tokens
+            )
+
             # Initialize tokenizer
             try:
                 self.tokenizer = tiktoken.encoding_for_model(self.model)
@@ -213,39 +334,97 @@ class LLM:
                 # If the model is not in tiktoken's presets, use cl100k_base as default
                 self.tokenizer = tiktoken.get_encoding("cl100k_base")
 
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
-                )
-            elif self.api_type == "aws":
+            if self.api_type == "aws":
                 self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                # Share warm connections with other LLMs using the same endpoint
+                self.client = CLIENT_POOL.get_client(llm_config)
+
+            # Shared per endpoint, so all agents on one key queue together
+            self.rate_limiter = CLIENT_POOL.get_rate_limiter(llm_config)
 
             self.token_counter = TokenCounter(self.tokenizer)
 
+            # Shared response cache, None unless enabled in [llm_cache]
+            self.response_cache = get_response_cache()
+            self.cache_nondeterministic = bool(
+                config.llm_cache and config.llm_cache.cache_nondeterministic
+            )
+
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
-        if not text:
-            return 0
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count_text(text)
 
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
-    def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
-        """Update token counts"""
+    def count_tools_tokens(self, tools: Optional[List[dict]]) -> int:
+        return self.token_counter.count_tools_tokens(tools)
+
+    @property
+    def token_cache_stats(self) -> Dict[str, int]:
+        """Hits, misses and tokens encoded by the token count cache"""
+        return self.token_counter.get_cache_stats()
+
+    @property
+    def usage(self) -> TokenUsage:
+        """Tokens used with this configuration in the current session"""
+        return current_session().usage(self.config_name)
+
+    @property
+    def total_input_tokens(self) -> int:
+        return self.usage.input_tokens
+
+    @total_input_tokens.setter
+    def total_input_tokens(self, value: int) -> None:
+        self.usage.input_tokens = value
+
+    @property
+    def total_completion_tokens(self) -> int:
+        return self.usage.completion_tokens
+
+    @total_completion_tokens.setter
+    def total_completion_tokens(self, value: int) -> None:
+        self.usage.completion_tokens = value
+
+    @property
+    def total_cached_tokens(self) -> int:
+        return self.usage.cached_tokens
+
+    @total_cached_tokens.setter
+    def total_cached_tokens(self, value: int) -> None:
+        self.usage.cached_tokens = value
+
+    def update_token_count(
+        self, input_tokens: int, completion_tokens: int = 0, cached_tokens: int = 0
+    ) -> None:
+        """Update token counts, including input tokens read from the prompt cache"""
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
         self.total_completion_tokens += completion_tokens
+        self.total_cached_tokens += cached_tokens
         logger.debug(
             f"Token usage: Input={input_tokens}, Completion={completion_tokens}, "
+            f"Cached={cached_tokens}, "
             f"Cumulative Input={self.total_input_tokens}, Cumulative Completion={self.total_completion_tokens}, "
+            f"Cumulative Cached={self.total_cached_tokens}, "
             f"Total={input_tokens + completion_tokens}, Cumulative Total={self.total_input_tokens + self.total_completion_tokens}"
         )
 
+    def update_token_count_from_usage(self, usage: Optional[CompletionUsage]) -> None:
+        """Update token counts from a response's usage block"""
+        if usage is None:
+            return
+        # OpenAI reports prompt_tokens_details.cached_tokens; Anthropic-compatible
+        # gateways pass through cache_read_input_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) if details else None
+        if cached_tokens is None:
+            cached_tokens = getattr(usage, "cache_read_input_tokens", None)
+        self.update_token_count(
+            usage.prompt_tokens, usage.completion_tokens, cached_tokens or 0
+        )
+
     def check_token_limit(self, input_tokens: int) -> bool:
         """Check if token limits are exceeded"""
         if self.max_input_tokens is not None:
@@ -263,6 +442,36 @@ class LLM:
 
         return "Token limit exceeded"
 
+    def _response_cache_key(
+        self, kind: str, params: dict, cache: Optional[bool]
+    ) -> Optional[str]:
+        """Get the response cache key for a request, or None to bypass the cache"""
+        if self.response_cache is None or cache is False:
+            return None
+        # Only deterministic requests are cached unless the caller or config opts in
+        if (
+            cache is None
+            and params.get("temperature") != 0
+            and not self.cache_nondeterministic
+        ):
+            return None
+        return self.response_cache.make_key(
+            {
+                "kind": kind,
+                **{k: v for k, v in params.items() if k not in ("timeout", "stream")},
+            }
+        )
+
+    def _store_response(self, cache_key: Optional[str], value: str) -> None:
+        """Store a response in the cache if the request was cacheable"""
+        if cache_key:
+            self.response_cache.put(cache_key, value)
+
+    @property
+    def response_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss metrics of the response cache, empty if it is disabled"""
+        return self.response_cache.get_stats() if self.response_cache else {}
+
     @staticmethod
     def format_messages(
         messages: List[Union[dict, Message]], supports_images: bool = False
@@ -292,51 +501,19 @@ class LLM:
         formatted_messages = []
 
         for message in messages:
-            # Convert Message objects to dictionaries
+            # Reuse the Message's cached wire dict instead of rebuilding it
             if isinstance(message, Message):
-                message = message.to_dict()
+                wire_message = message.to_wire(supports_images)
+                if wire_message is not None:
+                    formatted_messages.append(wire_message)
+                continue
 
             if isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
                 if "role" not in message:
                     raise ValueError("Message dict must contain 'role' field")
 
-                # Process base64 images if present and model supports images
-                if supports_images and message.get("base64_image"):
-                    # Initialize or convert content to appropriate format
-                    if not message.get("content"):
-                        message["content"] = []
-                    elif isinstance(message["content"], str):
-                        message["content"] = [
-                            {"type": "text", "text": message["content"]}
-                        ]
-                    elif isinstance(message["content"], list):
-                        # Convert string items to proper text objects
-                        message["content"] = [
-                            (
-                                {"type": "text", "text": item}
-                                if isinstance(item, str)
-                                else item
-                            )
-                            for item in message["content"]
-                        ]
-
-                    # Add the image to content
-                    message["content"].append(
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{message['base64_image']}"
-                            },
-                        }
-                    )
-
-                    # Remove the base64_image field
-                    del message["base64_image"]
-                # If model doesn't support images but message has base64_image, handle gracefully
-                elif not supports_images and message.get("base64_image"):
-                    # Just remove the base64_image field and keep the text content
-                    del message["base64_image"]
+                message = Message.format_wire(message, supports_images)
 
                 if "content" in message or "tool_calls" in message:
                     formatted_messages.append(message)
@@ -351,12 +528,60 @@ class LLM:
 
         return formatted_messages
 
+    def _build_params(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        temperature: Optional[float],
+    ) -> tuple[dict, int]:
+        """
+        Validate a plain request and build its completion parameters.
+
+        Returns:
+            tuple[dict, int]: The completion parameters and the input token count
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If messages are invalid
+        """
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Format system and user messages with image support check
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+
+        # Calculate input token count
+        input_tokens = self.count_message_tokens(messages)
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        params = {
+            "model": self.model,
+            "messages": messages,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+
+        return params, input_tokens
+
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_wait,
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=retry_if_exception(is_retryable_error),
     )
     async def ask(
         self,
@@ -364,6 +589,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -373,6 +599,8 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            cache (bool): Force (True) or bypass (False) the response cache;
+                by default only deterministic requests are cached
 
         Returns:
             str: The generated response
@@ -384,71 +612,51 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format system and user messages with image support check
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
+            params, input_tokens = self._build_params(
+                messages, system_msgs, temperature
+            )
 
-            params = {
-                "model": self.model,
-                "messages": messages,
-            }
-
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
+            cache_key = self._response_cache_key("ask", params, cache)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
             if not stream:
                 # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    **params, stream=False
-                )
+                async with self.rate_limiter.limit(input_tokens):
+                    response = await self.client.chat.completions.create(
+                        **params, stream=False
+                    )
 
                 if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
+                    raise EmptyResponseError("Empty or invalid response from LLM")
 
                 # Update token counts
-                self.update_token_count(
-                    response.usage.prompt_tokens, response.usage.completion_tokens
-                )
+                self.update_token_count_from_usage(response.usage)
 
+                self._store_response(cache_key, response.choices[0].message.content)
                 return response.choices[0].message.content
 
             # Streaming request, For streaming, update estimated token count before making the request
             self.update_token_count(input_tokens)
 
-            response = await self.client.chat.completions.create(**params, stream=True)
-
             collected_messages = []
             completion_text = ""
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                completion_text += chunk_message
-                print(chunk_message, end="", flush=True)
+            async with self.rate_limiter.limit(input_tokens):
+                response = await self.client.chat.completions.create(
+                    **params, stream=True
+                )
+                async for chunk in response:
+                    chunk_message = chunk.choices[0].delta.content or ""
+                    collected_messages.append(chunk_message)
+                    completion_text += chunk_message
+                    print(chunk_message, end="", flush=True)
 
             print()  # Newline after streaming
             full_response = "".join(collected_messages).strip()
             if not full_response:
-                raise ValueError("Empty response from streaming LLM")
+                raise EmptyResponseError("Empty response from streaming LLM")
 
             # estimate completion tokens for streaming response
             completion_tokens = self.count_tokens(completion_text)
@@ -457,6 +665,7 @@ class LLM:
             )
             self.total_completion_tokens += completion_tokens
 
+            self._store_response(cache_key, full_response)
             return full_response
 
         except TokenLimitExceeded:
@@ -479,11 +688,9 @@ class LLM:
             raise
 
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_wait,
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=retry_if_exception(is_retryable_error),
     )
     async def ask_with_images(
         self,
@@ -529,15 +736,17 @@ class LLM:
                     "The last message must be from the user to attach images"
                 )
 
-            # Process the last user message to include images
-            last_message = formatted_messages[-1]
+            # Process the last user message to include images. Copy it first,
+            # since formatted messages may be shared wire dicts from Message objects
+            last_message = dict(formatted_messages[-1])
+            formatted_messages[-1] = last_message
 
             # Convert content to multimodal format if needed
             content = last_message["content"]
             multimodal_content = (
                 [{"type": "text", "text": content}]
                 if isinstance(content, str)
-                else content
+                else list(content)
                 if isinstance(content, list)
                 else []
             )
@@ -590,29 +799,31 @@ class LLM:
 
             # Handle non-streaming request
             if not stream:
-                response = await self.client.chat.completions.create(**params)
+                async with self.rate_limiter.limit(input_tokens):
+                    response = await self.client.chat.completions.create(**params)
 
                 if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
+                    raise EmptyResponseError("Empty or invalid response from LLM")
 
                 self.update_token_count(response.usage.prompt_tokens)
                 return response.choices[0].message.content
 
             # Handle streaming request
             self.update_token_count(input_tokens)
-            response = await self.client.chat.completions.create(**params)
 
             collected_messages = []
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                print(chunk_message, end="", flush=True)
+            async with self.rate_limiter.limit(input_tokens):
+                response = await self.client.chat.completions.create(**params)
+                async for chunk in response:
+                    chunk_message = chunk.choices[0].delta.content or ""
+                    collected_messages.append(chunk_message)
+                    print(chunk_message, end="", flush=True)
 
             print()  # Newline after streaming
             full_response = "".join(collected_messages).strip()
 
             if not full_response:
-                raise ValueError("Empty response from streaming LLM")
+                raise EmptyResponseError("Empty response from streaming LLM")
 
             return full_response
 
@@ -634,12 +845,128 @@ class LLM:
             logger.error(f"Unexpected error in ask_with_images: {e}")
             raise
 
+    def _build_tool_params(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        timeout: int,
+        tools: Optional[List[dict]],
+        tool_choice: TOOL_CHOICE_TYPE,  # type: ignore
+        temperature: Optional[float],
+        volatile_msgs: Optional[List[Union[dict, Message]]] = None,
+        **kwargs,
+    ) -> tuple[dict, int]:
+        """
+        Validate a tool request and build its completion parameters.
+
+        Messages are laid out as system messages, history, then volatile
+        messages, so that everything before the volatile tail can be served
+        from the provider's prompt cache on the next request.
+
+        Returns:
+            tuple[dict, int]: The completion parameters and the input token count
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+        """
+        # Validate tool_choice
+        if tool_choice not in TOOL_CHOICE_VALUES:
+            raise ValueError(f"Invalid tool_choice: {tool_choice}")
+
+        # Check if the model supports images
+        supports_images = self.model in MULTIMODAL_MODELS
+
+        # Format messages
+        if system_msgs:
+            system_msgs = self.format_messages(system_msgs, supports_images)
+            messages = system_msgs + self.format_messages(messages, supports_images)
+        else:
+            messages = self.format_messages(messages, supports_images)
+        prefix_length = len(messages)
+        if volatile_msgs:
+            messages = messages + self.format_messages(volatile_msgs, supports_images)
+
+        # Calculate input token count
+        input_tokens = self.count_message_tokens(messages)
+
+        # If there are tools, calculate token count for tool descriptions
+        input_tokens += self.count_tools_tokens(tools)
+
+        # Check if token limits are exceeded
+        if not self.check_token_limit(input_tokens):
+            error_message = self.get_limit_error_message(input_tokens)
+            # Raise a special exception that won't be retried
+            raise TokenLimitExceeded(error_message)
+
+        # Validate tools if provided
+        if tools:
+            for tool in tools:
+                if not isinstance(tool, dict) or "type" not in tool:
+                    raise ValueError("Each tool must be a dict with 'type' field")
+
+        if self.stable_prompt_prefix and tools:
+            # Tool schemas precede the messages in the prompt, so their order
+            # must not depend on how the tool collection was assembled
+            tools = sorted(
+                tools, key=lambda tool: tool.get("function", {}).get("name", "")
+            )
+        if self.prompt_cache_control:
+            messages = self._mark_cache_breakpoint(messages, prefix_length)
+
+        # Set up the completion request
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "timeout": timeout,
+            **kwargs,
+        }
+
+        if self.model in REASONING_MODELS:
+            params["max_completion_tokens"] = self.max_tokens
+        else:
+            params["max_tokens"] = self.max_tokens
+            params["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+
+        return params, input_tokens
+
+    @staticmethod
+    def _mark_cache_breakpoint(messages: List[dict], prefix_length: int) -> List[dict]:
+        """Add a cache_control breakpoint to the last stable message with content"""
+        for index in range(prefix_length - 1, -1, -1):
+            content = messages[index].get("content")
+            if isinstance(content, str) and content:
+                parts = [{"type": "text", "text": content}]
+            elif isinstance(content, list) and content:
+                parts = list(content)
+            else:
+                continue
+            parts[-1] = {**parts[-1], "cache_control": {"type": "ephemeral"}}
+            # Copy, since formatted messages may be shared wire dicts
+            messages = list(messages)
+            messages[index] = {**messages[index], "content": parts}
+            break
+        return messages
+
+    @staticmethod
+    def _log_api_error(oe: OpenAIError) -> None:
+        """Log an OpenAI API error with a hint for common causes"""
+        logger.error(f"OpenAI API error: {oe}")
+        if isinstance(oe, AuthenticationError):
+            logger.error("Authentication failed. Check API key.")
+        elif isinstance(oe, RateLimitError):
+            logger.error("Rate limit exceeded. Consider increasing retry attempts.")
+        elif isinstance(oe, APIError):
+            logger.error(f"API error: {oe}")
+
     @retry(
-        wait=wait_random_exponential(min=1, max=60),
+        wait=retry_wait,
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=retry_if_exception(is_retryable_error),
     )
     async def ask_tool(
         self,
@@ -649,6 +976,8 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
+        volatile_msgs: Optional[List[Union[dict, Message]]] = None,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -661,6 +990,10 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            cache: Force (True) or bypass (False) the response cache;
+                by default only deterministic requests are cached
+            volatile_msgs: Per-request messages sent after the history, such as
+                step prompts and browser state
             **kwargs: Additional completion arguments
 
         Returns:
@@ -673,65 +1006,28 @@ class LLM:
             Exception: For unexpected errors
         """
         try:
-            # Validate tool_choice
-            if tool_choice not in TOOL_CHOICE_VALUES:
-                raise ValueError(f"Invalid tool_choice: {tool_choice}")
-
-            # Check if the model supports images
-            supports_images = self.model in MULTIMODAL_MODELS
-
-            # Format messages
-            if system_msgs:
-                system_msgs = self.format_messages(system_msgs, supports_images)
-                messages = system_msgs + self.format_messages(messages, supports_images)
-            else:
-                messages = self.format_messages(messages, supports_images)
-
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
-            # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-
-            input_tokens += tools_tokens
-
-            # Check if token limits are exceeded
-            if not self.check_token_limit(input_tokens):
-                error_message = self.get_limit_error_message(input_tokens)
-                # Raise a special exception that won't be retried
-                raise TokenLimitExceeded(error_message)
-
-            # Validate tools if provided
-            if tools:
-                for tool in tools:
-                    if not isinstance(tool, dict) or "type" not in tool:
-                        raise ValueError("Each tool must be a dict with 'type' field")
-
-            # Set up the completion request
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "tools": tools,
-                "tool_choice": tool_choice,
-                "timeout": timeout,
+            params, input_tokens = self._build_tool_params(
+                messages,
+                system_msgs,
+                timeout,
+                tools,
+                tool_choice,
+                temperature,
+                volatile_msgs,
                 **kwargs,
-            }
+            )
 
-            if self.model in REASONING_MODELS:
-                params["max_completion_tokens"] = self.max_tokens
-            else:
-                params["max_tokens"] = self.max_tokens
-                params["temperature"] = (
-                    temperature if temperature is not None else self.temperature
-                )
+            cache_key = self._response_cache_key("ask_tool", params, cache)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return ChatCompletionMessage.model_validate_json(cached)
 
             params["stream"] = False  # Always use non-streaming for tool requests
-            response: ChatCompletion = await self.client.chat.completions.create(
-                **params
-            )
+            async with self.rate_limiter.limit(input_tokens):
+                response: ChatCompletion = await self.client.chat.completions.create(
+                    **params
+                )
 
             # Check if response is valid
             if not response.choices or not response.choices[0].message:
@@ -740,10 +1036,11 @@ class LLM:
                 return None
 
             # Update token counts
-            self.update_token_count(
-                response.usage.prompt_tokens, response.usage.completion_tokens
-            )
+            self.update_token_count_from_usage(response.usage)
 
+            self._store_response(
+                cache_key, response.choices[0].message.model_dump_json()
+            )
             return response.choices[0].message
 
         except TokenLimitExceeded:
@@ -753,14 +1050,383 @@ class LLM:
             logger.error(f"Validation error in ask_tool: {ve}")
             raise
         except OpenAIError as oe:
-            logger.error(f"OpenAI API error: {oe}")
-            if isinstance(oe, AuthenticationError):
-                logger.error("Authentication failed. Check API key.")
-            elif isinstance(oe, RateLimitError):
-                logger.error("Rate limit exceeded. Consider increasing retry attempts.")
-            elif isinstance(oe, APIError):
-                logger.error(f"API error: {oe}")
+            self._log_api_error(oe)
             raise
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def ask_tool_stream(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 300,
+        tools: Optional[List[dict]] = None,
+        tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
+        temperature: Optional[float] = None,
+        on_tool_call: Optional[
+            Callable[[ChatCompletionMessageToolCall], Optional[Awaitable[None]]]
+        ] = None,
+        volatile_msgs: Optional[List[Union[dict, Message]]] = None,
+        **kwargs,
+    ) -> ChatCompletionMessage | None:
+        """
+        Ask LLM using functions/tools over a streaming response.
+
+        Tool calls are assembled from the streamed deltas and handed to
+        `on_tool_call` as soon as each one's arguments are complete, so callers
+        can start executing early calls while later ones are still generated.
+
+        Args:
+            messages: List of conversation messages
+            system_msgs: Optional system messages to prepend
+            timeout: Request timeout in seconds
+            tools: List of tools to use
+            tool_choice: Tool choice strategy
+            temperature: Sampling temperature for the response
+            on_tool_call: Optional callback (sync or async) for each completed tool call
+            volatile_msgs: Per-request messages sent after the history, such as
+                step prompts and browser state
+            **kwargs: Additional completion arguments
+
+        Returns:
+            ChatCompletionMessage: The assembled response, same shape as `ask_tool`
+
+        Raises:
+            TokenLimitExceeded: If token limits are exceeded
+            ValueError: If tools, tool_choice, or messages are invalid
+            OpenAIError: If API call fails after retries
+            Exception: For unexpected errors
+        """
+        dispatched = False
+
+        def should_retry(error: BaseException) -> bool:
+            # Once a tool call was handed out, retrying would dispatch it again
+            return not dispatched and is_retryable_error(error)
+
+        async def dispatch(tool_call: ChatCompletionMessageToolCall) -> None:
+            nonlocal dispatched
+            dispatched = True
+            if on_tool_call:
+                result = on_tool_call(tool_call)
+                if inspect.isawaitable(result):
+                    await result
+
+        try:
+            async for attempt in AsyncRetrying(
+                wait=retry_wait,
+                stop=stop_after_attempt(6),
+                retry=retry_if_exception(should_retry),
+                reraise=True,
+            ):
+                with attempt:
+                    return await self._stream_tool_completion(
+                        messages,
+                        system_msgs,
+                        timeout,
+                        tools,
+                        tool_choice,
+                        temperature,
+                        dispatch,
+                        volatile_msgs=volatile_msgs,
+                        **kwargs,
+                    )
+        except TokenLimitExceeded:
+            raise
+        except ValueError as ve:
+            logger.error(f"Validation error in ask_tool_stream: {ve}")
+            raise
+        except OpenAIError as oe:
+            self._log_api_error(oe)
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in ask_tool_stream: {e}")
+            raise
+
+    async def _stream_tool_completion(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]],
+        timeout: int,
+        tools: Optional[List[dict]],
+        tool_choice: TOOL_CHOICE_TYPE,  # type: ignore
+        temperature: Optional[float],
+        dispatch: Callable[[ChatCompletionMessageToolCall], Awaitable[None]],
+        **kwargs,
+    ) -> ChatCompletionMessage | None:
+        """Run one streaming tool request, dispatching tool calls as they complete"""
+        params, input_tokens = self._build_tool_params(
+            messages, system_msgs, timeout, tools, tool_choice, temperature, **kwargs
+        )
+
+        # For streaming, update estimated token count before making the request
+        self.update_token_count(input_tokens)
+
+        params["stream"] = True
+        accumulator = ToolCallAccumulator()
+        content_parts = []
+        async with self.rate_limiter.limit(input_tokens):
+            response = await self.client.chat.completions.create(**params)
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content_parts.append(delta.content)
+                for tool_call in accumulator.add(delta.tool_calls):
+                    await dispatch(tool_call)
+
+        for tool_call in accumulator.finish():
+            await dispatch(tool_call)
+
+        content = "".join(content_parts)
+        tool_calls = accumulator.tool_calls
+        if not content and not tool_calls:
+            return None
+
+        # Estimate completion tokens for streaming response
+        completion_tokens = self.count_tokens(content) + sum(
+            self.count_tokens(call.function.arguments) for call in tool_calls
+        )
+        self.total_completion_tokens += completion_tokens
+
+        return ChatCompletionMessage(
+            role="assistant", content=content or None, tool_calls=tool_calls or None
+        )
+
+    async def ask_many(
+        self,
+        requests: List[Union[List[Union[dict, Message]], dict]],
+        max_concurrency: int = 8,
+        retries: int = 2,
+        offline: bool = False,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ) -> BatchResult:
+        """
+        Run many `ask` requests with bounded concurrency.
+
+        Args:
+            requests: Message lists, or dicts of `ask` arguments per request
+            max_concurrency: Maximum number of requests in flight
+            retries: Retries per request on retryable errors
+            offline: Submit the requests as one job to the `/v1/batches` API
+                instead, for non-interactive work that can wait for results
+            poll_interval: Seconds between batch status checks in offline mode
+            **kwargs: `ask` arguments shared by all requests
+
+        Returns:
+            BatchResult: Responses in request order, failures reported per item
+        """
+        requests = self._batch_requests(requests, {"stream": False, **kwargs})
+        if offline:
+
+            def build(messages, system_msgs=None, temperature=None, **_):
+                return self._build_params(messages, system_msgs, temperature)
+
+            def parse(response: ChatCompletion) -> str:
+                if not response.choices or not response.choices[0].message.content:
+                    raise EmptyResponseError("Empty or invalid response from LLM")
+                return response.choices[0].message.content
+
+            return await self._run_offline(requests, build, parse, poll_interval)
+
+        ask = LLM.ask.retry_with(stop=stop_after_attempt(retries + 1))
+        return await gather_bounded(
+            [functools.partial(ask, self, **request) for request in requests],
+            max_concurrency,
+        )
+
+    async def ask_tool_many(
+        self,
+        requests: List[Union[List[Union[dict, Message]], dict]],
+        max_concurrency: int = 8,
+        retries: int = 2,
+        offline: bool = False,
+        poll_interval: float = 30.0,
+        **kwargs,
+    ) -> BatchResult:
+        """
+        Run many `ask_tool` requests with bounded concurrency.
+
+        Args:
+            requests: Message lists, or dicts of `ask_tool` arguments per request
+            max_concurrency: Maximum number of requests in flight
+            retries: Retries per request on retryable errors
+            offline: Submit the requests as one job to the `/v1/batches` API
+                instead, for non-interactive work that can wait for results
+            poll_interval: Seconds between batch status checks in offline mode
+            **kwargs: `ask_tool` arguments shared by all requests
+
+        Returns:
+            BatchResult: Responses in request order, failures reported per item
+        """
+        requests = self._batch_requests(requests, kwargs)
+        if offline:
+
+            def build(
+                messages,
+                system_msgs=None,
+                timeout=300,
+                tools=None,
+                tool_choice=ToolChoice.AUTO,
+                temperature=None,
+                cache=None,
+                **extra,
+            ):
+                return self._build_tool_params(
+                    messages,
+                    system_msgs,
+                    timeout,
+                    tools,
+                    tool_choice,
+                    temperature,
+                    **extra,
+                )
+
+            def parse(response: ChatCompletion) -> ChatCompletionMessage | None:
+                if not response.choices or not response.choices[0].message:
+                    return None
+                return response.choices[0].message
+
+            return await self._run_offline(requests, build, parse, poll_interval)
+
+        ask_tool = LLM.ask_tool.retry_with(stop=stop_after_attempt(retries + 1))
+        return await gather_bounded(
+            [functools.partial(ask_tool, self, **request) for request in requests],
+            max_concurrency,
+        )
+
+    @staticmethod
+    def _batch_requests(
+        requests: List[Union[List[Union[dict, Message]], dict]], shared: dict
+    ) -> List[dict]:
+        """Normalize batch requests into argument dicts"""
+        return [
+            {
+                **shared,
+                **(request if isinstance(request, dict) else {"messages": request}),
+            }
+            for request in requests
+        ]
+
+    async def _run_offline(
+        self,
+        requests: List[dict],
+        build: Callable[..., tuple[dict, int]],
+        parse: Callable[[ChatCompletion], Any],
+        poll_interval: float,
+    ) -> BatchResult:
+        """Run requests through the `/v1/batches` API"""
+        if not hasattr(self.client, "batches"):
+            raise ValueError(f"Offline batches are not supported for {self.api_type}")
+
+        items: Dict[int, BatchItemResult] = {}
+        bodies, indexes = [], []
+        for index, request in enumerate(requests):
+            try:
+                params, _ = build(**request)
+            except Exception as e:
+                items[index] = BatchItemResult(index=index, error=describe_error(e))
+                continue
+            # Client-side options, not part of the request body
+            params.pop("timeout", None)
+            params.pop("stream", None)
+            bodies.append(params)
+            indexes.append(index)
+
+        if bodies:
+            outputs = await run_offline_batch(self.client, bodies, poll_interval)
+            for index, (body, error) in zip(indexes, outputs):
+                try:
+                    if error:
+                        raise ValueError(error)
+                    response = ChatCompletion.model_validate(body)
+                    self.update_token_count_from_usage(response.usage)
+                    items[index] = BatchItemResult(index=index, result=parse(response))
+                except Exception as e:
+                    items[index] = BatchItemResult(index=index, error=describe_error(e))
+
+        return BatchResult(items=[items[index] for index in range(len(requests))])
+
+
+class ToolCallAccumulator:
+    """Assembles streamed tool_call deltas into complete tool calls.
+
+    A call is complete once its arguments parse as a JSON object, once a delta
+    for a later call index arrives, or when the stream ends.
+    """
+
+    def __init__(self):
+        self._calls: Dict[int, dict] = {}
+        self._completed: Set[int] = set()
+
+    def add(
+        self, deltas: Optional[List[ChoiceDeltaToolCall]]
+    ) -> List[ChatCompletionMessageToolCall]:
+        """Merge a chunk's tool call deltas and return the calls they completed"""
+        completed = []
+        for delta in deltas or []:
+            index = delta.index
+            # Providers stream calls in order, so a new index closes earlier ones
+            for earlier in sorted(self._calls):
+                if earlier < index and earlier not in self._completed:
+                    completed.append(self._complete(earlier))
+
+            call = self._calls.setdefault(
+                index, {"id": "", "name": "", "arguments": []}
+            )
+            if index in self._completed:
+                logger.warning(
+                    f"Ignoring delta for already dispatched tool call {index}"
+                )
+                continue
+            if delta.id:
+                call["id"] = delta.id
+            if delta.function:
+                if delta.function.name:
+                    call["name"] += delta.function.name
+                if delta.function.arguments:
+                    call["arguments"].append(delta.function.arguments)
+                    if self._arguments_complete(call):
+                        completed.append(self._complete(index))
+        return completed
+
+    def finish(self) -> List[ChatCompletionMessageToolCall]:
+        """Complete every call that is still open at the end of the stream"""
+        return [
+            self._complete(index)
+            for index in sorted(self._calls)
+            if index not in self._completed
+        ]
+
+    @property
+    def tool_calls(self) -> List[ChatCompletionMessageToolCall]:
+        """All tool calls assembled so far, in index order"""
+        return [self._build(self._calls[index]) for index in sorted(self._calls)]
+
+    def _complete(self, index: int) -> ChatCompletionMessageToolCall:
+        self._completed.add(index)
+        return self._build(self._calls[index])
+
+    @staticmethod
+    def _arguments_complete(call: dict) -> bool:
+        if not call["id"] or not call["name"]:
+            return False
+        # Only try to parse once the text could close a JSON object
+        if not call["arguments"][-1].rstrip().endswith("}"):
+            return False
+        try:
+            return isinstance(json.loads("".join(call["arguments"])), dict)
+        except json.JSONDecodeError:
+            return False
+
+    @staticmethod
+    def _build(call: dict) -> ChatCompletionMessageToolCall:
+        return ChatCompletionMessageToolCall(
+            id=call["id"],
+            type="function",
+            function=ToolCallFunction(
+                name=call["name"], arguments="".join(call["arguments"])
+            ),
+        )
@@ -0,0 +1,146 @@
+"""
+LLM Batch Helpers
+
+Result types for `LLM.ask_many` / `LLM.ask_tool_many`, bounded concurrent
+execution, and an offline mode that submits requests to an OpenAI-compatible
+`/v1/batches` endpoint for non-interactive jobs.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from tenacity import RetryError
+
+from app.logger import logger
+
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one request in a batch"""
+
+    index: int = Field(..., description="Position of the request in the batch")
+    result: Any = Field(None, description="Response, None if the request failed")
+    error: Optional[str] = Field(None, description="Error message if it failed")
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchResult(BaseModel):
+    """Ordered outcomes of a batch, with partial failures reported per item"""
+
+    items: List[BatchItemResult] = Field(default_factory=list)
+
+    @property
+    def results(self) -> List[Any]:
+        """Responses in request order, None for failed requests"""
+        return [item.result for item in self.items]
+
+    @property
+    def failed(self) -> List[BatchItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def describe_error(error: BaseException) -> str:
+    """Formats an exception for a batch item, unwrapping tenacity's RetryError."""
+    if isinstance(error, RetryError) and error.last_attempt.failed:
+        error = error.last_attempt.exception()
+    return f"{type(error).__name__}: {error}"
+
+
+async def gather_bounded(
+    calls: List[Callable[[], Awaitable[Any]]], max_concurrency: int
+) -> BatchResult:
+    """Runs calls with at most `max_concurrency` in flight.
+
+    Args:
+        calls: Zero-argument coroutine functions, one per request.
+        max_concurrency: Maximum number of calls running at once.
+
+    Returns:
+        BatchResult: One item per call, in the order of `calls`.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(index: int, call: Callable[[], Awaitable[Any]]) -> BatchItemResult:
+        async with semaphore:
+            try:
+                return BatchItemResult(index=index, result=await call())
+            except Exception as e:
+                logger.warning(f"Batch request {index} failed: {describe_error(e)}")
+                return BatchItemResult(index=index, error=describe_error(e))
+
+    items = await asyncio.gather(*(run(i, call) for i, call in enumerate(calls)))
+    return BatchResult(items=list(items))
+
+
+async def run_offline_batch(
+    client: Any, bodies: List[dict], poll_interval: float = 30.0
+) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """Runs chat completion requests through the `/v1/batches` API.
+
+    Args:
+        client: AsyncOpenAI-compatible client with `files` and `batches`.
+        bodies: Chat completion request bodies.
+        poll_interval: Seconds between batch status checks.
+
+    Returns:
+        One (response body, error) pair per request, in request order.
+    """
+    lines = [
+        json.dumps(
+            {
+                "custom_id": str(index),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            },
+            ensure_ascii=False,
+        )
+        for index, body in enumerate(bodies)
+    ]
+    input_file = await client.files.create(
+        file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    logger.info(f"Submitted batch {batch.id} with {len(bodies)} requests")
+
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+    logger.info(f"Batch {batch.id} finished with status {batch.status}")
+
+    outputs: dict = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = await client.files.content(file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code", 200) >= 400:
+                error = record.get("error") or response.get("body", {}).get("error")
+                outputs[int(record["custom_id"])] = (None, f"Batch error: {error}")
+            else:
+                outputs[int(record["custom_id"])] = (response.get("body"), None)
+
+    return [
+        outputs.get(index, (None, f"No result for request (batch {batch.status})"))
+        for index in range(len(bodies))
+    ]
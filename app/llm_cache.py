@@ -0,0 +1,276 @@
+"""
+LLM Response Cache
+
+Two-tier cache for deterministic LLM responses: an in-memory LRU in front of
+an optional SQLite store with TTL and size-based eviction. The same cache
+class backs tool result memoization.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import PROJECT_ROOT, LLMCacheSettings, config
+from app.logger import logger
+
+
+class ResponseCache:
+    """Two-tier response cache keyed on a hash of the normalized request.
+
+    Attributes:
+        max_memory_entries: Maximum entries kept in the in-memory LRU.
+        ttl: Seconds before an entry expires (0 for never).
+        max_disk_bytes: Maximum total value size of the on-disk tier.
+        max_memory_bytes: Maximum total value size of the in-memory LRU, if any.
+        path: SQLite file backing the on-disk tier, if any.
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: int = 256,
+        path: Optional[Path] = None,
+        ttl: int = 86400,
+        max_disk_bytes: int = 100 * 1024 * 1024,
+        max_memory_bytes: Optional[int] = None,
+    ):
+        """Initializes the response cache.
+
+        Args:
+            max_memory_entries: Maximum entries kept in the in-memory LRU.
+            path: SQLite file for the on-disk tier. None keeps the cache in memory.
+            ttl: Seconds before an entry expires (0 for never).
+            max_disk_bytes: Maximum total value size of the on-disk tier.
+            max_memory_bytes: Maximum total value size of the in-memory LRU.
+                None limits it by entry count only.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.path = path
+
+        # key -> (value, expires_at, size in bytes)
+        self._memory: OrderedDict[str, Tuple[str, float, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Hashes a request payload into a cache key.
+
+        Args:
+            payload: JSON-serializable request description.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        normalized = json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Looks up a cached response.
+
+        Args:
+            key: Cache key from `make_key`.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if not expires_at or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                self._forget(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if not expires_at or expires_at > now:
+                        self._db.execute(
+                            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        self._db.commit()
+                        self._remember(key, value, expires_at)
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Stores a response in both tiers.
+
+        Args:
+            key: Cache key from `make_key`.
+            value: Serialized response.
+            ttl: Seconds before this entry expires (0 for never). Defaults to
+                the cache's ttl.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else 0
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stores += 1
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                        (key, value, len(value.encode("utf-8")), expires_at, now),
+                    )
+                    self._evict_disk(now)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist LLM response to cache: {e}")
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """Inserts into the memory tier, evicting least recently used entries."""
+        self._forget(key)
+        size = len(value.encode("utf-8"))
+        self._memory[key] = (value, expires_at, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.max_memory_entries or (
+            self.max_memory_bytes is not None
+            and self._memory_bytes > self.max_memory_bytes
+            and len(self._memory) > 1
+        ):
+            self._forget(next(iter(self._memory)))
+            self.evictions += 1
+
+    def _forget(self, key: str) -> None:
+        """Removes an entry from the memory tier, keeping its size in step."""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    def _evict_disk(self, now: float) -> None:
+        """Drops expired rows, then least recently used rows over the size budget."""
+        expired = self._db.execute(
+            "DELETE FROM responses WHERE expires_at > 0 AND expires_at <= ?", (now,)
+        ).rowcount
+        self.evictions += max(expired, 0)
+
+        (total_bytes,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total_bytes <= self.max_disk_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        to_delete = []
+        for key, size in rows:
+            if total_bytes <= self.max_disk_bytes:
+                break
+            to_delete.append((key,))
+            total_bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def clear(self) -> None:
+        """Removes all cached responses from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets cache statistics.
+
+        Returns:
+            Dict: Hit, miss, store and eviction counters plus tier sizes.
+        """
+        with self._lock:
+            disk_entries = 0
+            if self._db is not None:
+                (disk_entries,) = self._db.execute(
+                    "SELECT COUNT(*) FROM responses"
+                ).fetchone()
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": disk_entries,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(
+    settings: Optional[LLMCacheSettings] = None,
+) -> Optional[ResponseCache]:
+    """Gets the process-wide response cache, or None if caching is disabled.
+
+    Args:
+        settings: Cache configuration. Defaults to the `[llm_cache]` config section.
+
+    Returns:
+        The shared ResponseCache instance, or None.
+    """
+    global _response_cache
+    settings = settings or config.llm_cache
+    if not settings or not settings.enabled:
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            path = None
+            if settings.path:
+                path = Path(settings.path)
+                if not path.is_absolute():
+                    path = PROJECT_ROOT / path
+            _response_cache = ResponseCache(
+                max_memory_entries=settings.max_memory_entries,
+                path=path,
+                ttl=settings.ttl,
+                max_disk_bytes=settings.max_disk_bytes,
+            )
+        return _response_cache
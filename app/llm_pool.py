@@ -0,0 +1,176 @@
+"""
+LLM Client Pool
+
+Shares one API client, and therefore one HTTP connection pool, between every
+LLM instance that talks to the same endpoint with the same credentials. The
+endpoint's rate limiter is shared the same way.
+"""
+
+import threading
+from typing import Any, Dict, Tuple, Union
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import LLMSettings
+from app.llm_rate_limit import RateLimiter
+from app.logger import logger
+
+
+ClientKey = Tuple[str, str, str, str]
+
+
+class LLMClientPool:
+    """Registry of API clients keyed by (api_type, base_url, api_key, api_version).
+
+    The pool and rate limit settings of the first LLM config that creates a
+    client or limiter for a key are used for it.
+    """
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, Union[AsyncOpenAI, AsyncAzureOpenAI]] = {}
+        self._limiters: Dict[ClientKey, RateLimiter] = {}
+        # Times each client was handed out, i.e. LLM instances created for it
+        self._handouts: Dict[ClientKey, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(settings: LLMSettings) -> ClientKey:
+        """Builds the registry key for an LLM config."""
+        return (
+            settings.api_type,
+            settings.base_url,
+            settings.api_key,
+            settings.api_version,
+        )
+
+    def get_client(self, settings: LLMSettings) -> Union[AsyncOpenAI, AsyncAzureOpenAI]:
+        """Gets the shared client for an LLM config, creating it on first use.
+
+        Args:
+            settings: LLM configuration.
+
+        Returns:
+            An AsyncOpenAI or AsyncAzureOpenAI client with a pooled HTTP client.
+        """
+        key = self.make_key(settings)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create_client(settings)
+                self._clients[key] = client
+                logger.debug(
+                    f"Created pooled LLM client for {settings.api_type or 'openai'} "
+                    f"endpoint {settings.base_url}"
+                )
+            self._handouts[key] = self._handouts.get(key, 0) + 1
+            return client
+
+    def get_rate_limiter(self, settings: LLMSettings) -> RateLimiter:
+        """Gets the shared rate limiter for an LLM config's endpoint.
+
+        Args:
+            settings: LLM configuration.
+
+        Returns:
+            The RateLimiter governing every request to the endpoint.
+        """
+        with self._lock:
+            return self._get_limiter(settings)
+
+    def _get_limiter(self, settings: LLMSettings) -> RateLimiter:
+        """Gets or creates the limiter for a config; the caller holds the lock."""
+        key = self.make_key(settings)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(
+                requests_per_minute=settings.requests_per_minute,
+                tokens_per_minute=settings.tokens_per_minute,
+                max_concurrent_requests=settings.max_concurrent_requests,
+            )
+            self._limiters[key] = limiter
+        return limiter
+
+    def _create_client(
+        self, settings: LLMSettings
+    ) -> Union[AsyncOpenAI, AsyncAzureOpenAI]:
+        """Creates an API client with connection limits from the config."""
+        http2 = settings.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("http2 is enabled but the h2 package is missing")
+                http2 = False
+
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.request_timeout, connect=settings.connect_timeout
+            ),
+            http2=http2,
+            # Let the limiter see x-ratelimit-* and retry-after headers
+            event_hooks={"response": [self._get_limiter(settings).observe_response]},
+        )
+
+        # Retries are left to LLM's retry policy, which waits for the limiter,
+        # instead of the SDK retrying inside a limiter slot
+        if settings.api_type == "azure":
+            return AsyncAzureOpenAI(
+                base_url=settings.base_url,
+                api_key=settings.api_key,
+                api_version=settings.api_version,
+                http_client=http_client,
+                max_retries=0,
+            )
+        return AsyncOpenAI(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            http_client=http_client,
+            max_retries=0,
+        )
+
+    async def close(self) -> None:
+        """Closes every pooled client and its connections."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._handouts.clear()
+
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing LLM client: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets pool statistics.
+
+        Returns:
+            Dict: Client count, how many times each endpoint's client was
+                handed out (LLM instances are cached, so this only grows) and
+                rate limiter statistics per endpoint.
+        """
+        with self._lock:
+            handouts_by_endpoint: Dict[str, int] = {}
+            for (api_type, base_url, _, _), handouts in self._handouts.items():
+                endpoint = f"{api_type or 'openai'}:{base_url}"
+                handouts_by_endpoint[endpoint] = (
+                    handouts_by_endpoint.get(endpoint, 0) + handouts
+                )
+            rate_limits = {
+                f"{api_type or 'openai'}:{base_url}": limiter.get_stats()
+                for (api_type, base_url, _, _), limiter in self._limiters.items()
+            }
+            return {
+                "clients": len(self._clients),
+                "handouts_by_endpoint": handouts_by_endpoint,
+                "rate_limits": rate_limits,
+            }
+
+
+CLIENT_POOL = LLMClientPool()
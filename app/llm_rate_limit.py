@@ -0,0 +1,343 @@
+"""
+LLM Rate Limiter
+
+Client-side governor for LLM endpoints: token buckets for requests and input
+tokens per minute, a cap on requests in flight, and a shared pause when the
+provider reports that a limit was hit. Callers are admitted in FIFO order, so
+a burst of agents drains at the allowed rate instead of retrying at random.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Mapping, Optional
+
+import httpx
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from tenacity import RetryCallState, wait_random_exponential
+
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
+from app.logger import logger
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+MAX_RATE_LIMIT_BACKOFF = 60.0
+
+
+class TokenBucket:
+    """Bucket refilled continuously at `per_minute / 60` units per second."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (clamped to capacity)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float, now: float) -> None:
+        """Lowers the level to what the provider reports as remaining."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Per-endpoint governor for requests, input tokens and concurrency.
+
+    Attributes:
+        requests_per_minute: Configured request budget, or None.
+        tokens_per_minute: Configured input token budget, or None.
+        max_concurrent_requests: Maximum requests in flight, or None.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrent_requests: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the rate limiter.
+
+        Args:
+            requests_per_minute: Request budget. Learned from provider headers if None.
+            tokens_per_minute: Input token budget. Learned from provider headers if None.
+            max_concurrent_requests: Maximum requests in flight (None for unlimited).
+            clock: Monotonic time source, in seconds.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrent_requests = max_concurrent_requests
+        self._clock = clock
+
+        now = clock()
+        self._requests = (
+            TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        )
+        self._blocked_until = 0.0
+        self._consecutive_limited = 0
+
+        # asyncio primitives are bound to one event loop, so they are
+        # recreated when the limiter is used from a new loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._admission: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.queued = 0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._admission = asyncio.Lock()
+            self._slots = (
+                asyncio.Semaphore(self.max_concurrent_requests)
+                if self.max_concurrent_requests
+                else None
+            )
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Waits for a concurrency slot and enough request and token budget.
+
+        Args:
+            tokens: Estimated input tokens of the request.
+        """
+        self._bind_loop()
+        started = self._clock()
+        self.queued += 1
+        try:
+            if self._slots is not None:
+                await self._slots.acquire()
+            try:
+                # One caller waits on the budget at a time; asyncio.Lock wakes
+                # waiters in arrival order
+                async with self._admission:
+                    await self._wait_for_budget(tokens)
+            except BaseException:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        waited = self._clock() - started
+        if waited > 0.01:
+            self.throttled += 1
+            self.wait_seconds += waited
+        self.requests += 1
+        self.in_flight += 1
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        while True:
+            now = self._clock()
+            delay = self._blocked_until - now
+            if self._requests is not None:
+                delay = max(delay, self._requests.delay(1, now))
+            if self._tokens is not None and tokens:
+                delay = max(delay, self._tokens.delay(tokens, now))
+            if delay <= 0:
+                if self._requests is not None:
+                    self._requests.consume(1, now)
+                if self._tokens is not None and tokens:
+                    self._tokens.consume(tokens, now)
+                return
+            await asyncio.sleep(delay)
+
+    def release(self) -> None:
+        """Frees the concurrency slot taken by `acquire`."""
+        self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def limit(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Holds a slot for the duration of a request, including streaming.
+
+        Args:
+            tokens: Estimated input tokens of the request.
+        """
+        await self.acquire(tokens)
+        try:
+            yield
+        except RateLimitError as e:
+            self.on_rate_limited(e.response.headers)
+            raise
+        else:
+            self._consecutive_limited = 0
+        finally:
+            self.release()
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Pauses every caller after a 429, for as long as the provider asks.
+
+        Without a retry-after header the pause doubles with each consecutive
+        429, starting at one second.
+
+        Args:
+            headers: Response headers of the rate limited request.
+        """
+        self.rate_limited += 1
+        self._consecutive_limited += 1
+        pause = parse_retry_after(headers) if headers else None
+        if pause is None:
+            pause = min(2.0 ** (self._consecutive_limited - 1), MAX_RATE_LIMIT_BACKOFF)
+        self._block_for(pause)
+        logger.warning(f"LLM rate limit hit, pausing requests for {pause:.1f}s")
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapts the budgets to the provider's x-ratelimit-* headers.
+
+        Args:
+            headers: Response headers of any request to the endpoint.
+        """
+        now = self._clock()
+        for kind in ("requests", "tokens"):
+            remaining = _parse_number(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is None:
+                continue
+
+            bucket = self._requests if kind == "requests" else self._tokens
+            if bucket is None:
+                # Learn the budget when none was configured
+                limit = _parse_number(headers.get(f"x-ratelimit-limit-{kind}"))
+                if limit:
+                    bucket = TokenBucket(limit, now)
+                    if kind == "requests":
+                        self._requests = bucket
+                    else:
+                        self._tokens = bucket
+            if bucket is not None:
+                bucket.sync(remaining, now)
+
+            if remaining <= 0:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self._block_for(reset)
+
+        retry_after = parse_retry_after(headers)
+        if retry_after:
+            self._block_for(retry_after)
+
+    async def observe_response(self, response: httpx.Response) -> None:
+        """httpx response hook feeding provider headers into the limiter."""
+        self.update_from_headers(response.headers)
+
+    def _block_for(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets limiter statistics.
+
+        Returns:
+            Dict: Request, throttling and 429 counters plus current queue depth.
+        """
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "requests_per_minute": self._requests.capacity if self._requests else None,
+            "tokens_per_minute": self._tokens.capacity if self._tokens else None,
+        }
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parses an OpenAI reset duration such as "20ms", "1s" or "6m0s" into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    number = _parse_number(value)
+    if number is not None:
+        return number
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    total, digits, i = 0.0, "", 0
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            digits += char
+            i += 1
+            continue
+        unit = "ms" if value.startswith("ms", i) else char
+        if unit not in units or not digits:
+            return None
+        total += float(digits) * units[unit]
+        digits = ""
+        i += len(unit)
+    return total if not digits else None
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Reads retry-after-ms or retry-after (seconds or HTTP date) in seconds."""
+    retry_after_ms = _parse_number(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000.0
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    seconds = _parse_number(retry_after)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Whether an LLM call failure is transient and worth retrying.
+
+    Token limit, authentication and bad request errors fail the same way on
+    every attempt, so only connection failures, 408/409/429/5xx responses and
+    empty responses are retried.
+    """
+    if isinstance(error, TokenLimitExceeded):
+        return False
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, EmptyResponseError)
+
+
+_backoff = wait_random_exponential(min=1, max=60)
+
+
+def retry_wait(retry_state: RetryCallState) -> float:
+    """Retries 429s immediately, since the limiter already holds every caller
+    until the provider's retry-after; other errors back off with jitter."""
+    error = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(error, RateLimitError):
+        return 0.0
+    return _backoff(retry_state)
@@ -0,0 +1,221 @@
+"""
+LLM Router
+
+Routes auxiliary LLM calls, such as input purification, page extraction and
+summaries, to cheaper model tiers. Each call site declares a task class; the
+`[llm_routing]` config maps task classes to `[llm.<name>]` configs. Calls
+fall back to the caller's main model when the tier fails or its result is
+rejected, and latency, tokens and cost are recorded per tier.
+"""
+
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from openai.types.chat import ChatCompletionMessage
+
+from app.config import LLMRoutingSettings, config
+from app.llm import LLM
+from app.logger import logger
+from app.schema import Message
+
+
+MAIN_TIER = "main"
+
+
+class TaskClass(str, Enum):
+    """Kinds of LLM calls, from cheapest to most demanding"""
+
+    CLASSIFY = "classify"
+    EXTRACT = "extract"
+    SUMMARIZE = "summarize"
+    PLAN = "plan"
+    ACT = "act"
+
+
+class LLMRouter:
+    """Picks the LLM for a task class and tracks per-tier usage."""
+
+    def __init__(self, settings: Optional[LLMRoutingSettings] = None):
+        """Initializes the router.
+
+        Args:
+            settings: Routing configuration. Defaults to the `[llm_routing]` section.
+        """
+        self._settings = settings
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self) -> LLMRoutingSettings:
+        return self._settings or config.llm_routing or LLMRoutingSettings()
+
+    def get_tier(self, task: TaskClass) -> Optional[str]:
+        """Gets the config name a task class is routed to, or None for the main model."""
+        settings = self.settings
+        if not settings.enabled:
+            return None
+        tier = settings.tiers.get(TaskClass(task).value)
+        if tier and tier not in config.llm:
+            logger.warning(f"LLM tier '{tier}' for {task} is not configured")
+            return None
+        return tier
+
+    def get_llm(self, task: TaskClass, fallback: LLM) -> LLM:
+        """Gets the LLM to use for a task class.
+
+        Args:
+            task: Task class of the call.
+            fallback: The caller's main model, used when no tier is configured.
+
+        Returns:
+            The tier's LLM, or `fallback`.
+        """
+        tier = self.get_tier(task)
+        return LLM(config_name=tier) if tier else fallback
+
+    async def ask(
+        self,
+        task: TaskClass,
+        messages: List[Union[dict, Message]],
+        fallback: LLM,
+        accept: Optional[Callable[[str], bool]] = None,
+        **kwargs,
+    ) -> str:
+        """Routes an `LLM.ask` call.
+
+        Args:
+            task: Task class of the call.
+            messages: Conversation messages.
+            fallback: The caller's main model.
+            accept: Optional check of the tier's answer; a rejected (low
+                confidence) answer is retried on the main model.
+            **kwargs: Further `LLM.ask` arguments.
+
+        Returns:
+            str: The generated response.
+        """
+        return await self._route(task, "ask", fallback, accept, messages, **kwargs)
+
+    async def ask_tool(
+        self,
+        task: TaskClass,
+        messages: List[Union[dict, Message]],
+        fallback: LLM,
+        accept: Optional[Callable[[Optional[ChatCompletionMessage]], bool]] = None,
+        **kwargs,
+    ) -> Optional[ChatCompletionMessage]:
+        """Routes an `LLM.ask_tool` call.
+
+        Args:
+            task: Task class of the call.
+            messages: Conversation messages.
+            fallback: The caller's main model.
+            accept: Optional check of the tier's response; a rejected (low
+                confidence) response is retried on the main model.
+            **kwargs: Further `LLM.ask_tool` arguments.
+
+        Returns:
+            ChatCompletionMessage: The model's response.
+        """
+        return await self._route(task, "ask_tool", fallback, accept, messages, **kwargs)
+
+    async def _route(
+        self,
+        task: TaskClass,
+        method: str,
+        fallback: LLM,
+        accept: Optional[Callable[[Any], bool]],
+        *args,
+        **kwargs,
+    ) -> Any:
+        tier = self.get_tier(task)
+        llm = LLM(config_name=tier) if tier else fallback
+        if llm is fallback:
+            return await self._call(MAIN_TIER, fallback, method, *args, **kwargs)
+
+        try:
+            result = await self._call(tier, llm, method, *args, **kwargs)
+            if accept is None or accept(result):
+                return result
+            self._record(tier, rejected=1)
+            logger.info(f"{task.value} result from tier '{tier}' rejected")
+        except Exception as e:
+            if not self.settings.fallback:
+                raise
+            logger.warning(f"{task.value} call on tier '{tier}' failed: {e}")
+
+        if not self.settings.fallback:
+            return result
+        self._record(tier, fallbacks=1)
+        return await self._call(MAIN_TIER, fallback, method, *args, **kwargs)
+
+    async def _call(self, tier: str, llm: LLM, method: str, *args, **kwargs) -> Any:
+        """Calls an LLM method, recording latency, tokens and cost for the tier."""
+        input_tokens = llm.total_input_tokens
+        completion_tokens = llm.total_completion_tokens
+        started = time.perf_counter()
+        failed = 0
+        try:
+            return await getattr(llm, method)(*args, **kwargs)
+        except Exception:
+            failed = 1
+            raise
+        finally:
+            # Deltas of the LLM's running totals; approximate when other
+            # callers share the same LLM concurrently
+            input_tokens = llm.total_input_tokens - input_tokens
+            completion_tokens = llm.total_completion_tokens - completion_tokens
+            cost = (
+                input_tokens * (llm.input_cost_per_million_tokens or 0)
+                + completion_tokens * (llm.output_cost_per_million_tokens or 0)
+            ) / 1_000_000
+            self._record(
+                tier,
+                calls=1,
+                failures=failed,
+                latency=time.perf_counter() - started,
+                input_tokens=input_tokens,
+                completion_tokens=completion_tokens,
+                cost=cost,
+            )
+
+    def _record(self, tier: str, **values: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                tier,
+                {
+                    "calls": 0,
+                    "failures": 0,
+                    "rejected": 0,
+                    "fallbacks": 0,
+                    "latency": 0.0,
+                    "input_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                },
+            )
+            for key, value in values.items():
+                stats[key] += value
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Gets per-tier statistics.
+
+        Returns:
+            Dict: For each tier, call, failure, rejection and fallback counts,
+                total and average latency, token totals and cost.
+        """
+        with self._lock:
+            return {
+                tier: {
+                    **stats,
+                    "avg_latency": (
+                        stats["latency"] / stats["calls"] if stats["calls"] else 0.0
+                    ),
+                }
+                for tier, stats in self._stats.items()
+            }
+
+
+LLM_ROUTER = LLMRouter()
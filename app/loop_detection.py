@@ -0,0 +1,190 @@
+"""
+Loop Detection
+
+Detects agents that repeat themselves instead of making progress, such as
+re-clicking the same browser element. Each step's assistant message is
+reduced to a fingerprint of its text and tool calls, with arguments
+normalized, and kept in a rolling window with per-fingerprint counts, so a
+step is checked in constant time. Two patterns count as a loop: the same step
+repeated within the window, and a short cycle of steps repeated back to back,
+such as A-B-A-B.
+"""
+
+import json
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import LoopDetectionSettings, config
+from app.logger import logger
+from app.schema import Message, Role
+
+
+LOOP_PROMPT = """You are repeating yourself: {loop}. Your last action was:
+{action}
+Repeating it will not give a different result. Consider new strategies and avoid repeating ineffective paths already attempted: use a different tool or different arguments, or finish if the task cannot be completed."""
+
+
+class LoopDetector:
+    """Rolling index of step fingerprints that detects repeats and cycles."""
+
+    def __init__(
+        self,
+        settings: Optional[LoopDetectionSettings] = None,
+        repeat_threshold: int = 2,
+    ):
+        """Initializes the detector.
+
+        Args:
+            settings: Loop detection configuration. Defaults to the
+                `[loop_detection]` section.
+            repeat_threshold: Number of earlier occurrences of a step within
+                the window that make it a loop.
+        """
+        self.settings = settings or config.loop_detection
+        self.repeat_threshold = repeat_threshold
+
+        self._window: Deque[int] = deque()
+        self._counts: Counter = Counter()
+        self._last_observed: Optional[Message] = None
+
+        # Detection state read by the agent's stuck policy
+        self.consecutive = 0
+        self.last_loop: Optional[str] = None
+        self.last_message: Optional[Message] = None
+
+        self.steps = 0
+        self.loops_detected = 0
+
+    def reset(self) -> None:
+        """Forgets all recorded steps, e.g. at the start of a new run."""
+        self._window.clear()
+        self._counts.clear()
+        self._last_observed = None
+        self.consecutive = 0
+        self.last_loop = None
+        self.last_message = None
+
+    @staticmethod
+    def normalize_arguments(arguments: Optional[str]) -> str:
+        """Normalizes tool call arguments so key order and spacing do not matter."""
+        try:
+            return json.dumps(
+                json.loads(arguments), sort_keys=True, separators=(",", ":")
+            )
+        except (TypeError, ValueError):
+            return (arguments or "").strip()
+
+    @classmethod
+    def fingerprint(cls, message: Message) -> Optional[int]:
+        """Hashes a message's text and tool calls, None for an empty message."""
+        content = " ".join((message.content or "").split())
+        calls = tuple(
+            (call.function.name, cls.normalize_arguments(call.function.arguments))
+            for call in message.tool_calls or []
+        )
+        if not content and not calls:
+            return None
+        return hash((content, calls))
+
+    def observe(self, messages: List[Message]) -> bool:
+        """Records the newest assistant message if it is new.
+
+        Args:
+            messages: The agent's memory messages.
+
+        Returns:
+            bool: Whether the agent is in a loop.
+        """
+        message = None
+        for candidate in reversed(messages):
+            if candidate is self._last_observed:
+                break
+            if candidate.role == Role.ASSISTANT:
+                message = candidate
+                break
+        if message is None:
+            return False
+        self._last_observed = message
+        return self.record(message)
+
+    def record(self, message: Message) -> bool:
+        """Records one step's assistant message.
+
+        Args:
+            message: The assistant message of the step.
+
+        Returns:
+            bool: Whether the agent is in a loop.
+        """
+        fingerprint = self.fingerprint(message)
+        loop = None
+        if fingerprint is not None:
+            self.steps += 1
+            self._push(fingerprint)
+            loop = self._detect(fingerprint)
+
+        if loop is None:
+            self.consecutive = 0
+            self.last_loop = None
+            return False
+
+        self.consecutive += 1
+        self.loops_detected += 1
+        self.last_loop = loop
+        self.last_message = message
+        logger.warning(f"Loop detected: {loop}")
+        return True
+
+    def _push(self, fingerprint: int) -> None:
+        self._window.append(fingerprint)
+        self._counts[fingerprint] += 1
+        if len(self._window) > max(1, self.settings.window):
+            oldest = self._window.popleft()
+            self._counts[oldest] -= 1
+            if not self._counts[oldest]:
+                del self._counts[oldest]
+
+    def _detect(self, fingerprint: int) -> Optional[str]:
+        """Describes the loop ending at the newest step, None if there is none."""
+        count = self._counts[fingerprint]
+        if count > self.repeat_threshold:
+            return f"the same step was taken {count} times"
+
+        window = self._window
+        repeats = self.settings.cycle_repeats
+        for length in range(2, self.settings.max_cycle_length + 1):
+            span = length * repeats
+            if span > len(window):
+                break
+            if len({window[-i] for i in range(1, length + 1)}) < 2:
+                continue
+            if all(
+                window[-i] == window[-i - length] for i in range(1, span - length + 1)
+            ):
+                return f"a cycle of {length} steps was repeated {repeats} times"
+        return None
+
+    def prompt(self) -> str:
+        """Builds the corrective prompt for the last detected loop."""
+        message = self.last_message
+        if message and message.tool_calls:
+            action = "\n".join(
+                f"{call.function.name}({call.function.arguments})"
+                for call in message.tool_calls
+            )
+        else:
+            action = (message.content if message else None) or "(no action)"
+        return LOOP_PROMPT.format(loop=self.last_loop, action=action)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets loop detection statistics.
+
+        Returns:
+            Dict: Recorded steps, detected loops and the current loop streak.
+        """
+        return {
+            "steps": self.steps,
+            "loops_detected": self.loops_detected,
+            "consecutive": self.consecutive,
+            "window": len(self._window),
+        }
@@ -14,9 +14,12 @@ from typing import Any, Dict, Optional
 from mcp.server.fastmcp import FastMCP
 
 from app.logger import logger
+from app.sandbox.core.pool import close_sandbox_pool
+from app.session import current_session
 from app.tool.base import BaseTool
 from app.tool.bash import Bash
-from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.browser_use_schema import BROWSER_TOOL_NAME
+from app.tool.registry import lazy_tool
 from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.terminate import Terminate
 
@@ -30,7 +33,8 @@ class MCPServer:
 
         # Initialize standard tools
         self.tools["bash"] = Bash()
-        self.tools["browser"] = BrowserUseTool()
+        # Imports browser_use on the first browser call, not at startup
+        self.tools["browser"] = lazy_tool(BROWSER_TOOL_NAME)
         self.tools["editor"] = StrReplaceEditor()
         self.tools["terminate"] = Terminate()
 
@@ -141,6 +145,9 @@ class MCPServer:
         # Follow original cleanup logic - only clean browser tool
         if "browser" in self.tools and hasattr(self.tools["browser"], "cleanup"):
             await self.tools["browser"].cleanup()
+        # Release the sandbox started by the file tools, if any
+        await current_session().close()
+        await close_sandbox_pool()
 
     def register_all_tools(self) -> None:
         """Register all tools with the server."""
@@ -15,12 +15,15 @@ from app.sandbox.core.exceptions import (
     SandboxTimeoutError,
 )
 from app.sandbox.core.manager import SandboxManager
+from app.sandbox.core.pool import SandboxBackend, SandboxPool
 from app.sandbox.core.sandbox import DockerSandbox
 
 
 __all__ = [
     "DockerSandbox",
     "SandboxManager",
+    "SandboxPool",
+    "SandboxBackend",
     "BaseSandboxClient",
     "LocalSandboxClient",
     "create_sandbox_client",
@@ -2,7 +2,9 @@ from abc import ABC, abstractmethod
 from typing import Dict, Optional, Protocol
 
 from app.config import SandboxSettings
+from app.sandbox.core.pool import SandboxPool, get_sandbox_pool
 from app.sandbox.core.sandbox import DockerSandbox
+from app.session import current_session
 
 
 class SandboxFileOperations(Protocol):
@@ -89,6 +91,10 @@ class LocalSandboxClient(BaseSandboxClient):
     def __init__(self):
         """Initializes local sandbox client."""
         self.sandbox: Optional[DockerSandbox] = None
+        # Pool the sandbox was taken from, if any
+        self._pool: Optional[SandboxPool] = None
+        # Whether a command failed or timed out, leaving the sandbox unfit for reuse
+        self._dirty = False
 
     async def create(
         self,
@@ -104,6 +110,11 @@ class LocalSandboxClient(BaseSandboxClient):
         Raises:
             RuntimeError: If sandbox creation fails.
         """
+        pool = get_sandbox_pool()
+        if pool and not volume_bindings:
+            self.sandbox = await pool.acquire(config)
+            self._pool = pool
+            return
         self.sandbox = DockerSandbox(config, volume_bindings)
         await self.sandbox.create()
 
@@ -122,7 +133,11 @@ class LocalSandboxClient(BaseSandboxClient):
         """
         if not self.sandbox:
             raise RuntimeError("Sandbox not initialized")
-        return await self.sandbox.run_command(command, timeout)
+        try:
+            return await self.sandbox.run_command(command, timeout)
+        except Exception:
+            self._dirty = True
+            raise
 
     async def copy_from(self, container_path: str, local_path: str) -> None:
         """Copies file from container to local.
@@ -185,8 +200,13 @@ class LocalSandboxClient(BaseSandboxClient):
     async def cleanup(self) -> None:
         """Cleans up resources."""
         if self.sandbox:
-            await self.sandbox.cleanup()
+            if self._pool:
+                self._pool.release(self.sandbox, dirty=self._dirty)
+                self._pool = None
+            else:
+                await self.sandbox.cleanup()
             self.sandbox = None
+            self._dirty = False
 
 
 def create_sandbox_client() -> LocalSandboxClient:
@@ -198,4 +218,15 @@ def create_sandbox_client() -> LocalSandboxClient:
     return LocalSandboxClient()
 
 
-SANDBOX_CLIENT = create_sandbox_client()
+class SessionSandboxClient:
+    """The sandbox client of the current session.
+
+    Attribute access is forwarded, so it can be used like a LocalSandboxClient
+    while each session creates and cleans up its own sandbox.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(current_session().sandbox_client, name)
+
+
+SANDBOX_CLIENT = SessionSandboxClient()
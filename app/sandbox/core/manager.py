@@ -4,11 +4,11 @@ from contextlib import asynccontextmanager
 from typing import Dict, Optional, Set
 
 import docker
-from docker.errors import APIError, ImageNotFound
 
 from app.config import SandboxSettings
 from app.logger import logger
-from app.sandbox.core.sandbox import DockerSandbox
+from app.sandbox.core.pool import SandboxPool
+from app.sandbox.core.sandbox import DockerSandbox, ensure_image
 
 
 class SandboxManager:
@@ -22,6 +22,7 @@ class SandboxManager:
         max_sandboxes: Maximum allowed number of sandboxes.
         idle_timeout: Sandbox idle timeout in seconds.
         cleanup_interval: Cleanup check interval in seconds.
+        pool: Pool that sandboxes without volume bindings are taken from.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
     """
@@ -31,6 +32,7 @@ class SandboxManager:
         max_sandboxes: int = 100,
         idle_timeout: int = 3600,
         cleanup_interval: int = 300,
+        pool: Optional[SandboxPool] = None,
     ):
         """Initializes sandbox manager.
 
@@ -38,10 +40,12 @@ class SandboxManager:
             max_sandboxes: Maximum sandbox count limit.
             idle_timeout: Idle timeout in seconds.
             cleanup_interval: Cleanup check interval in seconds.
+            pool: Pool of pre-started sandboxes, owned by the caller.
         """
         self.max_sandboxes = max_sandboxes
         self.idle_timeout = idle_timeout
         self.cleanup_interval = cleanup_interval
+        self.pool = pool
 
         # Docker client
         self._client = docker.from_env()
@@ -54,6 +58,11 @@ class SandboxManager:
         self._locks: Dict[str, asyncio.Lock] = {}
         self._global_lock = asyncio.Lock()
         self._active_operations: Set[str] = set()
+        # Sandboxes being created, counted against max_sandboxes
+        self._creating = 0
+        self._pooled: Set[str] = set()
+        # Sandboxes an operation failed on, not to be reused by the pool
+        self._dirty: Set[str] = set()
 
         # Cleanup task
         self._cleanup_task: Optional[asyncio.Task] = None
@@ -71,19 +80,7 @@ class SandboxManager:
         Returns:
             bool: Whether image is available.
         """
-        try:
-            self._client.images.get(image)
-            return True
-        except ImageNotFound:
-            try:
-                logger.info(f"Pulling image {image}...")
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self._client.images.pull, image
-                )
-                return True
-            except (APIError, Exception) as e:
-                logger.error(f"Failed to pull image {image}: {e}")
-                return False
+        return await ensure_image(self._client, image)
 
     @asynccontextmanager
     async def sandbox_operation(self, sandbox_id: str):
@@ -108,6 +105,9 @@ class SandboxManager:
             try:
                 self._last_used[sandbox_id] = asyncio.get_event_loop().time()
                 yield self._sandboxes[sandbox_id]
+            except Exception:
+                self._dirty.add(sandbox_id)
+                raise
             finally:
                 self._active_operations.remove(sandbox_id)
 
@@ -128,20 +128,28 @@ class SandboxManager:
         Raises:
             RuntimeError: If max sandbox count reached or creation fails.
         """
+        # Only the slot is reserved under the lock, so creations run in parallel
         async with self._global_lock:
-            if len(self._sandboxes) >= self.max_sandboxes:
+            if len(self._sandboxes) + self._creating >= self.max_sandboxes:
                 raise RuntimeError(
                     f"Maximum number of sandboxes ({self.max_sandboxes}) reached"
                 )
+            self._creating += 1
 
+        try:
             config = config or SandboxSettings()
-            if not await self.ensure_image(config.image):
+            pooled = self.pool is not None and not volume_bindings
+            if not pooled and not await self.ensure_image(config.image):
                 raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
 
             sandbox_id = str(uuid.uuid4())
             try:
-                sandbox = DockerSandbox(config, volume_bindings)
-                await sandbox.create()
+                if pooled:
+                    sandbox = await self.pool.acquire(config)
+                    self._pooled.add(sandbox_id)
+                else:
+                    sandbox = DockerSandbox(config, volume_bindings)
+                    await sandbox.create()
 
                 self._sandboxes[sandbox_id] = sandbox
                 self._last_used[sandbox_id] = asyncio.get_event_loop().time()
@@ -155,6 +163,8 @@ class SandboxManager:
                 if sandbox_id in self._sandboxes:
                     await self.delete_sandbox(sandbox_id)
                 raise RuntimeError(f"Failed to create sandbox: {e}")
+        finally:
+            self._creating -= 1
 
     async def get_sandbox(self, sandbox_id: str) -> DockerSandbox:
         """Gets a sandbox instance.
@@ -238,6 +248,8 @@ class SandboxManager:
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
+        self._pooled.clear()
+        self._dirty.clear()
 
         logger.info("Manager cleanup completed")
 
@@ -264,7 +276,13 @@ class SandboxManager:
             # Get reference to sandbox object
             sandbox = self._sandboxes.get(sandbox_id)
             if sandbox:
-                await sandbox.cleanup()
+                if sandbox_id in self._pooled:
+                    # The pool resets the sandbox for reuse, unless it is dirty
+                    self.pool.release(sandbox, dirty=sandbox_id in self._dirty)
+                    self._pooled.discard(sandbox_id)
+                    self._dirty.discard(sandbox_id)
+                else:
+                    await sandbox.cleanup()
 
                 # Remove sandbox record from manager
                 async with self._global_lock:
@@ -307,6 +325,7 @@ class SandboxManager:
             "total_sandboxes": len(self._sandboxes),
             "active_operations": len(self._active_operations),
             "max_sandboxes": self.max_sandboxes,
+            "pool": self.pool.get_stats() if self.pool else None,
             "idle_timeout": self.idle_timeout,
             "cleanup_interval": self.cleanup_interval,
             "is_shutting_down": self._is_shutting_down,
@@ -0,0 +1,292 @@
+"""Pool of pre-started sandboxes.
+
+Creating a sandbox starts a container and a shell session in it, which puts
+seconds on the critical path of the first sandboxed tool call. A
+`SandboxPool` keeps a few sandboxes of each configuration started ahead of
+time. Checkout takes one without waiting on a lock, and the pool refills in
+the background. Returned sandboxes are reset and reused, or discarded when
+the caller marks them dirty or they exceed the configured age.
+
+How sandboxes are created, reset and destroyed is up to a `SandboxBackend`,
+so the pool can be used without a Docker daemon.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Optional, Set, Tuple
+
+import docker
+
+from app.config import SandboxPoolSettings, SandboxSettings, config
+from app.logger import logger
+from app.sandbox.core.sandbox import DockerSandbox, ensure_image
+
+
+class SandboxBackend(ABC):
+    """Creates, resets and destroys the sandboxes of a pool."""
+
+    @abstractmethod
+    async def create(self, config: SandboxSettings) -> Any:
+        """Creates and starts a sandbox.
+
+        Args:
+            config: Sandbox configuration.
+
+        Returns:
+            The started sandbox.
+        """
+
+    @abstractmethod
+    async def reset(self, sandbox: Any) -> None:
+        """Restores a used sandbox to its freshly created state.
+
+        Raises:
+            Exception: If the sandbox cannot be reused.
+        """
+
+    async def destroy(self, sandbox: Any) -> None:
+        """Stops a sandbox and releases its resources."""
+        await sandbox.cleanup()
+
+
+class DockerSandboxBackend(SandboxBackend):
+    """Backend of DockerSandbox containers."""
+
+    def __init__(self):
+        self._client: Optional[docker.DockerClient] = None
+        self._images: Set[str] = set()
+
+    async def create(self, config: SandboxSettings) -> DockerSandbox:
+        if config.image not in self._images:
+            self._client = self._client or docker.from_env()
+            if not await ensure_image(self._client, config.image):
+                raise RuntimeError(f"Failed to ensure Docker image: {config.image}")
+            self._images.add(config.image)
+        return await DockerSandbox(config).create()
+
+    async def reset(self, sandbox: DockerSandbox) -> None:
+        await sandbox.reset()
+
+
+class SandboxPool:
+    """Pre-started sandboxes, kept per sandbox configuration.
+
+    Sandboxes are checked out with `acquire` and given back with `release`.
+    Background work started by the pool is awaited by `close`.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[SandboxBackend] = None,
+        settings: Optional[SandboxPoolSettings] = None,
+    ):
+        """Initializes an empty pool; it fills up as configurations are used.
+
+        Args:
+            backend: Creates the sandboxes. Defaults to Docker containers.
+            settings: Pool configuration. Defaults to the `[sandbox_pool]` config section.
+        """
+        self.backend = backend or DockerSandboxBackend()
+        self.settings = settings or config.sandbox_pool
+
+        # Idle sandboxes with their creation time, by configuration
+        self._idle: Dict[str, Deque[Tuple[Any, float]]] = {}
+        # Configuration key and creation time of checked-out sandboxes
+        self._checked_out: Dict[int, Tuple[str, float]] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self._stats = {"hits": 0, "misses": 0, "created": 0, "reset": 0, "discarded": 0}
+
+    @staticmethod
+    def _key(config: SandboxSettings) -> str:
+        return config.model_dump_json()
+
+    def _expired(self, created_at: float) -> bool:
+        max_age = self.settings.max_age
+        return bool(max_age) and time.monotonic() - created_at > max_age
+
+    def warm(self, config: Optional[SandboxSettings] = None) -> None:
+        """Starts filling the pool for a configuration in the background."""
+        config = config or SandboxSettings()
+        self._refill(self._key(config), config)
+
+    async def acquire(self, config: Optional[SandboxSettings] = None) -> Any:
+        """Checks out a started sandbox, creating one if none is idle.
+
+        Args:
+            config: Sandbox configuration.
+
+        Returns:
+            A started sandbox, to be given back with `release`.
+        """
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed")
+        config = config or SandboxSettings()
+        key = self._key(config)
+        idle = self._idle.setdefault(key, deque())
+
+        sandbox = None
+        while idle and sandbox is None:
+            candidate, created_at = idle.popleft()
+            if self._expired(created_at):
+                self._discard(candidate)
+            else:
+                sandbox = candidate
+
+        if sandbox is None:
+            self._stats["misses"] += 1
+            created_at = time.monotonic()
+            sandbox = await self.backend.create(config)
+            self._stats["created"] += 1
+        else:
+            self._stats["hits"] += 1
+
+        self._checked_out[id(sandbox)] = (key, created_at)
+        self._refill(key, config)
+        return sandbox
+
+    def release(self, sandbox: Any, dirty: bool = False) -> None:
+        """Gives back a checked-out sandbox.
+
+        The sandbox is reset and returned to the pool in the background, or
+        destroyed if it is dirty, too old or not needed.
+
+        Args:
+            sandbox: Sandbox from `acquire`.
+            dirty: The sandbox must not be reused, e.g. after a failed command.
+        """
+        key, created_at = self._checked_out.pop(id(sandbox), (None, 0.0))
+        if (
+            key is None
+            or dirty
+            or self._closed
+            or not self.settings.reset_on_return
+            or self._expired(created_at)
+        ):
+            self._discard(sandbox)
+            return
+        self._spawn(self._recycle(key, sandbox, created_at))
+
+    async def _recycle(self, key: str, sandbox: Any, created_at: float) -> None:
+        try:
+            await self.backend.reset(sandbox)
+        except Exception as e:
+            logger.warning(f"Discarding sandbox that failed to reset: {e}")
+            self._discard(sandbox)
+            return
+        self._stats["reset"] += 1
+        self._put(key, sandbox, created_at)
+
+    def _refill(self, key: str, config: SandboxSettings) -> None:
+        task = self._refills.get(key)
+        if self._closed or (task and not task.done()):
+            return
+        self._refills[key] = self._spawn(self._fill(key, config))
+
+    async def _fill(self, key: str, config: SandboxSettings) -> None:
+        missing = self.settings.size - len(self._idle.setdefault(key, deque()))
+        if missing <= 0:
+            return
+
+        async def create() -> None:
+            created_at = time.monotonic()
+            sandbox = await self.backend.create(config)
+            self._stats["created"] += 1
+            self._put(key, sandbox, created_at)
+
+        results = await asyncio.gather(
+            *(create() for _ in range(missing)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to pre-start sandbox: {result}")
+
+    def _put(self, key: str, sandbox: Any, created_at: float) -> None:
+        idle = self._idle.setdefault(key, deque())
+        if self._closed or len(idle) >= self.settings.size:
+            self._discard(sandbox)
+        else:
+            idle.append((sandbox, created_at))
+
+    def _discard(self, sandbox: Any) -> None:
+        self._stats["discarded"] += 1
+        self._spawn(self._destroy(sandbox))
+
+    async def _destroy(self, sandbox: Any) -> None:
+        try:
+            await self.backend.destroy(sandbox)
+        except Exception as e:
+            logger.error(f"Error destroying sandbox: {e}")
+
+    def _spawn(self, coro: Awaitable) -> asyncio.Task:
+        # Keep a reference, so the task is neither collected nor forgotten
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def close(self) -> None:
+        """Destroys idle sandboxes once pending refills and resets are done.
+
+        Sandboxes still checked out are destroyed when they are released.
+        """
+        self._closed = True
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        idle = [sandbox for queue in self._idle.values() for sandbox, _ in queue]
+        self._idle.clear()
+        await asyncio.gather(*(self._destroy(sandbox) for sandbox in idle))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets checkout hits and misses, sandbox counts and idle sandboxes."""
+        return {
+            **self._stats,
+            "idle": sum(len(queue) for queue in self._idle.values()),
+            "checked_out": len(self._checked_out),
+        }
+
+
+_sandbox_pool: Optional[SandboxPool] = None
+_sandbox_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool(
+    settings: Optional[SandboxPoolSettings] = None,
+) -> Optional[SandboxPool]:
+    """Gets the process-wide sandbox pool, or None if pooling is disabled.
+
+    Args:
+        settings: Pool configuration. Defaults to the `[sandbox_pool]` config section.
+
+    Returns:
+        The shared SandboxPool instance, or None.
+    """
+    global _sandbox_pool
+    settings = settings or config.sandbox_pool
+    if not settings.enabled:
+        return None
+    with _sandbox_pool_lock:
+        if _sandbox_pool is None:
+            _sandbox_pool = SandboxPool(settings=settings)
+        return _sandbox_pool
+
+
+def warm_sandbox_pool() -> None:
+    """Starts pre-starting sandboxes for the tools, if they use a pooled sandbox."""
+    pool = get_sandbox_pool()
+    if pool and config.sandbox.use_sandbox:
+        # File operators create their sandbox with the default settings
+        pool.warm(SandboxSettings())
+
+
+async def close_sandbox_pool() -> None:
+    """Destroys the sandboxes of the process-wide pool, if one was created."""
+    global _sandbox_pool
+    with _sandbox_pool_lock:
+        pool, _sandbox_pool = _sandbox_pool, None
+    if pool is not None:
+        await pool.close()
@@ -1,18 +1,59 @@
 import asyncio
-import io
 import os
-import tarfile
+import shlex
+import shutil
 import tempfile
 import uuid
-from typing import Dict, Optional
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
 
 import docker
-from docker.errors import NotFound
+from docker.errors import APIError, ImageNotFound, NotFound
 from docker.models.containers import Container
 
 from app.config import SandboxSettings
+from app.logger import logger
 from app.sandbox.core.exceptions import SandboxTimeoutError
 from app.sandbox.core.terminal import AsyncDockerizedTerminal
+from app.sandbox.core.transfer import (
+    CHUNK_SIZE,
+    TarEntry,
+    host_entries,
+    open_stream,
+    tar_stream,
+)
+
+
+async def ensure_image(client: docker.DockerClient, image: str) -> bool:
+    """Ensures Docker image is available, pulling it if needed.
+
+    Args:
+        client: Docker client.
+        image: Image name.
+
+    Returns:
+        bool: Whether image is available.
+    """
+    try:
+        client.images.get(image)
+        return True
+    except ImageNotFound:
+        try:
+            logger.info(f"Pulling image {image}...")
+            await asyncio.get_event_loop().run_in_executor(
+                None, client.images.pull, image
+            )
+            return True
+        except (APIError, Exception) as e:
+            logger.error(f"Failed to pull image {image}: {e}")
+            return False
 
 
 class DockerSandbox:
@@ -87,14 +128,7 @@ class DockerSandbox:
             # Start container
             await asyncio.to_thread(self.container.start)
 
-            # Initialize terminal
-            self.terminal = AsyncDockerizedTerminal(
-                container["Id"],
-                self.config.work_dir,
-                env_vars={"PYTHONUNBUFFERED": "1"}
-                # Ensure Python output is not buffered
-            )
-            await self.terminal.init()
+            await self._start_terminal()
 
             return self
 
@@ -102,6 +136,45 @@ class DockerSandbox:
             await self.cleanup()  # Ensure resources are cleaned up
             raise RuntimeError(f"Failed to create sandbox: {e}") from e
 
+    async def _start_terminal(self) -> None:
+        """Starts a new shell session in the container."""
+        self.terminal = AsyncDockerizedTerminal(
+            self.container.id,
+            self.config.work_dir,
+            env_vars={"PYTHONUNBUFFERED": "1"}
+            # Ensure Python output is not buffered
+        )
+        await self.terminal.init()
+
+    async def reset(self) -> None:
+        """Restores the sandbox to a freshly created state for reuse.
+
+        Kills every process except the container's init process, including
+        background jobs, empties the working directory and /tmp, and replaces
+        the shell session, which discards its environment variables and
+        current directory. Other file system changes, such as installed
+        packages, are kept.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or the reset fails.
+        """
+        if not self.container or not self.terminal:
+            raise RuntimeError("Sandbox not initialized")
+
+        await self.terminal.close()
+        # `kill -1` signals every process but PID 1 and the calling shell
+        script = (
+            "kill -9 -1 2>/dev/null; "
+            f"find {shlex.quote(self.config.work_dir)} /tmp -mindepth 1 -delete"
+        )
+        result = await asyncio.to_thread(self.container.exec_run, ["sh", "-c", script])
+        if result.exit_code != 0:
+            raise RuntimeError(
+                f"Failed to reset sandbox: {result.output.decode('utf-8', 'replace')}"
+            )
+
+        await self._start_terminal()
+
     def _prepare_volume_bindings(self) -> Dict[str, Dict[str, str]]:
         """Prepares volume binding configuration.
 
@@ -176,24 +249,56 @@ class DockerSandbox:
             FileNotFoundError: If file does not exist.
             RuntimeError: If read operation fails.
         """
+        try:
+            chunks = [chunk async for chunk in self.read_stream(path)]
+            return b"".join(chunks).decode("utf-8")
+        except (FileNotFoundError, RuntimeError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to read file: {e}")
+
+    async def read_stream(
+        self, path: str, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Streams a file from the container.
+
+        The archive Docker sends is unpacked as it arrives, so only a few
+        chunks are held in memory at a time.
+
+        Args:
+            path: File path.
+            chunk_size: Bytes read at a time.
+
+        Yields:
+            bytes: Consecutive chunks of the file.
+
+        Raises:
+            FileNotFoundError: If file does not exist.
+            RuntimeError: If sandbox not initialized or path is not a file.
+        """
         if not self.container:
             raise RuntimeError("Sandbox not initialized")
 
+        resolved_path = self._safe_resolve_path(path)
         try:
-            # Get file archive
-            resolved_path = self._safe_resolve_path(path)
-            tar_stream, _ = await asyncio.to_thread(
-                self.container.get_archive, resolved_path
+            stream, _ = await asyncio.to_thread(
+                self.container.get_archive, resolved_path, chunk_size
             )
-
-            # Read file content from tar stream
-            content = await self._read_from_tar(tar_stream)
-            return content.decode("utf-8")
-
         except NotFound:
             raise FileNotFoundError(f"File not found: {path}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to read file: {e}")
+
+        tar = await asyncio.to_thread(open_stream, stream)
+        try:
+            member = await asyncio.to_thread(tar.next)
+            if not member:
+                raise RuntimeError("Empty tar archive")
+            file_content = tar.extractfile(member)
+            if not file_content:
+                raise RuntimeError(f"Failed to read file: {path} is not a regular file")
+            while chunk := await asyncio.to_thread(file_content.read, chunk_size):
+                yield chunk
+        finally:
+            tar.close()
 
     async def write_file(self, path: str, content: str) -> None:
         """Writes content to a file in the container.
@@ -205,29 +310,109 @@ class DockerSandbox:
         Raises:
             RuntimeError: If write operation fails.
         """
-        if not self.container:
-            raise RuntimeError("Sandbox not initialized")
-
+        data = content.encode("utf-8")
         try:
-            resolved_path = self._safe_resolve_path(path)
-            parent_dir = os.path.dirname(resolved_path)
+            await self._put_archive(
+                [TarEntry(self._safe_resolve_path(path), len(data), [data])]
+            )
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to write file: {e}")
 
-            # Create parent directory
-            if parent_dir:
-                await self.run_command(f"mkdir -p {parent_dir}")
+    async def write_stream(
+        self, path: str, chunks: AsyncIterable[bytes], size: int, mode: int = 0o644
+    ) -> None:
+        """Streams content into a file in the container.
+
+        The archive is built as the chunks are produced and sent while it is
+        built, so the content is never held in memory as a whole. Missing
+        parent directories are created.
+
+        Args:
+            path: Target path.
+            chunks: Content of the file.
+            size: Total size of the chunks in bytes, needed up front by tar.
+            mode: Permission bits of the file.
 
-            # Prepare file data
-            tar_stream = await self._create_tar_stream(
-                os.path.basename(path), content.encode("utf-8")
+        Raises:
+            RuntimeError: If write operation fails.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = chunks.__aiter__()
+
+        def pull() -> Iterator[bytes]:
+            # Runs in the uploading thread, taking chunks from the event loop
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(
+                        iterator.__anext__(), loop
+                    ).result()
+                except StopAsyncIteration:
+                    return
+
+        try:
+            await self._put_archive(
+                [TarEntry(self._safe_resolve_path(path), size, pull(), mode)]
             )
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to write file: {e}")
+
+    async def put_files(self, files: Dict[str, str]) -> None:
+        """Copies host files or directories into the container in one archive.
+
+        Args:
+            files: Container destination paths by host source path.
+
+        Raises:
+            FileNotFoundError: If a source does not exist.
+            RuntimeError: If copy operation fails.
+        """
+        entries = []
+        for src_path, dst_path in files.items():
+            if not os.path.exists(src_path):
+                raise FileNotFoundError(f"Source file not found: {src_path}")
+            entries.extend(host_entries(src_path, self._safe_resolve_path(dst_path)))
+        try:
+            await self._put_archive(entries)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Failed to copy file: {e}")
+
+    async def _put_archive(self, entries: List[TarEntry]) -> None:
+        """Uploads entries named by absolute container paths as one archive.
+
+        Paths in the working directory, which always exists, are extracted
+        there, others into their common parent. Parent directories that are
+        not in the archive are created beforehand with a single `mkdir -p`,
+        which is skipped when every entry goes into the working directory
+        itself. Existing directories are left as they are.
 
-            # Write file
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        names = [entry.name for entry in entries]
+        work_dir = self.config.work_dir.rstrip("/") or "/"
+        if all(os.path.commonpath([work_dir, name]) == work_dir for name in names):
+            root = work_dir
+        else:
+            root = os.path.commonpath([os.path.dirname(name) for name in names])
+
+        parents = {os.path.dirname(name) for name in names} - set(names) - {work_dir}
+        if parents:
             await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
+                self.container.exec_run, ["mkdir", "-p", *sorted(parents)]
             )
 
-        except Exception as e:
-            raise RuntimeError(f"Failed to write file: {e}")
+        for entry in entries:
+            entry.name = os.path.relpath(entry.name, root)
+        await asyncio.to_thread(self.container.put_archive, root, tar_stream(entries))
 
     def _safe_resolve_path(self, path: str) -> str:
         """Safely resolves container path, preventing path traversal.
@@ -272,46 +457,47 @@ class DockerSandbox:
             # Get file stream
             resolved_src = self._safe_resolve_path(src_path)
             stream, stat = await asyncio.to_thread(
-                self.container.get_archive, resolved_src
+                self.container.get_archive, resolved_src, CHUNK_SIZE
             )
 
-            # Create temporary directory to extract file
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                # Write stream to temporary file
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with open(tar_path, "wb") as f:
-                    for chunk in stream:
-                        f.write(chunk)
-
-                # Extract file
-                with tarfile.open(tar_path) as tar:
-                    members = tar.getmembers()
-                    if not members:
-                        raise FileNotFoundError(f"Source file is empty: {src_path}")
-
-                    # If destination is a directory, we should preserve relative path structure
-                    if os.path.isdir(dst_path):
-                        tar.extractall(dst_path)
-                    else:
-                        # If destination is a file, we only extract the source file's content
-                        if len(members) > 1:
-                            raise RuntimeError(
-                                f"Source path is a directory but destination is a file: {src_path}"
-                            )
-
-                        with open(dst_path, "wb") as dst:
-                            src_file = tar.extractfile(members[0])
-                            if src_file is None:
-                                raise RuntimeError(
-                                    f"Failed to extract file: {src_path}"
-                                )
-                            dst.write(src_file.read())
+            # Unpack the archive as it arrives
+            await asyncio.to_thread(self._extract, stream, src_path, dst_path)
 
         except docker.errors.NotFound:
             raise FileNotFoundError(f"Source file not found: {src_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to copy file: {e}")
 
+    @staticmethod
+    def _extract(stream: Iterable[bytes], src_path: str, dst_path: str) -> None:
+        """Unpacks an archive of a container file or directory to the host.
+
+        Args:
+            stream: Chunks of the archive.
+            src_path: Source path (container), for error messages.
+            dst_path: Destination path (host).
+        """
+        with open_stream(stream) as tar:
+            # If destination is a directory, we should preserve relative path structure
+            if os.path.isdir(dst_path):
+                tar.extractall(dst_path, filter="data")
+                return
+
+            member = tar.next()
+            if not member:
+                raise FileNotFoundError(f"Source file is empty: {src_path}")
+            # If destination is a file, we only extract the source file's content
+            if member.isdir():
+                raise RuntimeError(
+                    f"Source path is a directory but destination is a file: {src_path}"
+                )
+
+            src_file = tar.extractfile(member)
+            if src_file is None:
+                raise RuntimeError(f"Failed to extract file: {src_path}")
+            with open(dst_path, "wb") as dst:
+                shutil.copyfileobj(src_file, dst, CHUNK_SIZE)
+
     async def copy_to(self, src_path: str, dst_path: str) -> None:
         """Copies a file to the container.
 
@@ -323,104 +509,56 @@ class DockerSandbox:
             FileNotFoundError: If source file does not exist.
             RuntimeError: If copy operation fails.
         """
-        try:
-            if not os.path.exists(src_path):
-                raise FileNotFoundError(f"Source file not found: {src_path}")
-
-            # Create destination directory in container
-            resolved_dst = self._safe_resolve_path(dst_path)
-            container_dir = os.path.dirname(resolved_dst)
-            if container_dir:
-                await self.run_command(f"mkdir -p {container_dir}")
-
-            # Create tar file to upload
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with tarfile.open(tar_path, "w") as tar:
-                    # Handle directory source path
-                    if os.path.isdir(src_path):
-                        os.path.basename(src_path.rstrip("/"))
-                        for root, _, files in os.walk(src_path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.join(
-                                    os.path.basename(dst_path),
-                                    os.path.relpath(file_path, src_path),
-                                )
-                                tar.add(file_path, arcname=arcname)
-                    else:
-                        # Add single file to tar
-                        tar.add(src_path, arcname=os.path.basename(dst_path))
-
-                # Read tar file content
-                with open(tar_path, "rb") as f:
-                    data = f.read()
-
-                # Upload to container
-                await asyncio.to_thread(
-                    self.container.put_archive,
-                    os.path.dirname(resolved_dst) or "/",
-                    data,
-                )
-
-                # Verify file was created successfully
-                try:
-                    await self.run_command(f"test -e {resolved_dst}")
-                except Exception:
-                    raise RuntimeError(f"Failed to verify file creation: {dst_path}")
-
-        except FileNotFoundError:
-            raise
-        except Exception as e:
-            raise RuntimeError(f"Failed to copy file: {e}")
-
-    @staticmethod
-    async def _create_tar_stream(name: str, content: bytes) -> io.BytesIO:
-        """Creates a tar file stream.
-
-        Args:
-            name: Filename.
-            content: File content.
+        await self.put_files({src_path: dst_path})
 
-        Returns:
-            Tar file stream.
-        """
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            tarinfo = tarfile.TarInfo(name=name)
-            tarinfo.size = len(content)
-            tar.addfile(tarinfo, io.BytesIO(content))
-        tar_stream.seek(0)
-        return tar_stream
+    async def get_files(self, paths: List[str], dst_dir: str) -> None:
+        """Copies files or directories from the container in one archive.
 
-    @staticmethod
-    async def _read_from_tar(tar_stream) -> bytes:
-        """Reads file content from a tar stream.
+        Docker archives a single path per request, so the archive is made by
+        `tar` in the container and unpacked on the host as it arrives.
 
         Args:
-            tar_stream: Tar file stream.
-
-        Returns:
-            File content.
+            paths: Paths in the working directory (container).
+            dst_dir: Host directory the paths are recreated in, relative to
+                the working directory.
 
         Raises:
-            RuntimeError: If read operation fails.
+            ValueError: If a path is outside the working directory.
+            RuntimeError: If a path cannot be archived or copy operation fails.
         """
-        with tempfile.NamedTemporaryFile() as tmp:
-            for chunk in tar_stream:
-                tmp.write(chunk)
-            tmp.seek(0)
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
 
-            with tarfile.open(fileobj=tmp) as tar:
-                member = tar.next()
-                if not member:
-                    raise RuntimeError("Empty tar archive")
+        work_dir = self.config.work_dir
+        relative_paths = []
+        for path in paths:
+            relative = os.path.relpath(self._safe_resolve_path(path), work_dir)
+            if relative.startswith(".."):
+                raise ValueError(f"Path is outside the working directory: {path}")
+            relative_paths.append(relative)
+
+        result = await asyncio.to_thread(
+            self.container.exec_run,
+            ["tar", "-cf", "-", "-C", work_dir, "--", *relative_paths],
+            stream=True,
+            demux=True,
+        )
+        errors = []
 
-                file_content = tar.extractfile(member)
-                if not file_content:
-                    raise RuntimeError("Failed to extract file content")
+        def stdout() -> Iterator[bytes]:
+            for out, err in result.output:
+                if err:
+                    errors.append(err.decode("utf-8", "replace"))
+                if out:
+                    yield out
 
-                return file_content.read()
+        os.makedirs(dst_dir, exist_ok=True)
+        try:
+            await asyncio.to_thread(self._extract, stdout(), work_dir, dst_dir)
+        except Exception as e:
+            raise RuntimeError(f"Failed to copy files: {''.join(errors).strip() or e}")
+        if errors:
+            raise RuntimeError(f"Failed to copy files: {''.join(errors).strip()}")
 
     async def cleanup(self) -> None:
         """Cleans up sandbox resources."""
@@ -6,9 +6,10 @@ allowing interactive command execution with timeout control.
 """
 
 import asyncio
-import re
+import codecs
 import socket
-from typing import Dict, Optional, Tuple, Union
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import docker
 from docker import APIClient
@@ -16,17 +17,119 @@ from docker.errors import APIError
 from docker.models.containers import Container
 
 
+# Start of the marker the shell prints after each command
+MARKER_PREFIX = "__OPENMANUS_DONE_"
+# Seconds to wait for the shell to come back after interrupting a command
+RESYNC_TIMEOUT = 5
+# Characters of output kept per command
+MAX_OUTPUT = 1024 * 1024
+
+
+class CommandOutput:
+    """Incremental framer of a command's output, up to its end marker.
+
+    Output is decoded as it arrives and never re-scanned: only the bytes that
+    could start the marker are held back between chunks. Beyond `max_output`
+    characters, the start and the end of the output are kept.
+    """
+
+    def __init__(
+        self,
+        marker: bytes,
+        max_output: int = MAX_OUTPUT,
+        on_output: Optional[Callable[[str], None]] = None,
+    ):
+        """Initializes the framer.
+
+        Args:
+            marker: Marker printed after the output, followed by the exit code.
+            max_output: Characters of output kept.
+            on_output: Called with each piece of output as it is decoded.
+        """
+        self.marker = marker
+        self.on_output = on_output
+        self.exit_code: Optional[int] = None
+        self.done = False
+        self.omitted = 0
+        self._pending = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._head_limit = max_output // 2
+        self._tail_limit = max_output - self._head_limit
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail = ""
+
+    def feed(self, data: bytes) -> None:
+        """Consumes a chunk read from the shell."""
+        self._pending += data
+        index = self._pending.find(self.marker)
+        if index == -1:
+            # Hold back what may be the start of the marker or of a CRLF
+            cut = max(0, len(self._pending) - len(self.marker) + 1)
+            if self._pending[cut - 1 : cut] == b"\r":
+                cut -= 1
+            self._emit(self._pending[:cut])
+            del self._pending[:cut]
+            return
+
+        self._emit(self._pending[:index])
+        del self._pending[:index]
+        line_end = self._pending.find(b"\n")
+        if line_end == -1:
+            return  # Wait for the rest of the exit code
+        self.exit_code = int(self._pending[len(self.marker) : line_end])
+        self._emit(b"", final=True)
+        self.done = True
+
+    def _emit(self, data: bytes, final: bool = False) -> None:
+        text = self._decoder.decode(bytes(data).replace(b"\r\n", b"\n"), final)
+        if not text:
+            return
+        if self.on_output:
+            self.on_output(text)
+        room = self._head_limit - self._head_size
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_size += len(text[:room])
+            text = text[room:]
+        self._tail += text
+        # Trim lazily, so long outputs are not copied on every chunk
+        if len(self._tail) > 2 * self._tail_limit:
+            self._trim_tail()
+
+    def _trim_tail(self) -> None:
+        excess = len(self._tail) - self._tail_limit
+        if excess > 0:
+            self.omitted += excess
+            self._tail = self._tail[excess:]
+
+    @property
+    def text(self) -> str:
+        """The output, with the middle left out if it exceeded `max_output`."""
+        self._trim_tail()
+        head = "".join(self._head)
+        if self.omitted:
+            return f"{head}\n... [{self.omitted} characters omitted] ...\n{self._tail}"
+        return head + self._tail
+
+
 class DockerSession:
-    def __init__(self, container_id: str) -> None:
+    def __init__(self, container_id: str, max_output: int = MAX_OUTPUT) -> None:
         """Initializes a Docker session.
 
         Args:
             container_id: ID of the Docker container.
+            max_output: Characters of output kept per command.
         """
         self.api = APIClient()
         self.container_id = container_id
         self.exec_id = None
         self.socket = None
+        self.max_output = max_output
+        self.last_exit_code: Optional[int] = None
+        self._lock = asyncio.Lock()
+        # Marker ending the output of an interrupted command
+        self._resync_marker: Optional[bytes] = None
 
     async def create(self, working_dir: str, env_vars: Dict[str, str]) -> None:
         """Creates an interactive session with the container.
@@ -43,7 +146,7 @@ class DockerSession:
             "-c",
             f"cd {working_dir} && "
             "PROMPT_COMMAND='' "
-            "PS1='$ ' "
+            "PS1='' PS2='' "
             "exec bash --norc --noprofile",
         ]
 
@@ -56,7 +159,13 @@ class DockerSession:
             stderr=True,
             privileged=True,
             user="root",
-            environment={**env_vars, "TERM": "dumb", "PS1": "$ ", "PROMPT_COMMAND": ""},
+            environment={
+                **env_vars,
+                "TERM": "dumb",
+                "PS1": "",
+                "PS2": "",
+                "PROMPT_COMMAND": "",
+            },
         )
         self.exec_id = exec_data["Id"]
 
@@ -70,7 +179,11 @@ class DockerSession:
         else:
             raise RuntimeError("Failed to get socket connection")
 
-        await self._read_until_prompt()
+        # Without echo, the output holds nothing but what commands print
+        await asyncio.get_running_loop().sock_sendall(
+            self.socket, b"stty -echo 2>/dev/null\n"
+        )
+        await self._read_output(await self._send_marker())
 
     async def close(self) -> None:
         """Cleans up session resources.
@@ -114,37 +227,85 @@ class DockerSession:
             # Log error but don't raise, ensure cleanup continues
             print(f"Warning: Error during session cleanup: {e}")
 
-    async def _read_until_prompt(self) -> str:
-        """Reads output until prompt is found.
+    async def _send_marker(self) -> bytes:
+        """Asks the shell to print a unique marker and the last exit code.
+
+        The marker is printed from two halves, so the shell echoing the
+        command line never produces it.
+
+        Returns:
+            The marker, followed by ':' and the exit code in the output.
+        """
+        token = uuid.uuid4().hex
+        await asyncio.get_running_loop().sock_sendall(
+            self.socket,
+            f"printf '\\n%s%s:%s\\n' '{MARKER_PREFIX}' '{token}' \"$?\"\n".encode(),
+        )
+        return f"{MARKER_PREFIX}{token}:".encode()
+
+    async def _read_output(
+        self, marker: bytes, on_output: Optional[Callable[[str], None]] = None
+    ) -> "CommandOutput":
+        """Reads output as it arrives, until the marker and exit code.
+
+        Args:
+            marker: Marker ending the output.
+            on_output: Called with each piece of output as it is read.
 
         Returns:
-            String containing output up to the prompt.
+            The framed output of the command.
 
         Raises:
-            socket.error: If socket communication fails.
+            RuntimeError: If the shell exits first.
         """
-        buffer = b""
-        while b"$ " not in buffer:
-            try:
-                chunk = self.socket.recv(4096)
-                if chunk:
-                    buffer += chunk
-            except socket.error as e:
-                if e.errno == socket.EWOULDBLOCK:
-                    await asyncio.sleep(0.1)
-                    continue
-                raise
-        return buffer.decode("utf-8")
+        loop = asyncio.get_running_loop()
+        output = CommandOutput(marker, self.max_output, on_output)
+        while not output.done:
+            chunk = await loop.sock_recv(self.socket, 65536)
+            if not chunk:
+                raise RuntimeError("Session closed")
+            output.feed(chunk)
+        return output
+
+    async def _interrupt(self) -> None:
+        """Stops a timed-out or cancelled command, so the shell can run the next.
+
+        The rest of the command's output is skipped up to a new marker before
+        the next command runs.
+        """
+        try:
+            await asyncio.get_running_loop().sock_sendall(self.socket, b"\x03\n")
+            self._resync_marker = await self._send_marker()
+        except OSError:
+            self._resync_marker = None
+
+    async def _resync(self) -> None:
+        """Skips what an interrupted command printed after it was stopped."""
+        try:
+            await asyncio.wait_for(
+                self._read_output(self._resync_marker), RESYNC_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            self._resync_marker = None
+            raise RuntimeError("Session did not recover from a timed-out command")
+        # Cleared only once found, so a cancelled resync is resumed next time
+        self._resync_marker = None
 
-    async def execute(self, command: str, timeout: Optional[int] = None) -> str:
+    async def execute(
+        self,
+        command: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """Executes a command and returns cleaned output.
 
         Args:
             command: Shell command to execute.
             timeout: Maximum execution time in seconds.
+            on_output: Called with each piece of output as it is read.
 
         Returns:
-            Command output as string with prompt markers removed.
+            Command output as string, with at most `max_output` characters.
 
         Raises:
             RuntimeError: If session not initialized or execution fails.
@@ -156,59 +317,27 @@ class DockerSession:
         try:
             # Sanitize command to prevent shell injection
             sanitized_command = self._sanitize_command(command)
-            full_command = f"{sanitized_command}\necho $?\n"
-            self.socket.sendall(full_command.encode())
-
-            async def read_output() -> str:
-                buffer = b""
-                result_lines = []
-                command_sent = False
-
-                while True:
-                    try:
-                        chunk = self.socket.recv(4096)
-                        if not chunk:
-                            break
-
-                        buffer += chunk
-                        lines = buffer.split(b"\n")
-
-                        buffer = lines[-1]
-                        lines = lines[:-1]
-
-                        for line in lines:
-                            line = line.rstrip(b"\r")
 
-                            if not command_sent:
-                                command_sent = True
-                                continue
+            async with self._lock:
+                if self._resync_marker:
+                    await self._resync()
 
-                            if line.strip() == b"echo $?" or line.strip().isdigit():
-                                continue
-
-                            if line.strip():
-                                result_lines.append(line)
-
-                        if buffer.endswith(b"$ "):
-                            break
-
-                    except socket.error as e:
-                        if e.errno == socket.EWOULDBLOCK:
-                            await asyncio.sleep(0.1)
-                            continue
-                        raise
-
-                output = b"\n".join(result_lines).decode("utf-8")
-                output = re.sub(r"\n\$ echo \$\$?.*$", "", output)
-
-                return output
-
-            if timeout:
-                result = await asyncio.wait_for(read_output(), timeout)
-            else:
-                result = await read_output()
-
-            return result.strip()
+                try:
+                    await asyncio.get_running_loop().sock_sendall(
+                        self.socket, f"{sanitized_command}\n".encode()
+                    )
+                    marker = await self._send_marker()
+                    output = await asyncio.wait_for(
+                        self._read_output(marker, on_output), timeout
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    # A cancelled command would otherwise keep running and
+                    # print into the output of the next one
+                    await self._interrupt()
+                    raise
+
+            self.last_exit_code = output.exit_code
+            return output.text.strip()
 
         except asyncio.TimeoutError:
             raise TimeoutError(f"Command execution timed out after {timeout} seconds")
@@ -313,12 +442,18 @@ class AsyncDockerizedTerminal:
         )
         return result.exit_code, result.output.decode("utf-8")
 
-    async def run_command(self, cmd: str, timeout: Optional[int] = None) -> str:
+    async def run_command(
+        self,
+        cmd: str,
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> str:
         """Runs a command in the container with timeout.
 
         Args:
             cmd: Shell command to execute.
             timeout: Maximum execution time in seconds.
+            on_output: Called with each piece of output as it is read.
 
         Returns:
             Command output as string.
@@ -329,7 +464,9 @@ class AsyncDockerizedTerminal:
         if not self.session:
             raise RuntimeError("Terminal not initialized")
 
-        return await self.session.execute(cmd, timeout=timeout or self.default_timeout)
+        return await self.session.execute(
+            cmd, timeout=timeout or self.default_timeout, on_output=on_output
+        )
 
     async def close(self) -> None:
         """Closes the terminal session."""
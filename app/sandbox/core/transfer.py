@@ -0,0 +1,141 @@
+"""Streaming tar archives for moving files in and out of sandboxes.
+
+Docker copies files to and from containers as tar archives. These helpers
+produce and consume archives a chunk at a time, so a transfer holds a few
+chunks in memory however large the files are.
+"""
+
+import io
+import os
+import tarfile
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+
+# Bytes read or sent at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class TarEntry:
+    """A file or directory to put in an archive.
+
+    Attributes:
+        name: Path of the entry inside the archive.
+        size: Size of a file in bytes; the chunks must add up to it.
+        chunks: Content of a file, None for a directory.
+        mode: Permission bits.
+    """
+
+    name: str
+    size: int = 0
+    chunks: Optional[Iterable[bytes]] = None
+    mode: int = 0o644
+
+
+def file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Reads a host file a chunk at a time."""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def host_entries(src_path: str, name: str) -> List[TarEntry]:
+    """Lists the entries of a host file, or of a directory and its contents.
+
+    Args:
+        src_path: File or directory on the host.
+        name: Archive path of `src_path`.
+
+    Returns:
+        Entries whose content is read from disk as the archive is sent.
+    """
+    if not os.path.isdir(src_path):
+        return [_host_file(src_path, name)]
+
+    entries = [TarEntry(name, mode=0o755)]
+    for root, dirs, files in os.walk(src_path):
+        dirs.sort()
+        relative = os.path.relpath(root, src_path)
+        prefix = name if relative == "." else f"{name}/{relative}"
+        entries.extend(TarEntry(f"{prefix}/{d}", mode=0o755) for d in dirs)
+        entries.extend(
+            _host_file(os.path.join(root, f), f"{prefix}/{f}") for f in sorted(files)
+        )
+    return entries
+
+
+def _host_file(path: str, name: str) -> TarEntry:
+    stat = os.stat(path)
+    return TarEntry(name, stat.st_size, file_chunks(path), stat.st_mode & 0o777)
+
+
+def tar_stream(entries: Iterable[TarEntry]) -> Iterator[bytes]:
+    """Generates an uncompressed tar archive of entries, chunk by chunk.
+
+    Args:
+        entries: Files and directories, parents before their contents.
+
+    Yields:
+        bytes: Consecutive parts of the archive.
+
+    Raises:
+        ValueError: If a file's content doesn't match its declared size.
+    """
+    mtime = int(time.time())
+    for entry in entries:
+        info = tarfile.TarInfo(entry.name)
+        info.mtime = mtime
+        info.mode = entry.mode
+        if entry.chunks is None:
+            info.type = tarfile.DIRTYPE
+            yield info.tobuf(tarfile.PAX_FORMAT)
+            continue
+
+        info.size = entry.size
+        yield info.tobuf(tarfile.PAX_FORMAT)
+        sent = 0
+        for chunk in entry.chunks:
+            sent += len(chunk)
+            if sent > entry.size:
+                break
+            yield chunk
+        if sent != entry.size:
+            raise ValueError(
+                f"Size of {entry.name} changed: expected {entry.size} bytes, got {sent}"
+            )
+        remainder = entry.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+
+
+class ChunkReader(io.RawIOBase):
+    """Readable file object over an iterator of byte chunks.
+
+    Lets `tarfile` parse an archive while it is still being received.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._chunk = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+def open_stream(chunks: Iterable[bytes]) -> tarfile.TarFile:
+    """Opens a tar archive for reading its members in order as it arrives."""
+    return tarfile.open(fileobj=ChunkReader(chunks), mode="r|")
@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class Role(str, Enum):
@@ -61,6 +61,14 @@ class Message(BaseModel):
     tool_call_id: Optional[str] = Field(default=None)
     base64_image: Optional[str] = Field(default=None)
 
+    # Formatted OpenAI wire dicts keyed by supports_images, rebuilt only on change
+    _wire_cache: Dict[bool, Optional[dict]] = PrivateAttr(default_factory=dict)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._wire_cache = {}
+
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
         if isinstance(other, list):
@@ -96,6 +104,54 @@ class Message(BaseModel):
             message["base64_image"] = self.base64_image
         return message
 
+    def to_wire(self, supports_images: bool = False) -> Optional[dict]:
+        """Get the message in OpenAI wire format, or None if it has nothing to send.
+
+        The result is computed once and shared by reference between requests,
+        so callers must not mutate it.
+        """
+        if supports_images not in self._wire_cache:
+            message = self.format_wire(self.to_dict(), supports_images)
+            self._wire_cache[supports_images] = (
+                message if "content" in message or "tool_calls" in message else None
+            )
+        return self._wire_cache[supports_images]
+
+    @staticmethod
+    def format_wire(message: dict, supports_images: bool = False) -> dict:
+        """Fold a message dict's base64_image into OpenAI content, in place."""
+        # Process base64 images if present and model supports images
+        if supports_images and message.get("base64_image"):
+            # Initialize or convert content to appropriate format
+            if not message.get("content"):
+                message["content"] = []
+            elif isinstance(message["content"], str):
+                message["content"] = [{"type": "text", "text": message["content"]}]
+            elif isinstance(message["content"], list):
+                # Convert string items to proper text objects
+                message["content"] = [
+                    {"type": "text", "text": item} if isinstance(item, str) else item
+                    for item in message["content"]
+                ]
+
+            # Add the image to content
+            message["content"].append(
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{message['base64_image']}"
+                    },
+                }
+            )
+
+            # Remove the base64_image field
+            del message["base64_image"]
+        # If model doesn't support images but message has base64_image, handle gracefully
+        elif not supports_images and message.get("base64_image"):
+            # Just remove the base64_image field and keep the text content
+            del message["base64_image"]
+        return message
+
     @classmethod
     def user_message(
         cls, content: str, base64_image: Optional[str] = None
@@ -163,16 +219,22 @@ class Memory(BaseModel):
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
         self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._enforce_limit()
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
         self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self._enforce_limit()
+
+    def _enforce_limit(self) -> None:
+        """Drop the oldest messages over max_messages without orphaning tool results"""
+        if len(self.messages) <= self.max_messages:
+            return
+        start = len(self.messages) - self.max_messages
+        # A tool result must follow the assistant message that called the tool
+        while start < len(self.messages) and self.messages[start].role == Role.TOOL:
+            start += 1
+        self.messages = self.messages[start:]
 
     def clear(self) -> None:
         """Clear all messages"""
@@ -1,4 +1,5 @@
 from app.llm import LLM
+from app.llm_router import LLM_ROUTER, TaskClass
 from app.logger import logger
 from app.schema import Message
 
@@ -61,7 +62,13 @@ class AntiContamination:
 
         try:
             # Using non-streaming request for purification
-            purified_text = await self.llm.ask(messages, stream=False)
+            purified_text = await LLM_ROUTER.ask(
+                TaskClass.CLASSIFY,
+                messages,
+                fallback=self.llm,
+                accept=lambda result: bool(result and result.strip()),
+                stream=False,
+            )
             purified_text = purified_text.strip()
             
             # Simple check if text was modified significantly (ignoring whitespace)
@@ -0,0 +1,137 @@
+"""Session-scoped runtime state.
+
+Agents serving different users in one process must not share token budgets,
+sandboxes or tool state. A `Session` owns these, and the session of the code
+currently running is carried in a context variable, so it follows asyncio
+tasks and threads started from it. Process-wide entry points such as
+`SANDBOX_CLIENT` and the LLM token counters resolve to the current session.
+
+Code that never enters a session uses a process default session, which keeps
+single-user scripts working as before.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+
+class TokenUsage(BaseModel):
+    """Tokens used by one LLM configuration within a session."""
+
+    input_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class Session:
+    """Runtime state of one agent session."""
+
+    def __init__(self, session_id: Optional[str] = None):
+        """Initializes an empty session; resources are created on first use.
+
+        Args:
+            session_id: Identifier of the session, random if not given.
+        """
+        self.id = session_id or uuid.uuid4().hex
+        self.llm_usage: Dict[str, TokenUsage] = {}
+        self._state: Dict[str, Any] = {}
+        self._sandbox_client = None
+
+    @property
+    def sandbox_client(self):
+        """The session's sandbox client, created on first use."""
+        if self._sandbox_client is None:
+            # Imported here: the sandbox client imports the docker SDK
+            from app.sandbox.client import create_sandbox_client
+
+            self._sandbox_client = create_sandbox_client()
+        return self._sandbox_client
+
+    def usage(self, config_name: str) -> TokenUsage:
+        """Get the token usage of an LLM configuration in this session."""
+        if config_name not in self.llm_usage:
+            self.llm_usage[config_name] = TokenUsage()
+        return self.llm_usage[config_name]
+
+    def get_state(self, key: str, factory: Callable[[], T]) -> T:
+        """Get a piece of session-scoped tool state, creating it if needed.
+
+        Args:
+            key: Name of the state, e.g. the owning class.
+            factory: Creates the state on first access.
+
+        Returns:
+            The session's instance of the state.
+        """
+        if key not in self._state:
+            self._state[key] = factory()
+        return self._state[key]
+
+    async def close(self) -> None:
+        """Release the session's sandbox and tool state."""
+        resources = list(self._state.values())
+        if self._sandbox_client is not None:
+            resources.append(self._sandbox_client)
+        self._state.clear()
+        self._sandbox_client = None
+        for resource in resources:
+            cleanup = getattr(resource, "cleanup", None)
+            if not asyncio.iscoroutinefunction(cleanup):
+                continue
+            try:
+                await cleanup()
+            except Exception as e:
+                logger.error(f"Error cleaning up session {self.id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets the session's token usage per LLM configuration."""
+        return {
+            "id": self.id,
+            "llm_usage": {
+                name: usage.model_dump() for name, usage in self.llm_usage.items()
+            },
+        }
+
+
+DEFAULT_SESSION = Session("default")
+
+_current_session: ContextVar[Optional[Session]] = ContextVar(
+    "current_session", default=None
+)
+
+
+def current_session() -> Session:
+    """Get the session of the running code, or the process default session."""
+    return _current_session.get() or DEFAULT_SESSION
+
+
+@asynccontextmanager
+async def session_scope(
+    session: Optional[Session] = None, close: bool = True
+) -> AsyncIterator[Session]:
+    """Run the enclosed code in a session.
+
+    Args:
+        session: Session to enter, a new one if not given.
+        close: Whether to close the session on exit.
+
+    Yields:
+        Session: The entered session.
+    """
+    session = session or Session()
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        if close:
+            await session.close()
@@ -4,6 +4,8 @@ from typing import Any, Dict, Optional, Union
 
 from pydantic import BaseModel, Field
 
+from app.tool.cache import get_tool_cache
+from app.tool.scheduler import ToolConcurrency
 from app.utils.logger import logger
 
 
@@ -94,6 +96,9 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Seconds results are memoized for when [tool_cache] is enabled; None for
+    # tools that are not idempotent
+    cache_ttl: Optional[int] = Field(default=None, exclude=True)
     # _schemas: Dict[str, List[ToolSchema]] = {}
 
     class Config:
@@ -113,13 +118,46 @@ class BaseTool(ABC, BaseModel):
     #             logger.debug(f"Registered schemas for method '{name}' in {self.__class__.__name__}")
 
     async def __call__(self, **kwargs) -> Any:
-        """Execute the tool with given parameters."""
-        return await self.execute(**kwargs)
+        """Execute the tool with given parameters, memoized if the tool opts in."""
+        cache = get_tool_cache() if self.cache_ttl else None
+        ttl = cache.ttl_for(self.name, self.cache_ttl) if cache else None
+        key = self.cache_key(**kwargs) if ttl else None
+        if key is None:
+            return await self.execute(**kwargs)
+
+        cached = cache.get(self.name, key)
+        if cached is not None:
+            return CachedToolResult(**cached)
+
+        result = await self.execute(**kwargs)
+        if isinstance(result, str):
+            cache.put(self.name, key, {"output": result}, ttl)
+        elif isinstance(result, ToolResult) and not result.error:
+            fields = {"output": result.output, "base64_image": result.base64_image}
+            cache.put(self.name, key, {**fields, "system": result.system}, ttl)
+        return result
 
     @abstractmethod
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    def cache_key(self, **kwargs) -> Optional[Any]:
+        """Get the memoization key of a call, None to not cache it.
+
+        Only used by tools that set `cache_ttl`. The default keys on the call
+        parameters; tools whose results depend on other state, such as file
+        contents, add that state to the key.
+        """
+        return kwargs
+
+    def concurrency(self, **kwargs) -> ToolConcurrency:
+        """Describe how a call with the given parameters may run alongside others.
+
+        Tools with shared state override this to name the resource a call
+        uses, so that conflicting calls are run in issue order.
+        """
+        return ToolConcurrency()
+
     def to_param(self) -> Dict:
         """Convert tool to function call format.
 
@@ -178,3 +216,14 @@ class CLIResult(ToolResult):
 
 class ToolFailure(ToolResult):
     """A ToolResult that represents a failure."""
+
+
+class ToolTimeout(ToolFailure):
+    """A ToolFailure for a call that was cancelled at its timeout."""
+
+
+class CachedToolResult(ToolResult):
+    """A ToolResult served from the tool result cache."""
+
+    def __str__(self):
+        return f"[cached result]\n{super().__str__()}"
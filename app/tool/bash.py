@@ -4,6 +4,7 @@ from typing import Optional
 
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, CLIResult
+from app.tool.scheduler import ToolConcurrency
 
 
 _BASH_DESCRIPTION = """Execute a bash command in the terminal.
@@ -96,6 +97,11 @@ class _BashSession:
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             ) from None
+        except asyncio.CancelledError:
+            # The command is still running, so its output can no longer be
+            # told apart from the next command's
+            self._timed_out = True
+            raise
 
         if output.endswith("\n"):
             output = output[:-1]
@@ -131,6 +137,10 @@ class Bash(BaseTool):
 
     _session: Optional[_BashSession] = None
 
+    def concurrency(self, **kwargs) -> ToolConcurrency:
+        """Commands share one shell session, so they run in issue order."""
+        return ToolConcurrency(resource="bash")
+
     async def execute(
         self, command: str | None = None, restart: bool = False, **kwargs
     ) -> CLIResult:
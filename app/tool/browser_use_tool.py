@@ -12,136 +12,25 @@ from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
 from app.llm import LLM
+from app.llm_router import LLM_ROUTER, TaskClass
 from app.tool.base import BaseTool, ToolResult
+from app.tool.browser_use_schema import (
+    BROWSER_DESCRIPTION,
+    BROWSER_PARAMETERS,
+    BROWSER_TOOL_NAME,
+    READ_ONLY_ACTIONS,
+)
+from app.tool.scheduler import ToolConcurrency
 from app.tool.web_search import WebSearch
 
 
-_BROWSER_DESCRIPTION = """\
-A powerful browser automation tool that allows interaction with web pages through various actions.
-* This tool provides commands for controlling a browser session, navigating web pages, and extracting information
-* It maintains state across calls, keeping the browser session alive until explicitly closed
-* Use this when you need to browse websites, fill forms, click buttons, extract content, or perform web searches
-* Each action requires specific parameters as defined in the tool's dependencies
-
-Key capabilities include:
-* Navigation: Go to specific URLs, go back, search the web, or refresh pages
-* Interaction: Click elements, input text, select from dropdowns, send keyboard commands
-* Scrolling: Scroll up/down by pixel amount or scroll to specific text
-* Content extraction: Extract and analyze content from web pages based on specific goals
-* Tab management: Switch between tabs, open new tabs, or close tabs
-
-Note: When using element indices, refer to the numbered elements shown in the current browser state.
-"""
-
 Context = TypeVar("Context")
 
 
 class BrowserUseTool(BaseTool, Generic[Context]):
-    name: str = "browser_use"
-    description: str = _BROWSER_DESCRIPTION
-    parameters: dict = {
-        "type": "object",
-        "properties": {
-            "action": {
-                "type": "string",
-                "enum": [
-                    "go_to_url",
-                    "click_element",
-                    "input_text",
-                    "scroll_down",
-                    "scroll_up",
-                    "scroll_to_text",
-                    "send_keys",
-                    "get_dropdown_options",
-                    "select_dropdown_option",
-                    "go_back",
-                    "web_search",
-                    "wait",
-                    "extract_content",
-                    "switch_tab",
-                    "open_tab",
-                    "close_tab",
-                    "batch",
-                ],
-                "description": "The browser action to perform",
-            },
-            "url": {
-                "type": "string",
-                "description": "URL for 'go_to_url' or 'open_tab' actions",
-            },
-            "actions": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "action": {"type": "string"},
-                        "url": {"type": "string"},
-                        "index": {"type": "integer"},
-                        "text": {"type": "string"},
-                        "scroll_amount": {"type": "integer"},
-                        "tab_id": {"type": "integer"},
-                        "query": {"type": "string"},
-                        "goal": {"type": "string"},
-                        "keys": {"type": "string"},
-                        "seconds": {"type": "integer"},
-                    },
-                    "required": ["action"],
-                },
-                "description": "List of actions for 'batch' action",
-            },
-            "index": {
-                "type": "integer",
-                "description": "Element index for 'click_element', 'input_text', 'get_dropdown_options', or 'select_dropdown_option' actions",
-            },
-            "text": {
-                "type": "string",
-                "description": "Text for 'input_text', 'scroll_to_text', or 'select_dropdown_option' actions",
-            },
-            "scroll_amount": {
-                "type": "integer",
-                "description": "Pixels to scroll (positive for down, negative for up) for 'scroll_down' or 'scroll_up' actions",
-            },
-            "tab_id": {
-                "type": "integer",
-                "description": "Tab ID for 'switch_tab' action",
-            },
-            "query": {
-                "type": "string",
-                "description": "Search query for 'web_search' action",
-            },
-            "goal": {
-                "type": "string",
-                "description": "Extraction goal for 'extract_content' action",
-            },
-            "keys": {
-                "type": "string",
-                "description": "Keys to send for 'send_keys' action",
-            },
-            "seconds": {
-                "type": "integer",
-                "description": "Seconds to wait for 'wait' action",
-            },
-        },
-        "required": ["action"],
-        "dependencies": {
-            "go_to_url": ["url"],
-            "click_element": ["index"],
-            "input_text": ["index", "text"],
-            "switch_tab": ["tab_id"],
-            "open_tab": ["url"],
-            "scroll_down": ["scroll_amount"],
-            "scroll_up": ["scroll_amount"],
-            "scroll_to_text": ["text"],
-            "send_keys": ["keys"],
-            "get_dropdown_options": ["index"],
-            "select_dropdown_option": ["index", "text"],
-            "go_back": [],
-            "web_search": ["query"],
-            "wait": ["seconds"],
-            "extract_content": ["goal"],
-            "batch": ["actions"],
-        },
-    }
+    name: str = BROWSER_TOOL_NAME
+    description: str = BROWSER_DESCRIPTION
+    parameters: dict = BROWSER_PARAMETERS
 
     lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
     browser: Optional[BrowserUseBrowser] = Field(default=None, exclude=True)
@@ -437,8 +326,11 @@ Page content:
             }
 
             # Use LLM to extract content with required function calling
-            response = await self.llm.ask_tool(
+            response = await LLM_ROUTER.ask_tool(
+                TaskClass.EXTRACT,
                 messages,
+                fallback=self.llm,
+                accept=lambda result: bool(result and result.tool_calls),
                 tools=[extraction_function],
                 tool_choice="required",
             )
@@ -482,6 +374,12 @@ Page content:
         else:
             return ToolResult(error=f"Unknown action: {action}")
 
+    def concurrency(self, action: Optional[str] = None, **kwargs) -> ToolConcurrency:
+        """Actions share one browser context, so they run in issue order."""
+        return ToolConcurrency(
+            resource="browser", write=action not in READ_ONLY_ACTIONS
+        )
+
     async def execute(
         self,
         action: str,
@@ -0,0 +1,149 @@
+"""Memoization of idempotent tool calls.
+
+Tools opt in by setting `cache_ttl` and, where needed, overriding
+`BaseTool.cache_key`. Results are kept in a `ResponseCache`: a size-bounded
+in-memory LRU in front of an optional SQLite tier shared across runs.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import PROJECT_ROOT, ToolCacheSettings, config
+from app.llm_cache import ResponseCache
+
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """Identifies a file's current version by its modification time and size.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        Optional[str]: Fingerprint that changes when the file is modified,
+            None if it is not a regular file.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class ToolResultCache:
+    """Cache of tool results with per-tool TTLs and hit statistics."""
+
+    def __init__(self, cache: ResponseCache, settings: ToolCacheSettings):
+        """Initializes the tool result cache.
+
+        Args:
+            cache: Storage for serialized results.
+            settings: Tool cache configuration, for per-tool TTL overrides.
+        """
+        self.cache = cache
+        self.settings = settings
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, name: str, default: Optional[int]) -> Optional[int]:
+        """Gets a tool's TTL, None if its results must not be cached."""
+        ttl = self.settings.ttl.get(name, default)
+        return ttl or None
+
+    def get(self, name: str, key: Any) -> Optional[Dict[str, Any]]:
+        """Looks up a cached result.
+
+        Args:
+            name: Tool name.
+            key: JSON-serializable key from `BaseTool.cache_key`.
+
+        Returns:
+            The cached result fields, or None on a miss.
+        """
+        value = self.cache.get(self._make_key(name, key))
+        self._record(name, "hits" if value is not None else "misses")
+        return json.loads(value) if value is not None else None
+
+    def put(self, name: str, key: Any, fields: Dict[str, Any], ttl: int) -> None:
+        """Stores a result.
+
+        Args:
+            name: Tool name.
+            key: JSON-serializable key from `BaseTool.cache_key`.
+            fields: ToolResult fields of the result.
+            ttl: Seconds before the result expires.
+        """
+        value = json.dumps(fields, ensure_ascii=False, default=str)
+        self.cache.put(self._make_key(name, key), value, ttl)
+        self._record(name, "stores")
+
+    @staticmethod
+    def _make_key(name: str, key: Any) -> str:
+        return ResponseCache.make_key({"tool": name, "key": key})
+
+    def _record(self, name: str, counter: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"hits": 0, "misses": 0, "stores": 0})
+            stats[counter] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets cache statistics.
+
+        Returns:
+            Dict: Storage statistics, plus hits, misses, stores and hit rate
+                per tool under "tools".
+        """
+        with self._lock:
+            tools = {
+                name: {
+                    **stats,
+                    "hit_rate": (
+                        stats["hits"] / (stats["hits"] + stats["misses"])
+                        if stats["hits"] + stats["misses"]
+                        else 0.0
+                    ),
+                }
+                for name, stats in self._stats.items()
+            }
+        return {**self.cache.get_stats(), "tools": tools}
+
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache(
+    settings: Optional[ToolCacheSettings] = None,
+) -> Optional[ToolResultCache]:
+    """Gets the process-wide tool result cache, or None if caching is disabled.
+
+    Args:
+        settings: Cache configuration. Defaults to the `[tool_cache]` config section.
+
+    Returns:
+        The shared ToolResultCache instance, or None.
+    """
+    global _tool_cache
+    settings = settings or config.tool_cache
+    if not settings or not settings.enabled:
+        return None
+
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            path = None
+            if settings.path:
+                path = Path(settings.path)
+                if not path.is_absolute():
+                    path = PROJECT_ROOT / path
+            cache = ResponseCache(
+                max_memory_entries=settings.max_memory_entries,
+                path=path,
+                max_disk_bytes=settings.max_disk_bytes,
+                max_memory_bytes=settings.max_memory_bytes,
+            )
+            _tool_cache = ToolResultCache(cache, settings)
+        return _tool_cache
@@ -8,6 +8,7 @@ from pydantic import Field, model_validator
 
 from app.config import config
 from app.llm import LLM
+from app.llm_router import LLM_ROUTER, TaskClass
 from app.logger import logger
 from app.tool.base import BaseTool
 
@@ -162,16 +163,29 @@ Outputs:
                         "insights_id": item["insights_id"],
                     }
                 )
+        # Insights are summaries of existing charts, so they can run on a cheaper tier
+        llm = LLM_ROUTER.get_llm(TaskClass.SUMMARIZE, self.llm)
         tasks = [
             self.invoke_vmind(
                 insights_id=item["insights_id"],
                 file_name=item["file_name"],
                 output_type=output_type,
                 task_type="insight",
+                llm=llm,
             )
             for item in data_list
         ]
         results = await asyncio.gather(*tasks)
+        if llm is not self.llm and LLM_ROUTER.settings.fallback:
+            # Retry failed charts on the main model
+            for index, result in enumerate(results):
+                if "error" in result and "chart_path" not in result:
+                    results[index] = await self.invoke_vmind(
+                        insights_id=data_list[index]["insights_id"],
+                        file_name=data_list[index]["file_name"],
+                        output_type=output_type,
+                        task_type="insight",
+                    )
         error_list = []
         success_list = []
         for index, result in enumerate(results):
@@ -223,11 +237,13 @@ Outputs:
         dict_data: list[dict[Hashable, Any]] = None,
         chart_description: str = None,
         language: str = "en",
+        llm: LLM = None,
     ):
+        llm = llm or self.llm
         llm_config = {
-            "base_url": self.llm.base_url,
-            "model": self.llm.model,
-            "api_key": self.llm.api_key,
+            "base_url": llm.base_url,
+            "model": llm.model,
+            "api_key": llm.api_key,
         }
         vmind_params = {
             "llm_config": llm_config,
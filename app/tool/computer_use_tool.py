@@ -10,6 +10,7 @@ from pydantic import Field
 
 from app.daytona.tool_base import Sandbox, SandboxToolsBase
 from app.tool.base import ToolResult
+from app.tool.scheduler import ToolConcurrency
 
 
 KEYBOARD_KEYS = [
@@ -222,6 +223,10 @@ class ComputerUseTool(SandboxToolsBase):
             logging.error(f"API request failed: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def concurrency(self, **kwargs) -> ToolConcurrency:
+        """Actions share one desktop, so they run in issue order."""
+        return ToolConcurrency(resource="computer")
+
     async def execute(
         self,
         action: Literal[
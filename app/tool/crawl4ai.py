@@ -6,7 +6,7 @@ providing fast, precise, and AI-ready data extraction with clean Markdown genera
 """
 
 import asyncio
-from typing import List, Union
+from typing import List, Optional, Union
 from urllib.parse import urlparse
 
 from app.logger import logger
@@ -61,6 +61,11 @@ class Crawl4aiTool(BaseTool):
         },
         "required": ["urls"],
     }
+    cache_ttl: Optional[int] = 3600
+
+    def cache_key(self, bypass_cache: bool = False, **kwargs) -> Optional[dict]:
+        """Crawls asked to bypass the cache are never served from it."""
+        return None if bypass_cache else kwargs
 
     async def execute(
         self,
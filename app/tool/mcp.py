@@ -11,6 +11,10 @@ from app.tool.base import BaseTool, ToolResult
 from app.tool.tool_collection import ToolCollection
 
 
+# Seconds results of read-only MCP tools are cached for
+MCP_READ_CACHE_TTL = 300
+
+
 class MCPClientTool(BaseTool):
     """Represents a tool proxy that can be called on the MCP server from the client side."""
 
@@ -46,6 +50,9 @@ class MCPClients(ToolCollection):
     def __init__(self):
         super().__init__()  # Initialize with empty tools list
         self.name = "mcp"  # Keep name for backward compatibility
+        # Per instance, so agents connected to one server keep separate sessions
+        self.sessions = {}
+        self.exit_stacks = {}
 
     async def connect_sse(self, server_url: str, server_id: str = "") -> None:
         """Connect to an MCP server using SSE transport."""
@@ -109,6 +116,9 @@ class MCPClients(ToolCollection):
             tool_name = f"mcp_{server_id}_{original_name}"
             tool_name = self._sanitize_tool_name(tool_name)
 
+            # Results of tools the server marks as read-only can be cached
+            annotations = getattr(tool, "annotations", None)
+            cacheable = bool(annotations and annotations.readOnlyHint)
             server_tool = MCPClientTool(
                 name=tool_name,
                 description=tool.description,
@@ -116,6 +126,7 @@ class MCPClients(ToolCollection):
                 session=session,
                 server_id=server_id,
                 original_name=original_name,
+                cache_ttl=MCP_READ_CACHE_TTL if cacheable else None,
             )
             self.tool_map[tool_name] = server_tool
 
@@ -0,0 +1,112 @@
+"""Timeouts and budgets for tool execution.
+
+Limits come from the `[tool_policy]` config section. Per-call timeouts apply
+to every `ToolCollection.execute`; call-count and wall-clock budgets are
+tracked per agent run by a `ToolBudget`.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import ToolLimitSettings, ToolPolicySettings, config
+
+
+def get_tool_timeout(
+    name: str, settings: Optional[ToolPolicySettings] = None
+) -> Optional[float]:
+    """Gets the configured timeout of a tool, falling back to the default."""
+    settings = settings or config.tool_policy or ToolPolicySettings()
+    limits = settings.tools.get(name)
+    if limits and limits.timeout is not None:
+        return limits.timeout
+    return settings.timeout
+
+
+class ToolBudget:
+    """Call-count and wall-clock budgets of one agent run."""
+
+    def __init__(
+        self,
+        settings: Optional[ToolPolicySettings] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initializes the budget and starts its clock.
+
+        Args:
+            settings: Tool policy configuration. Defaults to the `[tool_policy]` section.
+            clock: Monotonic clock in seconds.
+        """
+        self.settings = settings or config.tool_policy or ToolPolicySettings()
+        self._clock = clock
+        self.started = clock()
+        self.calls = 0
+        self.calls_by_tool: Dict[str, int] = {}
+        self.refused = 0
+        self.timeouts = 0
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the run's wall-clock budget, None if unlimited."""
+        if self.settings.max_seconds is None:
+            return None
+        return self.settings.max_seconds - (self._clock() - self.started)
+
+    def admit(self, name: str) -> Optional[str]:
+        """Counts a call of a tool if the budgets allow it.
+
+        Args:
+            name: Tool name.
+
+        Returns:
+            Optional[str]: Why the call is refused, None if it may run.
+        """
+        limits = self.settings.tools.get(name) or ToolLimitSettings()
+        reason = None
+        if (
+            self.settings.max_calls is not None
+            and self.calls >= self.settings.max_calls
+        ):
+            reason = (
+                f"the run's budget of {self.settings.max_calls} tool calls is used up"
+            )
+        elif (
+            limits.max_calls is not None
+            and self.calls_by_tool.get(name, 0) >= limits.max_calls
+        ):
+            reason = (
+                f"the run's budget of {limits.max_calls} calls of '{name}' is used up"
+            )
+        elif (remaining := self.remaining()) is not None and remaining <= 0:
+            reason = (
+                f"the run's time budget of {self.settings.max_seconds:g}s is used up"
+            )
+
+        if reason:
+            self.refused += 1
+            return reason
+        self.calls += 1
+        self.calls_by_tool[name] = self.calls_by_tool.get(name, 0) + 1
+        return None
+
+    def timeout(self, name: str) -> Optional[float]:
+        """Timeout of a call: the tool's timeout, capped by the time left."""
+        timeouts = [
+            t
+            for t in (get_tool_timeout(name, self.settings), self.remaining())
+            if t is not None
+        ]
+        return min(timeouts) if timeouts else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gets budget usage.
+
+        Returns:
+            Dict: Calls made per tool, refused and timed out calls, and the
+                elapsed wall-clock time.
+        """
+        return {
+            "calls": self.calls,
+            "calls_by_tool": dict(self.calls_by_tool),
+            "refused": self.refused,
+            "timeouts": self.timeouts,
+            "elapsed": self._clock() - self.started,
+        }
@@ -1,9 +1,10 @@
 import multiprocessing
-import sys
-from io import StringIO
 from typing import Dict
 
+from app.config import config
+from app.session import current_session
 from app.tool.base import BaseTool
+from app.tool.python_worker_pool import get_python_worker_pool, run_code
 
 
 class PythonExecute(BaseTool):
@@ -23,18 +24,7 @@ class PythonExecute(BaseTool):
     }
 
     def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
-        original_stdout = sys.stdout
-        try:
-            output_buffer = StringIO()
-            sys.stdout = output_buffer
-            exec(code, safe_globals, safe_globals)
-            result_dict["observation"] = output_buffer.getvalue()
-            result_dict["success"] = True
-        except Exception as e:
-            result_dict["observation"] = str(e)
-            result_dict["success"] = False
-        finally:
-            sys.stdout = original_stdout
+        result_dict.update(run_code(code, safe_globals))
 
     async def execute(
         self,
@@ -51,6 +41,10 @@ class PythonExecute(BaseTool):
         Returns:
             Dict: Contains 'output' with execution output or error message and 'success' status.
         """
+        settings = config.python_execute
+        if settings.mode == "pool":
+            session = current_session() if settings.persist_state else None
+            return await get_python_worker_pool().run(code, timeout, session)
 
         with multiprocessing.Manager() as manager:
             result = manager.dict({"observation": "", "success": False})
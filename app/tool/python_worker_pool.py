@@ -0,0 +1,368 @@
+"""Warm worker processes for python_execute.
+
+Starting a process per call costs a process spawn plus re-importing whatever
+the code uses. A `PythonWorkerPool` keeps worker processes running with common
+modules preloaded and exchanges code and results with them over pipes.
+Workers run under optional resource limits and are replaced after a timeout,
+a crash, or a configured number of calls.
+"""
+
+import asyncio
+import builtins
+import importlib
+import multiprocessing
+import signal
+import sys
+import threading
+from io import StringIO
+from typing import Any, Dict, List, Optional
+
+from app.config import PythonExecuteSettings, config
+from app.logger import logger
+from app.session import Session
+
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Seconds a new worker may take to import its preloaded modules
+STARTUP_TIMEOUT = 120
+
+_READY = "ready"
+
+
+def fresh_globals() -> Dict[str, Any]:
+    """Creates the namespace code runs in, with a private copy of the builtins."""
+    return {"__builtins__": builtins.__dict__.copy()}
+
+
+def run_code(code: str, namespace: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs code in a namespace, capturing what it prints.
+
+    Args:
+        code: Python source to run.
+        namespace: Globals of the code, updated in place.
+
+    Returns:
+        Dict: 'observation' with the printed output or the error message, and
+            'success'.
+    """
+    original_stdout = sys.stdout
+    output_buffer = StringIO()
+    try:
+        sys.stdout = output_buffer
+        exec(code, namespace, namespace)
+        return {"observation": output_buffer.getvalue(), "success": True}
+    except Exception as e:
+        return {"observation": str(e) or type(e).__name__, "success": False}
+    finally:
+        sys.stdout = original_stdout
+
+
+def _set_cpu_limit(seconds: int) -> None:
+    """Lets the process use `seconds` more CPU time before SIGXCPU ends it."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(
+    conn,
+    preload_modules: List[str],
+    memory_limit_mb: Optional[int],
+    cpu_time_limit: Optional[int],
+) -> None:
+    """Entry point of a worker process: runs code from the pipe until closed."""
+    if resource and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    for module in preload_modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass  # Code importing the module reports the error itself
+    conn.send(_READY)
+
+    namespace = fresh_globals()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        code, keep_state = message
+        if not keep_state:
+            namespace = fresh_globals()
+        if resource and cpu_time_limit:
+            _set_cpu_limit(cpu_time_limit)
+        try:
+            result = run_code(code, namespace)
+        except SystemExit:
+            result = {"observation": "", "success": False}
+        conn.send(result)
+
+
+class PythonWorker:
+    """A worker process and the parent's end of its pipe.
+
+    A worker runs one call at a time. After a timeout or a crash it is
+    restarted, which discards any state kept between calls. Starting and
+    stopping the process block, so async callers run them in a thread.
+    """
+
+    def __init__(self, settings: PythonExecuteSettings):
+        """Prepares a worker; its process starts with `start` or the first call.
+
+        Args:
+            settings: Preloaded modules and resource limits of the worker.
+        """
+        self.settings = settings
+        # Serializes calls to a worker pinned to a session
+        self.lock = asyncio.Lock()
+        self.process: Optional[multiprocessing.Process] = None
+        self.executions = 0
+        # Whether the next call needs a new process
+        self._stale = True
+
+    def start(self) -> None:
+        """Starts the worker process."""
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                child_conn,
+                list(self.settings.preload_modules),
+                self.settings.memory_limit_mb,
+                self.settings.cpu_time_limit,
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.executions = 0
+        self._ready = False
+        self._stale = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    async def run(self, code: str, timeout: float, keep_state: bool = False) -> Dict:
+        """Runs code in the worker.
+
+        Args:
+            code: Python source to run.
+            timeout: Seconds after which the worker is killed.
+            keep_state: Keep the globals of earlier calls instead of starting
+                from a fresh namespace.
+
+        Returns:
+            Dict: 'observation' and 'success', as returned by `run_code`.
+        """
+        if self._stale:
+            await asyncio.to_thread(self.restart)
+        try:
+            if not self._ready:
+                if not await self._wait(STARTUP_TIMEOUT):
+                    return await self._fail("Python worker did not start in time")
+                if self.conn.recv() != _READY:
+                    return await self._fail("Python worker failed to start")
+                self._ready = True
+
+            self.executions += 1
+            self.conn.send((code, keep_state))
+            if not await self._wait(timeout):
+                return await self._fail(f"Execution timeout after {timeout} seconds")
+            return self.conn.recv()
+        except (EOFError, OSError):
+            return await self._fail(await asyncio.to_thread(self._exit_reason))
+        except asyncio.CancelledError:
+            # The result of the abandoned call would be read by the next one,
+            # which starts a new process instead
+            self.process.kill()
+            self._stale = True
+            raise
+
+    async def _wait(self, timeout: float) -> bool:
+        """Waits until the worker sends something or exits."""
+        return await asyncio.to_thread(self.conn.poll, timeout)
+
+    def _exit_reason(self) -> str:
+        self.process.join(1)
+        sigxcpu = getattr(signal, "SIGXCPU", None)
+        if sigxcpu and self.process.exitcode == -sigxcpu:
+            return (
+                f"Execution exceeded the CPU time limit of "
+                f"{self.settings.cpu_time_limit} seconds"
+            )
+        return f"Python worker exited with code {self.process.exitcode}"
+
+    async def _fail(self, message: str) -> Dict:
+        await asyncio.to_thread(self.restart)
+        return {"observation": message, "success": False}
+
+    def restart(self) -> None:
+        """Replaces the worker process with a new one."""
+        self.close(graceful=False)
+        self.start()
+
+    def close(self, graceful: bool = True) -> None:
+        """Stops the worker process.
+
+        Args:
+            graceful: Ask the worker to exit before killing it.
+        """
+        if self.process is None:
+            return
+        if graceful and self.alive:
+            try:
+                self.conn.send(None)
+                self.process.join(1)
+            except OSError:
+                pass
+        if self.alive:
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+    async def cleanup(self) -> None:
+        """Stops the worker when its session is closed."""
+        await asyncio.to_thread(self.close)
+
+
+class PythonWorkerPool:
+    """Warm worker processes shared by python_execute calls.
+
+    Up to `pool_size` idle workers are kept. A call finding no idle worker
+    starts an extra one, which is closed afterwards if the pool is full.
+    """
+
+    def __init__(self, settings: PythonExecuteSettings):
+        """Initializes an empty pool; call `start` to pre-start its workers.
+
+        Args:
+            settings: Pool size, worker limits and preloaded modules.
+        """
+        self.settings = settings
+        self._idle: List[PythonWorker] = []
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "started": 0, "recycled": 0}
+
+    def start(self) -> None:
+        """Starts workers until `pool_size` are idle."""
+        with self._lock:
+            missing = self.settings.pool_size - len(self._idle)
+        for _ in range(max(0, missing)):
+            worker = self.new_worker()
+            worker.start()
+            self._release(worker)
+
+    def new_worker(self) -> PythonWorker:
+        """Creates a worker with the pool's settings, started by its first call."""
+        self._stats["started"] += 1
+        return PythonWorker(self.settings)
+
+    async def run(
+        self, code: str, timeout: float, session: Optional[Session] = None
+    ) -> Dict:
+        """Runs code in a warm worker.
+
+        Args:
+            code: Python source to run.
+            timeout: Seconds after which the worker is killed.
+            session: Run in a worker pinned to this session, keeping variables
+                between its calls. Pinned workers stop when the session closes.
+
+        Returns:
+            Dict: 'observation' and 'success', as returned by `run_code`.
+        """
+        self._stats["executions"] += 1
+        if session is not None:
+            worker = session.get_state("python_execute.worker", self.new_worker)
+            async with worker.lock:
+                return await worker.run(code, timeout, keep_state=True)
+
+        worker = self._acquire()
+        try:
+            return await worker.run(code, timeout)
+        finally:
+            if self._worn_out(worker) or not self._keep(worker):
+                await asyncio.to_thread(self._release, worker)
+
+    def _acquire(self) -> PythonWorker:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.new_worker()
+
+    def _worn_out(self, worker: PythonWorker) -> bool:
+        limit = self.settings.max_executions_per_worker
+        return bool(limit) and worker.executions >= limit
+
+    def _keep(self, worker: PythonWorker) -> bool:
+        """Makes a worker idle unless the pool is full."""
+        with self._lock:
+            if len(self._idle) < self.settings.pool_size:
+                self._idle.append(worker)
+                return True
+        return False
+
+    def _release(self, worker: PythonWorker) -> None:
+        """Recycles a worn out worker and closes workers the pool has no room for.
+
+        Blocks while processes stop and start.
+        """
+        if self._worn_out(worker):
+            worker.close()
+            self._stats["recycled"] += 1
+            # Start the replacement now, so the next call finds it warm
+            worker = self.new_worker()
+            worker.start()
+        if not self._keep(worker):
+            worker.close()
+
+    def close(self) -> None:
+        """Stops all idle workers."""
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Gets the number of idle workers and counts of calls and worker starts."""
+        with self._lock:
+            idle = len(self._idle)
+        return {"idle": idle, **self._stats}
+
+
+_worker_pool: Optional[PythonWorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_python_worker_pool(
+    settings: Optional[PythonExecuteSettings] = None,
+) -> PythonWorkerPool:
+    """Gets the process-wide worker pool, starting its workers on first use.
+
+    Args:
+        settings: Pool configuration. Defaults to the `[python_execute]` config section.
+
+    Returns:
+        The shared PythonWorkerPool instance.
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = PythonWorkerPool(settings or config.python_execute)
+            _worker_pool.start()
+            logger.info(
+                f"Started {_worker_pool.settings.pool_size} Python worker processes"
+            )
+        return _worker_pool
@@ -0,0 +1,134 @@
+"""Lazily loaded tools.
+
+Tools whose modules pull in heavy dependencies, such as the browser with
+browser_use and playwright, are registered here by name with a static schema. `lazy_tool` returns a stand-in that offers the
+schema to the LLM and only imports and builds the real tool on its first
+call, so creating an agent does not pay for tools it never uses.
+"""
+
+import importlib
+import threading
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.logger import logger
+from app.tool.base import BaseTool
+from app.tool.browser_use_schema import (
+    BROWSER_DESCRIPTION,
+    BROWSER_PARAMETERS,
+    BROWSER_TOOL_NAME,
+)
+from app.tool.scheduler import ToolConcurrency
+
+
+class ToolSpec(BaseModel):
+    """Registration of a lazily loaded tool."""
+
+    name: str = Field(..., description="Tool name, as offered to the LLM")
+    target: str = Field(
+        ..., description="Import path of the tool class, as 'module:ClassName'"
+    )
+    description: str = Field(..., description="Tool description")
+    parameters: Optional[dict] = Field(default=None, description="JSON schema")
+
+
+class LazyTool(BaseTool):
+    """Stand-in for a registered tool, built on its first call.
+
+    Calls, concurrency metadata and other attribute lookups are forwarded to
+    the real tool, loading it if needed. `cleanup` is only forwarded once the
+    tool is loaded, so cleaning up an unused tool never imports it.
+    """
+
+    target: str
+    init_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    _tool: Optional[BaseTool] = PrivateAttr(default=None)
+    _load_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the real tool has been built."""
+        return self._tool is not None
+
+    def load(self) -> BaseTool:
+        """Import and build the real tool, once."""
+        with self._load_lock:
+            if self._tool is None:
+                module_name, _, class_name = self.target.partition(":")
+                tool_class = getattr(importlib.import_module(module_name), class_name)
+                self._tool = tool_class(**self.init_kwargs)
+                logger.debug(f"Loaded tool {self.name} from {self.target}")
+            return self._tool
+
+    async def __call__(self, **kwargs) -> Any:
+        return await self.load()(**kwargs)
+
+    async def execute(self, **kwargs) -> Any:
+        return await self.load().execute(**kwargs)
+
+    def concurrency(self, **kwargs) -> ToolConcurrency:
+        return self.load().concurrency(**kwargs)
+
+    async def cleanup(self) -> None:
+        if self._tool is not None and hasattr(self._tool, "cleanup"):
+            await self._tool.cleanup()
+
+    def __getattr__(self, item: str) -> Any:
+        try:
+            return super().__getattr__(item)
+        except AttributeError:
+            if item.startswith("_"):
+                raise
+            return getattr(self.load(), item)
+
+
+_registry: Dict[str, ToolSpec] = {}
+_registry_lock = threading.Lock()
+
+
+def register_tool(spec: ToolSpec) -> None:
+    """Register a tool for lazy loading, replacing any spec of the same name."""
+    with _registry_lock:
+        _registry[spec.name] = spec
+
+
+def get_tool_spec(name: str) -> Optional[ToolSpec]:
+    """Get the registration of a tool, None if it is not registered."""
+    return _registry.get(name)
+
+
+def lazy_tool(name: str, **init_kwargs) -> LazyTool:
+    """Create a stand-in for a registered tool.
+
+    Args:
+        name: Name the tool was registered under.
+        **init_kwargs: Arguments for the tool's constructor on first use.
+
+    Returns:
+        LazyTool: Stand-in with the tool's static schema.
+
+    Raises:
+        KeyError: If no tool is registered under the name.
+    """
+    spec = _registry.get(name)
+    if spec is None:
+        raise KeyError(f"Tool {name} is not registered")
+    return LazyTool(
+        name=spec.name,
+        description=spec.description,
+        parameters=spec.parameters,
+        target=spec.target,
+        init_kwargs=init_kwargs,
+    )
+
+
+register_tool(
+    ToolSpec(
+        name=BROWSER_TOOL_NAME,
+        target="app.tool.browser_use_tool:BrowserUseTool",
+        description=BROWSER_DESCRIPTION,
+        parameters=BROWSER_PARAMETERS,
+    )
+)
@@ -13,6 +13,7 @@ from app.daytona.tool_base import (  # Ensure Sandbox is imported correctly
     ThreadMessage,
 )
 from app.tool.base import ToolResult
+from app.tool.scheduler import ToolConcurrency
 from app.utils.logger import logger
 
 
@@ -275,6 +276,10 @@ class SandboxBrowserTool(SandboxToolsBase):
             logger.debug(traceback.format_exc())
             return self.fail_response(f"Error executing browser action: {e}")
 
+    def concurrency(self, **kwargs) -> ToolConcurrency:
+        """Actions share the sandbox browser, so they run in issue order."""
+        return ToolConcurrency(resource="sandbox_browser")
+
     async def execute(
         self,
         action: str,
@@ -5,8 +5,10 @@ from pydantic import Field
 
 from app.daytona.tool_base import Sandbox, SandboxToolsBase
 from app.tool.base import ToolResult
+from app.tool.scheduler import ToolConcurrency
 from app.utils.files_utils import clean_path, should_exclude_file
 from app.utils.logger import logger
+from app.utils.workspace_snapshot import WorkspaceDiff, WorkspaceSnapshot
 
 
 Context = TypeVar("Context")
@@ -72,6 +74,7 @@ class SandboxFilesTool(SandboxToolsBase):
         },
     }
     SNIPPET_LINES: int = Field(default=4, exclude=True)
+    _snapshot: Optional[WorkspaceSnapshot] = None
     # workspace_path: str = Field(default="/workspace", exclude=True)
     # sandbox: Optional[Sandbox] = Field(default=None, exclude=True)
 
@@ -100,40 +103,46 @@ class SandboxFilesTool(SandboxToolsBase):
             return False
 
     async def get_workspace_state(self) -> dict:
-        """Get the current workspace state by reading all files"""
-        files_state = {}
+        """Get the current workspace state by reading all text files"""
         try:
-            # Ensure sandbox is initialized
-            await self._ensure_sandbox()
-
-            files = self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
-                rel_path = file_info.name
-
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
-                    continue
-
-                try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = self.sandbox.fs.download_file(full_path).decode()
-                    files_state[rel_path] = {
-                        "content": content,
-                        "is_dir": file_info.is_dir,
-                        "size": file_info.size,
-                        "modified": file_info.mod_time,
-                    }
-                except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
-                except UnicodeDecodeError:
-                    print(f"Skipping binary file: {rel_path}")
-
-            return files_state
-
+            await self._refresh_snapshot()
+            return self._snapshot.to_dict()
         except Exception as e:
-            print(f"Error getting workspace state: {str(e)}")
+            logger.error(f"Error getting workspace state: {str(e)}")
             return {}
 
+    async def get_workspace_changes(self) -> dict:
+        """Get the text files added, modified and deleted since the last call"""
+        try:
+            diff = await self._refresh_snapshot()
+        except Exception as e:
+            logger.error(f"Error getting workspace changes: {str(e)}")
+            return {"added": {}, "modified": {}, "deleted": []}
+        files = self._snapshot.files
+        return {
+            "added": {path: files[path].to_dict() for path in diff.added},
+            "modified": {path: files[path].to_dict() for path in diff.modified},
+            "deleted": diff.deleted,
+        }
+
+    async def _refresh_snapshot(self) -> WorkspaceDiff:
+        """Update the cached workspace snapshot, downloading only changed files"""
+        # Ensure sandbox is initialized
+        await self._ensure_sandbox()
+        if self._snapshot is None:
+            self._snapshot = WorkspaceSnapshot(self.workspace_path)
+        return await self._snapshot.refresh(self.sandbox.fs)
+
+    def concurrency(self, file_path: Optional[str] = None, **kwargs) -> ToolConcurrency:
+        """Operations on a file run in issue order."""
+        return ToolConcurrency(
+            resource=(
+                f"sandbox_file:{clean_path(file_path, self.workspace_path)}"
+                if file_path
+                else None
+            )
+        )
+
     async def execute(
         self,
         action: str,
@@ -1,10 +1,12 @@
 import asyncio
-import time
-from typing import Any, Dict, Optional, TypeVar
+import re
+import shlex
+from typing import Any, Dict, Optional, Tuple, TypeVar
 from uuid import uuid4
 
 from app.daytona.tool_base import Sandbox, SandboxToolsBase
 from app.tool.base import ToolResult
+from app.tool.scheduler import ToolConcurrency
 from app.utils.logger import logger
 
 
@@ -14,9 +16,43 @@ Execute a shell command in the workspace directory.
 IMPORTANT: Commands are non-blocking by default and run in a tmux session.
 This is ideal for long-running operations like starting servers or build processes.
 Uses sessions to maintain state between commands.
+Use follow_command_output with the returned offset to stream the output of a running command.
 This tool is essential for running CLI tools, installing packages, and managing system operations.
 """
 
+# Pane output and exit code files of the tmux sessions, in the sandbox
+_SESSION_DIR = "/tmp/openmanus_shell"
+# Printed after each command with its exit code. The command line sent to the
+# shell builds it from two halves, so echoed input never matches.
+_DONE_MARKER = "__OPENMANUS_DONE__"
+_DONE_PATTERN = re.compile(r"\n?" + _DONE_MARKER + r":(\d+)\n")
+# Session names end up in shell commands and tmux targets
+_SESSION_NAME = re.compile(r"[A-Za-z0-9_-]+")
+# Terminal escape sequences and carriage returns in raw pane output
+_TERMINAL_CONTROL = re.compile(
+    r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07]*\x07|\x1b[=>()][0-9A-B]?|\r"
+)
+# Delays between polls for command output, in seconds
+_POLL_INITIAL = 0.05
+_POLL_MAX = 1.0
+
+
+def _marker_start(output: str) -> int:
+    """Find where a completion marker may be starting at the end of output.
+
+    Returns:
+        The index of the newline before a last line that could still become
+        the marker, or len(output) if there is none.
+    """
+    line_start = output.rfind("\n") + 1
+    line = output[line_start:]
+    marker, colon, code = line.partition(":")
+    if _DONE_MARKER.startswith(line) or (
+        marker == _DONE_MARKER and colon and (not code or code.isdigit())
+    ):
+        return max(line_start - 1, 0)
+    return len(output)
+
 
 class SandboxShellTool(SandboxToolsBase):
     """Tool for executing tasks in a Daytona sandbox with browser-use capabilities.
@@ -33,6 +69,7 @@ class SandboxShellTool(SandboxToolsBase):
                 "enum": [
                     "execute_command",
                     "check_command_output",
+                    "follow_command_output",
                     "terminate_command",
                     "list_commands",
                 ],
@@ -50,6 +87,7 @@ class SandboxShellTool(SandboxToolsBase):
             },
             "session_name": {
                 "type": "string",
+                "pattern": "^[A-Za-z0-9_-]+$",
                 "description": "Optional name of the tmux session to use. Use named sessions for related commands "
                 "that need to maintain state. Defaults to a random session name.",
             },
@@ -61,10 +99,16 @@ class SandboxShellTool(SandboxToolsBase):
             },
             "timeout": {
                 "type": "integer",
-                "description": "Optional timeout in seconds for blocking commands. Defaults to 60. Ignored for "
-                "non-blocking commands.",
+                "description": "Optional timeout in seconds for blocking commands, or the longest wait for new "
+                "output when following. Defaults to 60. Ignored for non-blocking commands.",
                 "default": 60,
             },
+            "offset": {
+                "type": "integer",
+                "description": "Position in the session output to follow from, as returned by execute_command "
+                "or the previous follow_command_output. Defaults to 0.",
+                "default": 0,
+            },
             "kill_session": {
                 "type": "boolean",
                 "description": "Whether to terminate the tmux session after checking. Set to true when you're done "
@@ -76,6 +120,7 @@ class SandboxShellTool(SandboxToolsBase):
         "dependencies": {
             "execute_command": ["command"],
             "check_command_output": ["session_name"],
+            "follow_command_output": ["session_name"],
             "terminate_command": ["session_name"],
             "list_commands": [],
         },
@@ -95,7 +140,7 @@ class SandboxShellTool(SandboxToolsBase):
             session_id = str(uuid4())
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.create_session(session_id)
+                await asyncio.to_thread(self.sandbox.process.create_session, session_id)
                 self._sessions[session_name] = session_id
             except Exception as e:
                 raise RuntimeError(f"Failed to create session: {str(e)}")
@@ -106,7 +151,9 @@ class SandboxShellTool(SandboxToolsBase):
         if session_name in self._sessions:
             try:
                 await self._ensure_sandbox()  # Ensure sandbox is initialized
-                self.sandbox.process.delete_session(self._sessions[session_name])
+                await asyncio.to_thread(
+                    self.sandbox.process.delete_session, self._sessions[session_name]
+                )
                 del self._sessions[session_name]
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
@@ -123,18 +170,87 @@ class SandboxShellTool(SandboxToolsBase):
             command=command, run_async=False, cwd=self.workspace_path
         )
 
-        response = self.sandbox.process.execute_session_command(
+        # The sandbox client blocks, so keep it off the event loop
+        response = await asyncio.to_thread(
+            self.sandbox.process.execute_session_command,
             session_id=session_id,
             req=req,
             timeout=30,  # Short timeout for utility commands
         )
 
-        logs = self.sandbox.process.get_session_command_logs(
-            session_id=session_id, command_id=response.cmd_id
+        logs = await asyncio.to_thread(
+            self.sandbox.process.get_session_command_logs,
+            session_id=session_id,
+            command_id=response.cmd_id,
         )
 
         return {"output": logs, "exit_code": response.exit_code}
 
+    @staticmethod
+    def _session_files(session_name: str) -> Tuple[str, str]:
+        """Get the pane output log and exit code file of a tmux session."""
+        base = f"{_SESSION_DIR}/{session_name}"
+        return f"{base}.log", f"{base}.exit"
+
+    def _kill_session_command(self, session_name: str) -> str:
+        """Get the command that kills a tmux session and removes its files."""
+        log_file, exit_file = self._session_files(session_name)
+        return f"tmux kill-session -t {session_name}; rm -f {log_file} {exit_file}"
+
+    async def _read_log(self, session_name: str, offset: int) -> Tuple[str, int]:
+        """Read the session output written after a byte offset.
+
+        Returns:
+            The new output, without terminal control sequences, and the
+            offset of its end.
+        """
+        log_file, _ = self._session_files(session_name)
+        result = await self._execute_raw_command(
+            f"size=$(stat -c %s {log_file} 2>/dev/null || echo 0); echo $size; "
+            f"tail -c +{offset + 1} {log_file} 2>/dev/null | head -c $((size - {offset}))"
+        )
+        size, _, output = result.get("output", "").partition("\n")
+        size = int(size.strip() or 0)
+        if size <= offset:
+            return "", max(size, offset)
+        return _TERMINAL_CONTROL.sub("", output), size
+
+    async def _wait_for_output(
+        self, session_name: str, offset: int, timeout: float, until_done: bool
+    ) -> Tuple[str, int, Optional[int]]:
+        """Poll the session output with a growing delay between reads.
+
+        Args:
+            session_name: tmux session running the command.
+            offset: Byte offset of the output to start from.
+            timeout: Longest wait in seconds.
+            until_done: Wait for the command to finish, not just for new output.
+
+        Returns:
+            The output read, the offset after it, and the exit code of the
+            command, or None while it runs.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = _POLL_INITIAL
+        output = ""
+        while True:
+            text, offset = await self._read_log(session_name, offset)
+            output += text
+            match = _DONE_PATTERN.search(output)
+            if match:
+                return output[: match.start()], offset, int(match.group(1))
+            remaining = deadline - loop.time()
+            # A marker split across reads is left for the next read to match.
+            # It is ASCII, but the carriage return before it is stripped from
+            # the output, so resuming from the offset skips only that byte.
+            start = _marker_start(output)
+            if (start and not until_done) or remaining <= 0:
+                held_back = len(output[start:].encode())
+                return output[:start], offset - held_back, None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+
     async def _execute_command(
         self,
         command: str,
@@ -157,79 +273,62 @@ class SandboxShellTool(SandboxToolsBase):
             if not session_name:
                 session_name = f"session_{str(uuid4())[:8]}"
 
-            # Check if tmux session already exists
-            check_session = await self._execute_raw_command(
-                f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'"
+            # Run the command in the shell's own state, then record its exit
+            # code in a file and print the completion marker to the pane
+            log_file, exit_file = self._session_files(session_name)
+            half = len(_DONE_MARKER) // 2
+            wrapped_command = (
+                f"cd {shlex.quote(cwd)} && eval {shlex.quote(command)}; "
+                f"echo $? > {exit_file}; printf '\\n%s%s:%s\\n' "
+                f"{_DONE_MARKER[:half]} {_DONE_MARKER[half:]} $(cat {exit_file})"
             )
-            session_exists = "not_exists" not in check_session.get("output", "")
-
-            if not session_exists:
-                # Create a new tmux session
-                await self._execute_raw_command(
-                    f"tmux new-session -d -s {session_name}"
-                )
-
-            # Ensure we're in the correct directory and send command to tmux
-            full_command = f"cd {cwd} && {command}"
-            wrapped_command = full_command.replace('"', '\\"')  # Escape double quotes
 
-            # Send command to tmux session
-            await self._execute_raw_command(
-                f'tmux send-keys -t {session_name} "{wrapped_command}" Enter'
+            # Create the tmux session if needed, with its output appended to
+            # the log, and send the command, in a single round trip. The shell
+            # skips rc files and neither echoes input nor prints prompts, so
+            # the log only holds what commands print.
+            result = await self._execute_raw_command(
+                f"mkdir -p {_SESSION_DIR}; "
+                f"tmux has-session -t {session_name} 2>/dev/null || "
+                f"{{ : > {log_file}; tmux new-session -d -s {session_name} "
+                f"'stty -echo; PS1= PS2= PROMPT_COMMAND= "
+                f"exec bash --norc --noediting' && "
+                f"tmux pipe-pane -t {session_name} 'cat >> {log_file}'; }}; "
+                f"rm -f {exit_file}; echo offset=$(stat -c %s {log_file}); "
+                f"tmux send-keys -t {session_name} -l {shlex.quote(wrapped_command)} "
+                f"&& tmux send-keys -t {session_name} Enter"
             )
+            match = re.search(r"offset=(\d+)", result.get("output", ""))
+            offset = int(match.group(1)) if match else 0
 
             if blocking:
-                # For blocking execution, wait and capture output
-                start_time = time.time()
-                while (time.time() - start_time) < timeout:
-                    # Wait a bit before checking
-                    time.sleep(2)
-
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(
-                        f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'"
-                    )
-                    if "ended" in check_result.get("output", ""):
-                        break
-
-                    # Get current output and check for common completion indicators
-                    output_result = await self._execute_raw_command(
-                        f"tmux capture-pane -t {session_name} -p -S - -E -"
-                    )
-                    current_output = output_result.get("output", "")
-
-                    # Check for prompt indicators that suggest command completion
-                    last_lines = current_output.split("\n")[-3:]
-                    completion_indicators = [
-                        "$",
-                        "#",
-                        ">",
-                        "Done",
-                        "Completed",
-                        "Finished",
-                        "✓",
-                    ]
-                    if any(
-                        indicator in line
-                        for indicator in completion_indicators
-                        for line in last_lines
-                    ):
-                        break
-
-                # Capture final output
-                output_result = await self._execute_raw_command(
-                    f"tmux capture-pane -t {session_name} -p -S - -E -"
+                output, offset, exit_code = await self._wait_for_output(
+                    session_name, offset, timeout, until_done=True
                 )
-                final_output = output_result.get("output", "")
+                if exit_code is None:
+                    return self.success_response(
+                        {
+                            "output": output,
+                            "session_name": session_name,
+                            "cwd": cwd,
+                            "offset": offset,
+                            "message": f"Command still running after {timeout}s. Use follow_command_output "
+                            f"with offset {offset} to continue reading its output.",
+                            "completed": False,
+                        }
+                    )
 
                 # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._execute_raw_command(
+                    self._kill_session_command(session_name)
+                )
 
                 return self.success_response(
                     {
-                        "output": final_output,
+                        "output": output,
                         "session_name": session_name,
                         "cwd": cwd,
+                        "exit_code": exit_code,
                         "completed": True,
                     }
                 )
@@ -239,7 +338,9 @@ class SandboxShellTool(SandboxToolsBase):
                     {
                         "session_name": session_name,
                         "cwd": cwd,
-                        "message": f"Command sent to tmux session '{session_name}'. Use check_command_output to view results.",
+                        "offset": offset,
+                        "message": f"Command sent to tmux session '{session_name}'. Use follow_command_output "
+                        f"with offset {offset} to stream its output, or check_command_output to view the pane.",
                         "completed": False,
                     }
                 )
@@ -249,12 +350,44 @@ class SandboxShellTool(SandboxToolsBase):
             if session_name:
                 try:
                     await self._execute_raw_command(
-                        f"tmux kill-session -t {session_name}"
+                        self._kill_session_command(session_name)
                     )
                 except:
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
+    async def _follow_command_output(
+        self, session_name: str, offset: int = 0, timeout: int = 60
+    ) -> ToolResult:
+        try:
+            # Ensure sandbox is initialized
+            await self._ensure_sandbox()
+
+            # Check if session exists
+            check_result = await self._execute_raw_command(
+                f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'"
+            )
+            if "not_exists" in check_result.get("output", ""):
+                return self.fail_response(
+                    f"Tmux session '{session_name}' does not exist."
+                )
+
+            output, offset, exit_code = await self._wait_for_output(
+                session_name, offset, timeout, until_done=False
+            )
+            return self.success_response(
+                {
+                    "output": output,
+                    "session_name": session_name,
+                    "offset": offset,
+                    "exit_code": exit_code,
+                    "completed": exit_code is not None,
+                }
+            )
+
+        except Exception as e:
+            return self.fail_response(f"Error following command output: {str(e)}")
+
     async def _check_command_output(
         self, session_name: str, kill_session: bool = False
     ) -> ToolResult:
@@ -279,7 +412,9 @@ class SandboxShellTool(SandboxToolsBase):
 
             # Kill session if requested
             if kill_session:
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._execute_raw_command(
+                    self._kill_session_command(session_name)
+                )
                 termination_status = "Session terminated."
             else:
                 termination_status = "Session still running."
@@ -310,7 +445,7 @@ class SandboxShellTool(SandboxToolsBase):
                 )
 
             # Kill the session
-            await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+            await self._execute_raw_command(self._kill_session_command(session_name))
 
             return self.success_response(
                 {"message": f"Tmux session '{session_name}' terminated successfully."}
@@ -354,6 +489,14 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error listing commands: {str(e)}")
 
+    def concurrency(
+        self, session_name: Optional[str] = None, **kwargs
+    ) -> ToolConcurrency:
+        """Commands in a named session run in issue order; unnamed ones get their own."""
+        return ToolConcurrency(
+            resource=f"sandbox_shell:{session_name}" if session_name else None
+        )
+
     async def execute(
         self,
         action: str,
@@ -363,6 +506,7 @@ class SandboxShellTool(SandboxToolsBase):
         blocking: bool = False,
         timeout: int = 60,
         kill_session: bool = False,
+        offset: int = 0,
     ) -> ToolResult:
         """
         Execute a browser action in the sandbox environment.
@@ -373,10 +517,15 @@ class SandboxShellTool(SandboxToolsBase):
             folder:
             command:
             kill_session:
+            offset:
             action: The browser action to perform
         Returns:
             ToolResult with the action's output or error
         """
+        if session_name is not None and not _SESSION_NAME.fullmatch(session_name):
+            return self.fail_response(
+                "session_name may only contain letters, digits, '_' and '-'"
+            )
         async with asyncio.Lock():
             try:
                 # Navigation actions
@@ -392,6 +541,14 @@ class SandboxShellTool(SandboxToolsBase):
                             "session_name is required for navigation"
                         )
                     return await self._check_command_output(session_name, kill_session)
+                elif action == "follow_command_output":
+                    if session_name is None:
+                        return self.fail_response(
+                            "session_name is required for follow_command_output"
+                        )
+                    return await self._follow_command_output(
+                        session_name, offset, timeout
+                    )
                 elif action == "terminate_command":
                     if session_name is None:
                         return self.fail_response(
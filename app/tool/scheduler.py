@@ -0,0 +1,109 @@
+"""Dependency-aware scheduling of tool calls.
+
+Each tool call declares a `ToolConcurrency`: the resource it touches, whether
+it writes it, and how many calls of the tool may run at once. Timeouts are
+applied by `ToolCollection.execute` from the `[tool_policy]` config.
+Calls on different resources run in parallel. Calls on the same resource run
+in issue order unless both only read it.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ToolConcurrency(BaseModel):
+    """Concurrency metadata of a single tool call."""
+
+    resource: Optional[str] = Field(
+        default=None,
+        description="Key of the shared resource the call uses, e.g. a file path",
+    )
+    write: bool = Field(default=True, description="Whether the call modifies it")
+    max_parallel: Optional[int] = Field(
+        default=None, description="Maximum concurrent calls of the tool"
+    )
+
+
+class ToolScheduler:
+    """Runs tool calls in parallel while ordering calls that conflict.
+
+    Calls are submitted in issue order. A write waits for all earlier calls
+    on its resource, a read waits only for earlier writes.
+    """
+
+    def __init__(self):
+        self._writers: Dict[str, asyncio.Task] = {}
+        self._readers: Dict[str, List[asyncio.Task]] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+
+    def submit(
+        self,
+        name: str,
+        concurrency: ToolConcurrency,
+        run: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Task:
+        """Schedule a tool call.
+
+        Args:
+            name: Tool name, used for the per-tool parallelism limit.
+            concurrency: The call's concurrency metadata.
+            run: Coroutine function executing the call.
+
+        Returns:
+            asyncio.Task: Task resolving to the call's result.
+        """
+        depends_on = self._depends_on(concurrency)
+        task = asyncio.create_task(self._run(name, concurrency, run, depends_on))
+        if concurrency.resource is not None:
+            self._register(concurrency, task)
+        return task
+
+    def _depends_on(self, concurrency: ToolConcurrency) -> List[asyncio.Task]:
+        resource = concurrency.resource
+        if resource is None:
+            return []
+        writer = self._writers.get(resource)
+        depends_on = [writer] if writer and not writer.done() else []
+        if concurrency.write:
+            depends_on += [
+                task for task in self._readers.get(resource, []) if not task.done()
+            ]
+        return depends_on
+
+    def _register(self, concurrency: ToolConcurrency, task: asyncio.Task) -> None:
+        resource = concurrency.resource
+        if concurrency.write:
+            self._writers[resource] = task
+            self._readers.pop(resource, None)
+        else:
+            readers = self._readers.setdefault(resource, [])
+            readers[:] = [reader for reader in readers if not reader.done()]
+            readers.append(task)
+
+    def _limit(
+        self, name: str, max_parallel: Optional[int]
+    ) -> Optional[asyncio.Semaphore]:
+        if not max_parallel:
+            return None
+        if name not in self._limits:
+            self._limits[name] = asyncio.Semaphore(max_parallel)
+        return self._limits[name]
+
+    async def _run(
+        self,
+        name: str,
+        concurrency: ToolConcurrency,
+        run: Callable[[], Awaitable[Any]],
+        depends_on: List[asyncio.Task],
+    ) -> Any:
+        if depends_on:
+            # Earlier calls only need to finish; their failures are their own
+            await asyncio.wait(depends_on)
+
+        limit = self._limit(name, concurrency.max_parallel)
+        if limit is None:
+            return await run()
+        async with limit:
+            return await run()
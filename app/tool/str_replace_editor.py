@@ -8,12 +8,14 @@ from app.config import config
 from app.exceptions import ToolError
 from app.tool import BaseTool
 from app.tool.base import CLIResult, ToolResult
+from app.tool.cache import file_fingerprint
 from app.tool.file_operators import (
     FileOperator,
     LocalFileOperator,
     PathLike,
     SandboxFileOperator,
 )
+from app.tool.scheduler import ToolConcurrency
 
 
 Command = Literal[
@@ -98,6 +100,8 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
+    # Views of unchanged files are served from the tool cache
+    cache_ttl: Optional[int] = 86400
     _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
@@ -111,6 +115,25 @@ class StrReplaceEditor(BaseTool):
             else self._local_operator
         )
 
+    def concurrency(
+        self, command: Optional[str] = None, path: Optional[str] = None, **kwargs
+    ) -> ToolConcurrency:
+        """Edits of a file run in issue order, views of it may run together."""
+        return ToolConcurrency(
+            resource=f"file:{path}" if path else None, write=command != "view"
+        )
+
+    def cache_key(
+        self, command: Optional[str] = None, path: Optional[str] = None, **kwargs
+    ) -> Optional[dict]:
+        """Views of local files are keyed on the file's version."""
+        if command != "view" or not path or config.sandbox.use_sandbox:
+            return None
+        version = file_fingerprint(path)
+        if version is None:
+            return None
+        return {"command": command, "path": path, "version": version, **kwargs}
+
     async def execute(
         self,
         *,
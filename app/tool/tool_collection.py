@@ -1,9 +1,11 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
 
 from app.exceptions import ToolError
 from app.logger import logger
-from app.tool.base import BaseTool, ToolFailure, ToolResult
+from app.tool.base import BaseTool, ToolFailure, ToolResult, ToolTimeout
+from app.tool.policy import ToolBudget, get_tool_timeout
 
 
 class ToolCollection:
@@ -23,14 +25,43 @@ class ToolCollection:
         return [tool.to_param() for tool in self.tools]
 
     async def execute(
-        self, *, name: str, tool_input: Dict[str, Any] = None
+        self,
+        *,
+        name: str,
+        tool_input: Dict[str, Any] = None,
+        budget: Optional[ToolBudget] = None,
     ) -> ToolResult:
+        """Execute a tool within its configured timeout and the run's budget.
+
+        A call past its timeout is cancelled, which raises CancelledError
+        inside the tool so it can clean up, and reported as a ToolTimeout.
+        Timeouts raised by the tool itself propagate as its own errors.
+        """
         tool = self.tool_map.get(name)
         if not tool:
             return ToolFailure(error=f"Tool {name} is invalid")
+        if budget:
+            refused = budget.admit(name)
+            if refused:
+                return ToolFailure(error=f"Tool {name} was not run: {refused}")
+            timeout = budget.timeout(name)
+        else:
+            timeout = get_tool_timeout(name)
+        deadline = asyncio.timeout(timeout)
         try:
-            result = await tool(**tool_input)
-            return result
+            async with deadline:
+                return await tool(**(tool_input or {}))
+        except TimeoutError:
+            if not deadline.expired():
+                raise
+            if budget:
+                budget.timeouts += 1
+            logger.warning(f"Tool {name} timed out after {timeout:g}s, cancelled")
+            return ToolTimeout(
+                error=f"Tool {name} timed out after {timeout:g}s and was cancelled. "
+                "Its work may be incomplete; retry with a smaller request or try "
+                "another approach."
+            )
         except ToolError as e:
             return ToolFailure(error=e.message)
 
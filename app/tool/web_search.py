@@ -207,6 +207,7 @@ class WebSearch(BaseTool):
         "ali_unified_search": AliUnifiedSearchEngine(),
     }
     content_fetcher: WebContentFetcher = WebContentFetcher()
+    cache_ttl: Optional[int] = 3600
 
     async def execute(
         self,
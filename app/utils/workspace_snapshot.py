@@ -0,0 +1,256 @@
+"""Incremental snapshots of a sandbox workspace.
+
+A `WorkspaceSnapshot` lists the workspace tree first and only downloads the
+text files it needs: binary files are recognised by extension before any
+download, files too large to be useful are skipped by size, and files whose
+size and modification time are unchanged since the previous refresh are
+served from the cache. Downloads run concurrently up to a limit. Each
+refresh returns what was added, modified and deleted since the previous one.
+
+The snapshot works on any object with the `list_files` and `download_file`
+methods of a Daytona sandbox's `fs`.
+"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.utils.files_utils import should_exclude_file
+from app.utils.logger import logger
+
+
+# Extensions of files that are never decoded as text
+BINARY_EXT = {
+    ".7z",
+    ".avi",
+    ".bin",
+    ".class",
+    ".dll",
+    ".doc",
+    ".docx",
+    ".eot",
+    ".exe",
+    ".gz",
+    ".jar",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".o",
+    ".otf",
+    ".parquet",
+    ".pdf",
+    ".pkl",
+    ".ppt",
+    ".pptx",
+    ".pyc",
+    ".so",
+    ".sqlite",
+    ".tar",
+    ".ttf",
+    ".wav",
+    ".woff",
+    ".woff2",
+    ".xls",
+    ".xlsx",
+    ".zip",
+}
+
+# Bytes inspected for binary content
+SNIFF_SIZE = 8192
+
+
+@dataclass
+class FileState:
+    """A text file of the workspace.
+
+    Attributes:
+        content: Decoded content.
+        size: Size in bytes.
+        modified: Modification time reported by the sandbox.
+        digest: SHA-256 of the content.
+    """
+
+    content: str
+    size: int
+    modified: Any
+    digest: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "content": self.content,
+            "is_dir": False,
+            "size": self.size,
+            "modified": self.modified,
+        }
+
+
+@dataclass
+class WorkspaceDiff:
+    """Changes of a workspace between two refreshes, as relative paths."""
+
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.deleted)
+
+
+def is_binary(data: bytes) -> bool:
+    """Checks the start of file content for NUL bytes, as binary formats have."""
+    return b"\0" in data[:SNIFF_SIZE]
+
+
+class WorkspaceSnapshot:
+    """Cached view of the text files of a sandbox workspace."""
+
+    def __init__(
+        self,
+        root: str = "/workspace",
+        max_concurrency: int = 8,
+        max_file_size: int = 1024 * 1024,
+        exclude: Callable[[str], bool] = should_exclude_file,
+    ):
+        """Initializes an empty snapshot, filled by `refresh`.
+
+        Args:
+            root: Workspace directory in the sandbox.
+            max_concurrency: Maximum concurrent listings and downloads.
+            max_file_size: Files larger than this many bytes are skipped.
+            exclude: Whether a relative path is left out of the snapshot.
+        """
+        self.root = root.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_file_size = max_file_size
+        self.exclude = exclude
+
+        self.files: Dict[str, FileState] = {}
+        # Size and modification time of skipped files, to not download them again
+        self._skipped: Dict[str, Tuple[int, Any]] = {}
+        self._stats = {"refreshes": 0, "downloaded": 0, "cached": 0, "skipped": 0}
+
+    async def refresh(self, fs: Any) -> WorkspaceDiff:
+        """Brings the snapshot up to date with the workspace.
+
+        Args:
+            fs: File system of the sandbox.
+
+        Returns:
+            WorkspaceDiff: Files added, modified and deleted since the last refresh.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        listing = await self._list(fs, semaphore)
+        self._stats["refreshes"] += 1
+
+        diff = WorkspaceDiff()
+        downloads = []
+        for rel_path, info in listing.items():
+            fingerprint = (info.size, info.mod_time)
+            cached = self.files.get(rel_path)
+            if cached and (cached.size, cached.modified) == fingerprint:
+                self._stats["cached"] += 1
+            elif self._skipped.get(rel_path) == fingerprint:
+                pass
+            elif self._skip(rel_path, info.size):
+                self._skip_file(rel_path, fingerprint, diff)
+            else:
+                downloads.append(self._download(fs, semaphore, rel_path, info, diff))
+        await asyncio.gather(*downloads)
+
+        for rel_path in list(self.files):
+            if rel_path not in listing:
+                del self.files[rel_path]
+                diff.deleted.append(rel_path)
+        for rel_path in list(self._skipped):
+            if rel_path not in listing:
+                del self._skipped[rel_path]
+
+        for paths in (diff.added, diff.modified, diff.deleted):
+            paths.sort()
+        return diff
+
+    def _skip(self, rel_path: str, size: int) -> bool:
+        _, ext = os.path.splitext(rel_path)
+        return ext.lower() in BINARY_EXT or size > self.max_file_size
+
+    def _skip_file(
+        self, rel_path: str, fingerprint: Tuple[int, Any], diff: WorkspaceDiff
+    ) -> None:
+        self._stats["skipped"] += 1
+        self._skipped[rel_path] = fingerprint
+        # A text file that became binary or too large leaves the snapshot
+        if self.files.pop(rel_path, None):
+            diff.deleted.append(rel_path)
+
+    async def _list(self, fs: Any, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Lists the files of the workspace tree, a directory level at a time."""
+
+        async def list_dir(rel_dir: str) -> List[Tuple[str, Any]]:
+            path = f"{self.root}/{rel_dir}".rstrip("/")
+            async with semaphore:
+                infos = await asyncio.to_thread(fs.list_files, path)
+            return [
+                (f"{rel_dir}/{info.name}" if rel_dir else info.name, info)
+                for info in infos
+            ]
+
+        files = {}
+        level = [""]
+        while level:
+            next_level = []
+            for entries in await asyncio.gather(*(list_dir(d) for d in level)):
+                for rel_path, info in entries:
+                    if info.is_dir:
+                        # Excluded directories are matched against a file's parents
+                        if not self.exclude(f"{rel_path}/_"):
+                            next_level.append(rel_path)
+                    elif not self.exclude(rel_path):
+                        files[rel_path] = info
+            level = next_level
+        return files
+
+    async def _download(
+        self,
+        fs: Any,
+        semaphore: asyncio.Semaphore,
+        rel_path: str,
+        info: Any,
+        diff: WorkspaceDiff,
+    ) -> None:
+        fingerprint = (info.size, info.mod_time)
+        try:
+            async with semaphore:
+                data = await asyncio.to_thread(
+                    fs.download_file, f"{self.root}/{rel_path}"
+                )
+        except Exception as e:
+            logger.warning(f"Error reading file {rel_path}: {e}")
+            return
+        self._stats["downloaded"] += 1
+
+        try:
+            if is_binary(data):
+                raise ValueError("binary content")
+            content = data.decode()
+        except ValueError:  # UnicodeDecodeError included
+            self._skip_file(rel_path, fingerprint, diff)
+            return
+
+        digest = hashlib.sha256(data).hexdigest()
+        previous = self.files.get(rel_path)
+        self.files[rel_path] = FileState(content, info.size, info.mod_time, digest)
+        self._skipped.pop(rel_path, None)
+        if previous is None:
+            diff.added.append(rel_path)
+        elif previous.digest != digest:
+            diff.modified.append(rel_path)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Gets the text files by relative path."""
+        return {path: state.to_dict() for path, state in sorted(self.files.items())}
+
+    def get_stats(self) -> Dict[str, int]:
+        """Gets refresh, download, cache hit and skipped file counts."""
+        return {**self._stats, "files": len(self.files)}
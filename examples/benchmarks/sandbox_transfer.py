@@ -0,0 +1,102 @@
+"""File transfer benchmark of DockerSandbox.
+
+Moves a generated CSV file into a sandbox and back out, and reports the
+throughput and the peak host memory allocated by Python during each
+transfer. Needs a running Docker daemon. Run from the repository root:
+
+    python -m examples.benchmarks.sandbox_transfer --size 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict
+
+from app.config import SandboxSettings
+from app.sandbox.core.sandbox import DockerSandbox
+from app.sandbox.core.transfer import file_chunks
+
+
+MB = 1024 * 1024
+
+
+def make_csv(path: str, size_mb: int) -> int:
+    """Writes a CSV file of about `size_mb` megabytes, returning its size."""
+    row = b"".join(b"%d,%d,%.4f\n" % (i, i * 7, i / 3) for i in range(1000))
+    with open(path, "wb") as f:
+        while f.tell() < size_mb * MB:
+            f.write(row)
+    return os.path.getsize(path)
+
+
+async def measure(size: int, transfer: Callable[[], Awaitable]) -> Dict[str, float]:
+    """Runs one transfer of `size` bytes.
+
+    Returns:
+        Dict: Throughput in MB/s and peak traced memory in MB.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    await transfer()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mb_per_s": size / MB / elapsed, "peak_mb": peak / MB}
+
+
+async def run(size_mb: int) -> Dict[str, Dict[str, float]]:
+    sandbox = await DockerSandbox(SandboxSettings(memory_limit="2g")).create()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "data.csv")
+        size = make_csv(source, size_mb)
+
+        async def upload():
+            async def chunks():
+                for chunk in file_chunks(source):
+                    yield chunk
+
+            await sandbox.write_stream("stream.csv", chunks(), size)
+
+        async def download():
+            with open(os.path.join(tmp, "stream.csv"), "wb") as f:
+                async for chunk in sandbox.read_stream("stream.csv"):
+                    f.write(chunk)
+
+        transfers = {
+            "write_stream": upload,
+            "copy_to": lambda: sandbox.copy_to(source, "/workspace/copy.csv"),
+            "read_stream": download,
+            "copy_from": lambda: sandbox.copy_from(
+                "/workspace/copy.csv", os.path.join(tmp, "copy.csv")
+            ),
+        }
+        try:
+            return {name: await measure(size, t) for name, t in transfers.items()}
+        finally:
+            await sandbox.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100, help="File size in MB")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.size))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['mb_per_s']:8.1f} MB/s, "
+            f"peak memory {result['peak_mb']:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold-start benchmark of the OpenManus entry points.
+
+Each sample runs in a fresh interpreter: it imports an entry script's module
+and builds what the script builds before its first prompt, without reading
+input or calling the LLM. Run from the repository root:
+
+    python -m examples.benchmarks.startup_time --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Code run in the child interpreter for each entry point
+ENTRY_POINTS: Dict[str, str] = {
+    "main.py": "import main\nfrom app.agent.manus import Manus\nManus()",
+    "run_flow.py": "import run_flow\nfrom app.agent.manus import Manus\nManus()",
+    "run_mcp_server.py": "import run_mcp_server\nrun_mcp_server.MCPServer()",
+}
+
+_CHILD = """\
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str) -> Dict[str, float]:
+    """Runs one cold start in a fresh interpreter.
+
+    Args:
+        code: Startup code of the entry point.
+
+    Returns:
+        Dict: Total wall time of the process and time spent in the startup
+            code, in seconds.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(code=code)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    total = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    startup = float(completed.stdout.strip().splitlines()[-1])
+    return {"process": total, "startup": startup}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Gets the minimum, median and maximum of samples."""
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per entry")
+    parser.add_argument(
+        "--entry",
+        action="append",
+        choices=sorted(ENTRY_POINTS),
+        help="Entry point to measure; all by default",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for entry in args.entry or list(ENTRY_POINTS):
+        try:
+            samples = [measure(ENTRY_POINTS[entry]) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            results[entry] = {"error": str(e)}
+            continue
+        results[entry] = {
+            "process": summarize([s["process"] for s in samples]),
+            "startup": summarize([s["startup"] for s in samples]),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for entry, result in results.items():
+        if "error" in result:
+            print(f"{entry:<20} failed: {result['error']}")
+            continue
+        process, startup = result["process"], result["startup"]
+        print(
+            f"{entry:<20} startup median {startup['median']:.3f}s "
+            f"(min {startup['min']:.3f}s), process median {process['median']:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@ import asyncio
 
 from app.agent.manus import Manus
 from app.logger import logger
+from app.sandbox.core.pool import close_sandbox_pool, warm_sandbox_pool
 from app.security.anti_contamination import AntiContamination
+from app.session import current_session
 
 
 async def main():
@@ -15,6 +17,7 @@ async def main():
     args = parser.parse_args()
 
     # Create and initialize Manus agent
+    warm_sandbox_pool()
     agent = await Manus.create()
     try:
         while True:
@@ -49,6 +52,8 @@ async def main():
     finally:
         # Ensure agent resources are cleaned up before exiting
         await agent.cleanup()
+        await current_session().close()
+        await close_sandbox_pool()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,12 @@
-from typing import Any, AsyncIterable, ClassVar, Dict, List, Literal
+import asyncio
+from contextlib import suppress
+from typing import AsyncIterable, ClassVar, List, Literal
 
 from pydantic import BaseModel
 
 from app.agent.manus import Manus
+from app.event_bus import AgentEvent, EventBus
+from app.schema import AgentState
 
 
 class ResponseFormat(BaseModel):
@@ -13,14 +17,37 @@ class ResponseFormat(BaseModel):
 
 
 class A2AManus(Manus):
+    # Set for pooled agents: MCP sessions stay open between requests and are
+    # released by close()
+    keep_warm: bool = False
+
     async def invoke(self, query, sessionId) -> str:
         config = {"configurable": {"thread_id": sessionId}}
         response = await self.run(query)
         return self.get_agent_response(config, response)
 
-    async def stream(self, query: str) -> AsyncIterable[Dict[str, Any]]:
-        """Streaming is not supported by Manus."""
-        raise NotImplementedError("Streaming is not supported by Manus yet.")
+    async def stream(self, query: str) -> AsyncIterable[AgentEvent]:
+        """Run the agent on a query, yielding its progress events as they happen.
+
+        The stream ends with a run_finished or run_failed event; a failed run
+        re-raises its error after it. Closing the stream early cancels the run.
+        """
+        bus = self.event_bus = EventBus()
+        events = bus.subscribe()
+        run = asyncio.create_task(self.run(query))
+        # Also ends the stream if the run fails before publishing anything
+        run.add_done_callback(lambda _: bus.close())
+        try:
+            async for event in events:
+                yield event
+            await run
+        finally:
+            events.close()
+            if not run.done():
+                run.cancel()
+                with suppress(asyncio.CancelledError):
+                    await run
+            self.event_bus = None
 
     def get_agent_response(self, config, agent_response):
         return {
@@ -29,4 +56,39 @@ class A2AManus(Manus):
             "content": agent_response,
         }
 
+    async def reset(self) -> None:
+        """Forget the previous request so the agent can serve the next one.
+
+        The next request may come from another client, so the browser is
+        closed along with its tabs, cookies and logins. Only the MCP sessions
+        stay open.
+        """
+        if self.browser_context_helper:
+            await self.browser_context_helper.cleanup_browser()
+            self.browser_context_helper._current_base64_image = None
+        self.memory.clear()
+        self.tool_calls = []
+        self.current_step = 0
+        self.state = AgentState.IDLE
+        self._step_messages = []
+        self._tool_choice_override = None
+        if self.loop_detector:
+            self.loop_detector.reset()
+
+    def is_healthy(self) -> bool:
+        """Whether the agent is idle and still connected to its MCP servers."""
+        return self.state == AgentState.IDLE and all(
+            server_id in self.mcp_clients.sessions
+            for server_id in self.connected_servers
+        )
+
+    async def cleanup(self):
+        """Release resources after a run, unless the agent is kept warm."""
+        if not self.keep_warm:
+            await super().cleanup()
+
+    async def close(self) -> None:
+        """Release the agent's MCP sessions and browser."""
+        await super().cleanup()
+
     SUPPORTED_CONTENT_TYPES: ClassVar[List[str]] = ["text", "text/plain"]
@@ -1,5 +1,6 @@
 import logging
-from typing import Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
@@ -7,13 +8,22 @@ from a2a.types import (
     InvalidParamsError,
     Part,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskNotCancelableError,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
     TextPart,
-    UnsupportedOperationError,
 )
-from a2a.utils import completed_task, new_artifact
+from a2a.utils import completed_task, new_agent_text_message, new_artifact, new_task
 from a2a.utils.errors import ServerError
 
+from app.event_bus import AgentEvent
+from app.exceptions import AgentCancelled
+from app.session import Session, session_scope
+
 from .agent import A2AManus
+from .agent_pool import AgentPool
 
 
 logging.basicConfig(level=logging.INFO)
@@ -23,8 +33,24 @@ logger = logging.getLogger(__name__)
 class ManusExecutor(AgentExecutor):
     """Currency Conversion AgentExecutor Example."""
 
-    def __init__(self, agent_factory: Callable[[], Awaitable[A2AManus]]):
+    def __init__(
+        self,
+        agent_factory: Optional[Callable[[], Awaitable[A2AManus]]] = None,
+        agent_pool: Optional[AgentPool] = None,
+        streaming: bool = False,
+    ):
+        """Serve requests from a pool of warm agents, or a new agent per request.
+
+        With streaming, progress is sent as task status and artifact updates
+        while the agent runs, instead of one completed task at the end.
+        """
+        if agent_pool is None and agent_factory is None:
+            raise ValueError("Either agent_factory or agent_pool is required")
         self.agent_factory = agent_factory
+        self.agent_pool = agent_pool
+        self.streaming = streaming
+        # Agents running a task, by task ID, so the task can be cancelled
+        self._running: Dict[str, A2AManus] = {}
 
     async def execute(
         self,
@@ -36,10 +62,16 @@ class ManusExecutor(AgentExecutor):
             raise ServerError(error=InvalidParamsError())
 
         query = context.get_user_input()
+        if self.streaming:
+            await self._execute_streaming(query, context, event_queue)
+            return
         try:
-            self.agent = await self.agent_factory()
-            result = await self.agent.invoke(query, context.context_id)
+            async with self._agent(context.task_id) as agent:
+                result = await agent.invoke(query, context.context_id)
             print(f"Final Result ===> {result}")
+        except AgentCancelled:
+            # cancel() has reported the task as canceled
+            return
         except Exception as e:
             print("Error invoking agent: %s", e)
             raise ServerError(error=ValueError(f"Error invoking agent: {e}")) from e
@@ -63,10 +95,129 @@ class ManusExecutor(AgentExecutor):
             )
         )
 
+    @asynccontextmanager
+    async def _agent(self, task_id: str) -> AsyncIterator[A2AManus]:
+        """Get an agent for a task, running in a session of its own.
+
+        The session keeps the task's sandbox and token usage apart from
+        concurrent tasks and is closed when the task ends.
+        """
+        async with session_scope(Session(task_id)):
+            if self.agent_pool:
+                async with self.agent_pool.acquire() as agent:
+                    self._running[task_id] = agent
+                    try:
+                        yield agent
+                    finally:
+                        self._running.pop(task_id, None)
+            else:
+                agent = await self.agent_factory()
+                self._running[task_id] = agent
+                try:
+                    yield agent
+                finally:
+                    self._running.pop(task_id, None)
+
+    async def _execute_streaming(
+        self, query: str, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            event_queue.enqueue_event(task)
+        try:
+            async with self._agent(task.id) as agent:
+                async for event in agent.stream(query):
+                    self._enqueue_progress(event, task, event_queue)
+        except AgentCancelled:
+            # cancel() has reported the task as canceled
+            return
+        except Exception as e:
+            logger.error(f"Error invoking agent: {e}")
+            self._enqueue_status(
+                task, event_queue, TaskState.failed, f"Error invoking agent: {e}", True
+            )
+
+    def _enqueue_progress(
+        self, event: AgentEvent, task: Task, event_queue: EventQueue
+    ) -> None:
+        """Translate an agent event into A2A task updates."""
+        if event.type == "run_finished":
+            self._enqueue_artifact(
+                task, event_queue, event.data["result"], f"task_{task.id}"
+            )
+            self._enqueue_status(task, event_queue, TaskState.completed, None, True)
+        elif event.type == "tool_finished":
+            self._enqueue_artifact(
+                task, event_queue, event.data["output"], f"tool_{event.data['call_id']}"
+            )
+        else:
+            text = self._describe(event)
+            if text:
+                self._enqueue_status(task, event_queue, TaskState.working, text)
+
+    @staticmethod
+    def _describe(event: AgentEvent) -> Optional[str]:
+        """Status text of a progress event, None for events not shown."""
+        if event.type == "run_started":
+            return "Working on the request"
+        if event.type == "step_started":
+            return f"Step {event.step}/{event.data['max_steps']}"
+        if event.type == "thought":
+            tools = event.data["tool_calls"]
+            text = event.data["content"]
+            if tools:
+                text = f"{text}\nUsing tools: {', '.join(tools)}".strip()
+            return text or None
+        if event.type == "tool_started":
+            return f"Running tool {event.data['tool']}"
+        return None
+
+    @staticmethod
+    def _enqueue_status(
+        task: Task,
+        event_queue: EventQueue,
+        state: TaskState,
+        text: Optional[str],
+        final: bool = False,
+    ) -> None:
+        message = (
+            new_agent_text_message(text, task.contextId, task.id) if text else None
+        )
+        event_queue.enqueue_event(
+            TaskStatusUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                status=TaskStatus(state=state, message=message),
+                final=final,
+            )
+        )
+
+    @staticmethod
+    def _enqueue_artifact(
+        task: Task, event_queue: EventQueue, text: str, name: str
+    ) -> None:
+        parts = [Part(root=TextPart(text=text or "failed to generate response"))]
+        event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                artifact=new_artifact(parts, name),
+                lastChunk=True,
+            )
+        )
+
     def _validate_request(self, context: RequestContext) -> bool:
         return False
 
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
-        raise ServerError(error=UnsupportedOperationError())
+        """Stop the agent running the task, which then releases its resources."""
+        agent = self._running.get(request.task_id)
+        task = request.current_task
+        if agent is None or task is None or not agent.cancel("Cancelled by the client"):
+            raise ServerError(error=TaskNotCancelableError())
+        self._enqueue_status(
+            task, event_queue, TaskState.canceled, "Task cancelled", True
+        )
@@ -0,0 +1,227 @@
+"""Pool of warm agents for the A2A server.
+
+Creating a Manus agent connects its MCP servers and, on first browser use,
+launches a browser. The pool keeps agents alive between requests instead:
+each request checks out an idle agent, and the agent is reset and returned
+afterwards. Agents are replaced when a request fails, when they fail their
+health check, or after `max_requests_per_agent` requests. Agents above
+`min_size` are closed after `idle_timeout` seconds without work.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.config import AgentPoolSettings, config
+
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledAgent:
+    """An agent with its pool bookkeeping."""
+
+    def __init__(self, agent: Any):
+        self.agent = agent
+        self.requests = 0
+        self.idle_since = time.monotonic()
+
+
+class AgentPool:
+    """Bounded pool of reusable agents.
+
+    Agents must provide async `reset()` and `close()` and `is_healthy()`, as
+    A2AManus does.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        settings: Optional[AgentPoolSettings] = None,
+    ):
+        """Initializes an empty pool; agents are created by `start` or on demand.
+
+        Args:
+            factory: Creates and initializes a new agent.
+            settings: Pool configuration. Defaults to the `[agent_pool]` section.
+        """
+        self.factory = factory
+        self.settings = settings or config.agent_pool or AgentPoolSettings()
+        self._idle: List[_PooledAgent] = []
+        self._size = 0
+        self._condition = asyncio.Condition()
+        self._evictor: Optional[asyncio.Task] = None
+        self._started = False
+        self._closed = False
+        self._stats = {"created": 0, "retired": 0, "requests": 0, "failed": 0}
+
+    async def start(self) -> None:
+        """Creates the first `min_size` agents and starts idle eviction."""
+        if self._started:
+            return
+        self._started = True
+        await self._fill()
+        self._evictor = asyncio.create_task(self._evict_periodically())
+
+    async def close(self) -> None:
+        """Closes idle agents; agents in use are closed when returned."""
+        self._closed = True
+        if self._evictor:
+            self._evictor.cancel()
+        async with self._condition:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._retire(pooled)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Checks out an agent for one request.
+
+        Yields:
+            An idle agent, or a new one while the pool is below `max_size`.
+            Waits for an agent to be returned when the pool is full.
+        """
+        pooled = await self._checkout()
+        failed = False
+        try:
+            yield pooled.agent
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self._checkin(pooled, failed)
+
+    async def evict_idle(self) -> int:
+        """Closes agents above `min_size` that have been idle too long.
+
+        Returns:
+            int: Number of agents closed.
+        """
+        deadline = time.monotonic() - self.settings.idle_timeout
+        async with self._condition:
+            # Idle agents are reused last-in first-out, so the oldest come first
+            surplus = max(0, self._size - self.settings.min_size)
+            expired = [p for p in self._idle if p.idle_since <= deadline][:surplus]
+            self._idle = [p for p in self._idle if p not in expired]
+        for pooled in expired:
+            await self._retire(pooled)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Gets pool statistics.
+
+        Returns:
+            Dict: Live, idle and in-use agents, plus agents created and
+                retired, requests served and requests that failed.
+        """
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            **self._stats,
+        }
+
+    async def _checkout(self) -> _PooledAgent:
+        if self._closed:
+            raise RuntimeError("Agent pool is closed")
+        if not self._started:
+            await self.start()
+
+        pooled, unhealthy = None, []
+        async with self._condition:
+            while pooled is None:
+                while self._idle and pooled is None:
+                    candidate = self._idle.pop()
+                    if self._is_healthy(candidate):
+                        pooled = candidate
+                    else:
+                        self._size -= 1
+                        unhealthy.append(candidate)
+                if pooled is None and self._size < self.settings.max_size:
+                    self._size += 1
+                    break
+                if pooled is None:
+                    await self._condition.wait()
+        for candidate in unhealthy:
+            await self._close(candidate)
+        return pooled or await self._create()
+
+    async def _checkin(self, pooled: _PooledAgent, failed: bool) -> None:
+        pooled.requests += 1
+        self._stats["requests"] += 1
+        if failed:
+            self._stats["failed"] += 1
+        limit = self.settings.max_requests_per_agent
+        retire = failed or self._closed or (limit and pooled.requests >= limit)
+        if not retire:
+            try:
+                await pooled.agent.reset()
+            except Exception as e:
+                logger.warning(f"Failed to reset pooled agent: {e}")
+                retire = True
+        if retire or not self._is_healthy(pooled):
+            await self._retire(pooled)
+            return
+
+        pooled.idle_since = time.monotonic()
+        async with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    async def _create(self) -> _PooledAgent:
+        """Creates an agent for a slot already counted in `_size`."""
+        try:
+            agent = await self.factory()
+        except BaseException:
+            async with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self._stats["created"] += 1
+        return _PooledAgent(agent)
+
+    async def _fill(self) -> None:
+        """Creates agents until the pool holds `min_size`."""
+        while not self._closed:
+            async with self._condition:
+                if self._size >= self.settings.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = await self._create()
+            except Exception as e:
+                logger.error(f"Failed to create pooled agent: {e}")
+                return
+            async with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    async def _retire(self, pooled: _PooledAgent) -> None:
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        await self._close(pooled)
+
+    async def _close(self, pooled: _PooledAgent) -> None:
+        self._stats["retired"] += 1
+        try:
+            await pooled.agent.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled agent: {e}")
+
+    @staticmethod
+    def _is_healthy(pooled: _PooledAgent) -> bool:
+        try:
+            return pooled.agent.is_healthy()
+        except Exception:
+            return False
+
+    async def _evict_periodically(self) -> None:
+        interval = max(1.0, min(self.settings.idle_timeout, 60.0))
+        while not self._closed:
+            await asyncio.sleep(interval)
+            await self.evict_idle()
+            # Replace agents retired after failures or their request limit
+            await self._fill()
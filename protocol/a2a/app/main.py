@@ -10,12 +10,14 @@ from a2a.server.tasks import InMemoryPushNotifier, InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from dotenv import load_dotenv
 
-from app.tool.browser_use_tool import _BROWSER_DESCRIPTION
+from app.sandbox.core.pool import close_sandbox_pool, warm_sandbox_pool
+from app.tool.browser_use_schema import BROWSER_DESCRIPTION
 from app.tool.str_replace_editor import _STR_REPLACE_EDITOR_DESCRIPTION
 from app.tool.terminate import _TERMINATE_DESCRIPTION
 
 from .agent import A2AManus
 from .agent_executor import ManusExecutor
+from .agent_pool import AgentPool
 
 
 load_dotenv()
@@ -27,7 +29,7 @@ logger = logging.getLogger(__name__)
 async def main(host: str = "localhost", port: int = 10000):
     """Starts the Manus Agent server."""
     try:
-        capabilities = AgentCapabilities(streaming=False, pushNotifications=True)
+        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
         skills = [
             AgentSkill(
                 id="Python Execute",
@@ -41,7 +43,7 @@ async def main(host: str = "localhost", port: int = 10000):
             AgentSkill(
                 id="Browser use",
                 name="Browser use Tool",
-                description=_BROWSER_DESCRIPTION,
+                description=BROWSER_DESCRIPTION,
                 tags=["Use Browser"],
                 examples=["go_to 'https://www.google.com'"],
             ),
@@ -81,10 +83,9 @@ async def main(host: str = "localhost", port: int = 10000):
         )
 
         httpx_client = httpx.AsyncClient()
+        agent_pool = AgentPool(lambda: A2AManus.create(max_steps=3, keep_warm=True))
         request_handler = DefaultRequestHandler(
-            agent_executor=ManusExecutor(
-                agent_factory=lambda: A2AManus.create(max_steps=3)
-            ),
+            agent_executor=ManusExecutor(agent_pool=agent_pool, streaming=True),
             task_store=InMemoryTaskStore(),
             push_notifier=InMemoryPushNotifier(httpx_client),
         )
@@ -94,7 +95,14 @@ async def main(host: str = "localhost", port: int = 10000):
         )
 
         logger.info(f"Starting server on {host}:{port}")
-        return server.build()
+        app = server.build()
+        # Agents hold MCP sessions and browsers, so they are created and closed
+        # on the server's event loop
+        app.router.on_startup.append(agent_pool.start)
+        app.router.on_shutdown.append(agent_pool.close)
+        app.router.on_startup.append(warm_sandbox_pool)
+        app.router.on_shutdown.append(close_sandbox_pool)
+        return app
     except Exception as e:
         logger.error(f"An error occurred during server startup: {e}")
         exit(1)
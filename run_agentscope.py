@@ -10,6 +10,8 @@ from app.agentscope_system.agents import ManusPlanner, ManusExecutor, ManusRevie
 from agentscope.agent import UserAgent
 from agentscope.message import Msg
 from agentscope.model import OpenAIChatModel
+from app.sandbox.core.pool import close_sandbox_pool
+from app.session import current_session
 
 async def main():
     try:
@@ -106,6 +108,10 @@ Execution Result:
         print(f"An error occurred: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # Release the sandbox started by the tools, if any
+        await current_session().close()
+        await close_sandbox_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -6,6 +6,8 @@ from app.agent.manus import Manus
 from app.config import config
 from app.flow.flow_factory import FlowFactory, FlowType
 from app.logger import logger
+from app.sandbox.core.pool import close_sandbox_pool, warm_sandbox_pool
+from app.session import current_session
 
 
 async def run_flow():
@@ -14,6 +16,7 @@ async def run_flow():
     }
     if config.run_flow_config.use_data_analysis_agent:
         agents["data_analysis"] = DataAnalysis()
+    warm_sandbox_pool()
     try:
         prompt = input("Enter your prompt: ")
 
@@ -46,6 +49,9 @@ async def run_flow():
         logger.info("Operation cancelled by user.")
     except Exception as e:
         logger.error(f"Error: {str(e)}")
+    finally:
+        await current_session().close()
+        await close_sandbox_pool()
 
 
 if __name__ == "__main__":
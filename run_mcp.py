@@ -6,6 +6,8 @@ import sys
 from app.agent.mcp import MCPAgent
 from app.config import config
 from app.logger import logger
+from app.sandbox.core.pool import close_sandbox_pool
+from app.session import current_session
 
 
 class MCPRunner:
@@ -63,6 +65,8 @@ class MCPRunner:
     async def cleanup(self) -> None:
         """Clean up agent resources."""
         await self.agent.cleanup()
+        await current_session().close()
+        await close_sandbox_pool()
         logger.info("Session ended")
 
 
@@ -3,6 +3,8 @@ import asyncio
 
 from app.agent.sandbox_agent import SandboxManus
 from app.logger import logger
+from app.sandbox.core.pool import close_sandbox_pool
+from app.session import current_session
 
 
 async def main():
@@ -30,6 +32,8 @@ async def main():
     finally:
         # Ensure agent resources are cleaned up before exiting
         await agent.cleanup()
+        await current_session().close()
+        await close_sandbox_pool()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import pytest
+
+import app.llm as llm_module
+from app.config import AgentPoolSettings
+from app.schema import Message
+from app.tool.base import BaseTool, ToolResult
+from app.tool.browser_use_schema import BROWSER_TOOL_NAME
+from protocol.a2a.app.agent import A2AManus
+from protocol.a2a.app.agent_pool import AgentPool
+
+
+class WhitespaceTokenizer:
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+class FakeBrowser(BaseTool):
+    """Browser tool that records whether it was closed."""
+
+    name: str = BROWSER_TOOL_NAME
+    description: str = "Fake browser"
+    open: bool = True
+
+    async def execute(self, **kwargs) -> ToolResult:
+        self.open = True
+        return ToolResult(output="ok")
+
+    async def cleanup(self) -> None:
+        self.open = False
+
+
+@pytest.mark.asyncio
+async def test_pooled_agent_returns_with_a_closed_browser_and_no_step_state(
+    monkeypatch,
+):
+    """Tests that one request's browser session and step state don't leak."""
+    # The agent's LLM only needs a tokenizer, not tiktoken's downloaded data
+    monkeypatch.setattr(
+        llm_module.tiktoken, "encoding_for_model", lambda _: WhitespaceTokenizer()
+    )
+    agent = A2AManus(keep_warm=True)
+    browser = FakeBrowser()
+    agent.available_tools.tool_map[BROWSER_TOOL_NAME] = browser
+
+    async def factory() -> A2AManus:
+        return agent
+
+    pool = AgentPool(factory, AgentPoolSettings(min_size=0, max_size=1))
+
+    async with pool.acquire() as pooled:
+        pooled.memory.add_message(Message.user_message("log in to my bank"))
+        pooled.add_step_message(Message.user_message("Current browser state"))
+        pooled._tool_choice_override = "required"
+        await pooled.cleanup()  # Run end: kept warm, so nothing is released
+        assert browser.open
+
+    async with pool.acquire() as pooled:
+        assert pooled is agent
+        assert not browser.open
+        assert pooled.memory.messages == []
+        assert pooled._step_messages == []
+        assert pooled._tool_choice_override is None
+    await pool.close()
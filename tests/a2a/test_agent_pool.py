@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.config import AgentPoolSettings
+from protocol.a2a.app.agent_pool import AgentPool
+
+
+class FakeAgent:
+    def __init__(self):
+        self.healthy = True
+        self.resets = 0
+        self.closed = False
+
+    async def reset(self) -> None:
+        self.resets += 1
+
+    def is_healthy(self) -> bool:
+        return self.healthy
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def make_pool(**settings) -> tuple[AgentPool, list]:
+    created = []
+
+    async def factory():
+        agent = FakeAgent()
+        created.append(agent)
+        return agent
+
+    return AgentPool(factory, AgentPoolSettings(**settings)), created
+
+
+@pytest.mark.asyncio
+async def test_agents_are_reused_and_reset():
+    """Tests that sequential requests share one warm agent."""
+    pool, created = make_pool(min_size=1, max_size=2)
+
+    for _ in range(3):
+        async with pool.acquire() as agent:
+            assert agent is created[0]
+
+    assert len(created) == 1
+    assert created[0].resets == 3
+    await pool.close()
+    assert created[0].closed
+
+
+@pytest.mark.asyncio
+async def test_pool_never_exceeds_max_size():
+    """Tests that requests beyond max_size wait for a returned agent."""
+    pool, created = make_pool(min_size=0, max_size=2)
+    active = peak = 0
+
+    async def request():
+        nonlocal active, peak
+        async with pool.acquire():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert len(created) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_unhealthy_and_worn_out_agents_are_replaced():
+    """Tests retirement after a failure, a failed health check and the request limit."""
+    pool, created = make_pool(min_size=1, max_size=1, max_requests_per_agent=2)
+
+    with pytest.raises(RuntimeError):
+        async with pool.acquire():
+            raise RuntimeError("boom")
+    async with pool.acquire() as agent:
+        agent.healthy = False
+    async with pool.acquire():
+        pass
+    async with pool.acquire():
+        pass
+
+    assert [agent.closed for agent in created] == [True, True, True]
+    assert pool.get_stats()["failed"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_agents_above_min_size_are_evicted():
+    """Tests that idle eviction keeps min_size agents."""
+    pool, created = make_pool(min_size=1, max_size=3, idle_timeout=0)
+
+    async def request():
+        async with pool.acquire():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(3)))
+
+    assert await pool.evict_idle() == 2
+    assert pool.get_stats()["size"] == 1
+    assert sum(not agent.closed for agent in created) == 1
+    await pool.close()
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import app.llm as llm_module
+from app.agent.toolcall import ToolCallAgent
+from app.cancellation import CancellationToken
+from app.event_bus import EventBus
+from app.exceptions import AgentCancelled
+from app.llm import LLM
+from app.schema import AgentState, ToolCall
+from app.tool import ToolCollection
+from app.tool.base import BaseTool
+
+
+class WhitespaceTokenizer:
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+class SlowTool(BaseTool):
+    name: str = "slow"
+    description: str = "Takes a long time."
+    started: bool = False
+    interrupted: bool = False
+    cleaned_up: bool = False
+
+    async def execute(self) -> str:
+        self.started = True
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.interrupted = True
+            raise
+        return "done"
+
+    async def cleanup(self) -> None:
+        self.cleaned_up = True
+
+
+class SlowToolAgent(ToolCallAgent):
+    name: str = "slow_agent"
+
+    async def think(self) -> bool:
+        self.tool_calls = [
+            ToolCall(id="call_1", function={"name": "slow", "arguments": "{}"})
+        ]
+        return True
+
+
+@pytest.fixture
+def llm(monkeypatch) -> LLM:
+    monkeypatch.setattr(
+        llm_module.tiktoken, "encoding_for_model", lambda _: WhitespaceTokenizer()
+    )
+    monkeypatch.setattr(LLM, "_instances", {})
+    return LLM()
+
+
+@pytest.mark.asyncio
+async def test_token_interrupts_bound_task_and_releases_it():
+    """Tests that cancelling interrupts the task, and release undoes only that."""
+    token = CancellationToken()
+    outcome = {}
+
+    async def run():
+        token.bind(asyncio.current_task())
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            outcome["still_cancelled"] = token.release()
+            await asyncio.sleep(0)  # can await again once released
+            outcome["reason"] = token.reason
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0)
+    assert token.cancel("stop")
+    assert not token.cancel("again")
+    await task
+
+    assert outcome == {"still_cancelled": False, "reason": "stop"}
+
+
+@pytest.mark.asyncio
+async def test_cancel_interrupts_tool_and_cleans_up(llm):
+    """Tests that cancelling a run stops its in-flight tool call and runs cleanup."""
+    tool = SlowTool()
+    agent = SlowToolAgent(
+        llm=llm, available_tools=ToolCollection(tool), event_bus=EventBus()
+    )
+    events = agent.event_bus.subscribe()
+    run = asyncio.create_task(agent.run("wait"))
+    while not tool.started:
+        await asyncio.sleep(0.01)
+
+    assert agent.cancel("client went away")
+    with pytest.raises(AgentCancelled, match="client went away"):
+        await asyncio.wait_for(run, timeout=5)
+
+    assert tool.interrupted
+    assert tool.cleaned_up
+    assert agent.state == AgentState.IDLE
+    assert [e.type async for e in events][-1] == "run_cancelled"
+
+
+@pytest.mark.asyncio
+async def test_cancel_outside_a_run_is_refused(llm):
+    """Tests that only a running agent can be cancelled."""
+    agent = SlowToolAgent(llm=llm, available_tools=ToolCollection(SlowTool()))
+
+    assert not agent.cancel()
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import app.llm as llm_module
+from app.agent.base import BaseAgent
+from app.event_bus import AgentEvent, EventBus
+from app.llm import LLM
+from app.schema import AgentState
+
+
+class WhitespaceTokenizer:
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+class CountingAgent(BaseAgent):
+    name: str = "counter"
+    max_steps: int = 3
+
+    async def step(self) -> str:
+        if self.current_step == 2:
+            self.state = AgentState.FINISHED
+        return f"counted {self.current_step}"
+
+
+class FailingAgent(CountingAgent):
+    async def step(self) -> str:
+        raise RuntimeError("boom")
+
+
+@pytest.fixture
+def llm(monkeypatch) -> LLM:
+    monkeypatch.setattr(
+        llm_module.tiktoken, "encoding_for_model", lambda _: WhitespaceTokenizer()
+    )
+    monkeypatch.setattr(LLM, "_instances", {})
+    return LLM()
+
+
+def event(type: str = "thought") -> AgentEvent:
+    return AgentEvent(type=type, agent="test")
+
+
+@pytest.mark.asyncio
+async def test_subscribers_each_receive_events_until_the_run_ends():
+    """Tests fan-out and that a terminal event ends every stream."""
+    bus = EventBus()
+    first, second = bus.subscribe(), bus.subscribe()
+
+    for type in ["run_started", "thought", "run_finished", "thought"]:
+        bus.publish(event(type))
+
+    assert [e.type async for e in first] == ["run_started", "thought", "run_finished"]
+    assert [e.type async for e in second] == ["run_started", "thought", "run_finished"]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_events():
+    """Tests that publishing never blocks on a full subscriber queue."""
+    bus = EventBus(max_queue=2)
+    subscription = bus.subscribe()
+
+    for _ in range(3):
+        bus.publish(event("thought"))
+    bus.publish(event("run_finished"))
+    bus.close()
+
+    assert [e.type async for e in subscription][-1] == "run_finished"
+    assert subscription.dropped >= 2
+
+
+@pytest.mark.asyncio
+async def test_agent_run_publishes_progress(llm):
+    """Tests that BaseAgent.run publishes run and step boundaries as they happen."""
+    agent = CountingAgent(llm=llm, event_bus=EventBus())
+    events = agent.event_bus.subscribe()
+
+    result, received = await asyncio.gather(
+        agent.run("count"), asyncio.ensure_future(_collect(events))
+    )
+
+    assert [(e.type, e.step) for e in received] == [
+        ("run_started", 0),
+        ("step_started", 1),
+        ("step_finished", 1),
+        ("step_started", 2),
+        ("step_finished", 2),
+        ("run_finished", 2),
+    ]
+    assert received[-1].data["result"] == result
+
+
+@pytest.mark.asyncio
+async def test_failed_run_publishes_run_failed(llm):
+    """Tests that a run raising an error still ends the stream."""
+    agent = FailingAgent(llm=llm, event_bus=EventBus())
+    events = agent.event_bus.subscribe()
+
+    with pytest.raises(RuntimeError):
+        await agent.run("count")
+
+    received = await _collect(events)
+    assert received[-1].type == "run_failed"
+    assert received[-1].data["error"] == "boom"
+
+
+async def _collect(events) -> list:
+    return [e async for e in events]
@@ -0,0 +1,74 @@
+from app.config import LoopDetectionSettings
+from app.loop_detection import LoopDetector
+from app.schema import Message, ToolCall
+
+
+def click(index: int, arguments: str = None) -> Message:
+    call = ToolCall(
+        id=f"call_{index}",
+        function={
+            "name": "browser_use",
+            "arguments": arguments
+            or f'{{"action": "click_element", "index": {index}}}',
+        },
+    )
+    return Message.from_tool_calls(tool_calls=[call])
+
+
+def make_detector(**settings) -> LoopDetector:
+    return LoopDetector(LoopDetectionSettings(**settings), repeat_threshold=2)
+
+
+def test_repeated_tool_call_detected():
+    """Tests that identical tool calls are caught, regardless of argument layout."""
+    detector = make_detector()
+
+    assert not detector.record(click(5))
+    assert not detector.record(click(5, '{"index": 5, "action": "click_element"}'))
+    assert detector.record(click(5, '{ "action": "click_element", "index": 5 }'))
+    assert "3 times" in detector.last_loop
+    assert "browser_use" in detector.prompt()
+
+
+def test_short_cycle_detected():
+    """Tests that an A-B-A-B cycle is caught before any step repeats three times."""
+    detector = make_detector()
+
+    assert [detector.record(click(i % 2)) for i in range(4)] == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert detector.last_loop == "a cycle of 2 steps was repeated 2 times"
+
+
+def test_window_forgets_old_steps():
+    """Tests that repeats outside the window do not count."""
+    detector = make_detector(window=3)
+
+    for message in [click(1), click(2), click(3), click(1), click(4), click(1)]:
+        assert not detector.record(message)
+    assert detector.get_stats()["window"] == 3
+
+
+def test_observe_records_each_step_once():
+    """Tests that observing unchanged memory does not count the step again."""
+    detector = make_detector()
+    messages = [Message.user_message("task"), click(1)]
+
+    for _ in range(3):
+        assert not detector.observe(messages)
+    assert detector.get_stats()["steps"] == 1
+
+    messages += [
+        Message.tool_message("ok", name="browser_use", tool_call_id="call_1"),
+        click(1),
+    ]
+    messages += [
+        Message.tool_message("ok", name="browser_use", tool_call_id="call_1"),
+        click(1),
+    ]
+    assert not detector.observe(messages[:-2])
+    assert detector.observe(messages)
+    assert detector.consecutive == 1
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import app.llm as llm_module
+from app.llm import LLM
+from app.sandbox.client import SANDBOX_CLIENT
+from app.session import Session, current_session, session_scope
+
+
+class WhitespaceTokenizer:
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+class Resource:
+    def __init__(self):
+        self.closed = False
+
+    async def cleanup(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def llm(monkeypatch) -> LLM:
+    monkeypatch.setattr(
+        llm_module.tiktoken, "encoding_for_model", lambda _: WhitespaceTokenizer()
+    )
+    monkeypatch.setattr(LLM, "_instances", {})
+    return LLM()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_are_isolated(llm):
+    """Tests that concurrent tasks each see their own session and token usage."""
+
+    async def serve(session_id: str, tokens: int) -> tuple:
+        async with session_scope(Session(session_id), close=False) as session:
+            await asyncio.sleep(0)
+            llm.update_token_count(tokens, completion_tokens=1)
+            await asyncio.sleep(0)
+            return current_session().id, llm.total_input_tokens, session
+
+    results = await asyncio.gather(serve("alice", 10), serve("bob", 20))
+
+    assert [r[:2] for r in results] == [("alice", 10), ("bob", 20)]
+    assert results[0][2].get_stats()["llm_usage"]["default"] == {
+        "input_tokens": 10,
+        "completion_tokens": 1,
+        "cached_tokens": 0,
+    }
+    assert current_session().id == "default"
+
+
+@pytest.mark.asyncio
+async def test_closing_a_session_cleans_up_its_state():
+    """Tests that session state is created once and cleaned up on exit."""
+    async with session_scope() as session:
+        resource = session.get_state("resource", Resource)
+        assert session.get_state("resource", Resource) is resource
+
+    assert resource.closed
+    assert session.get_state("resource", Resource) is not resource
+
+
+@pytest.mark.asyncio
+async def test_sandbox_client_resolves_to_the_current_session():
+    """Tests that the shared sandbox client forwards to a per-session client."""
+    async with session_scope(close=False) as first:
+        assert SANDBOX_CLIENT.cleanup.__self__ is first.sandbox_client
+    async with session_scope(close=False) as second:
+        assert SANDBOX_CLIENT.cleanup.__self__ is second.sandbox_client
+
+    assert first.sandbox_client is not second.sandbox_client
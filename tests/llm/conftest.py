@@ -0,0 +1,23 @@
+import pytest
+
+import app.llm as llm_module
+import app.session as session_module
+from app.llm import LLM
+
+
+class WhitespaceTokenizer:
+    """Deterministic stand-in for a tiktoken encoding."""
+
+    def encode(self, text: str) -> list:
+        return text.split()
+
+
+@pytest.fixture
+def llm(monkeypatch) -> LLM:
+    """Creates a fresh LLM instance that does not need tiktoken data files."""
+    monkeypatch.setattr(session_module, "DEFAULT_SESSION", session_module.Session())
+    monkeypatch.setattr(
+        llm_module.tiktoken, "encoding_for_model", lambda _: WhitespaceTokenizer()
+    )
+    monkeypatch.setattr(LLM, "_instances", {})
+    return LLM()
@@ -0,0 +1,139 @@
+import asyncio
+from typing import List
+
+import pytest
+from openai.types.chat import ChatCompletionChunk
+
+from app.llm import LLM, ToolCallAccumulator
+from app.schema import Message
+
+
+def make_chunk(content=None, tool_calls=None) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chunk",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "test",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": content, "tool_calls": tool_calls},
+                    "finish_reason": None,
+                }
+            ],
+        }
+    )
+
+
+def tool_delta(index, arguments, call_id=None, name=None) -> dict:
+    function = {"arguments": arguments}
+    if name:
+        function["name"] = name
+    delta = {"index": index, "function": function}
+    if call_id:
+        delta["id"] = call_id
+        delta["type"] = "function"
+    return delta
+
+
+class FakeStream:
+    """Async iterator over chunks that records how far it has been consumed."""
+
+    def __init__(self, chunks: List[ChatCompletionChunk]):
+        self.chunks = chunks
+        self.consumed = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.consumed >= len(self.chunks):
+            raise StopAsyncIteration
+        await asyncio.sleep(0)
+        self.consumed += 1
+        return self.chunks[self.consumed - 1]
+
+
+class FakeCompletions:
+    def __init__(self, stream: FakeStream):
+        self.stream = stream
+        self.params = None
+
+    async def create(self, **params):
+        self.params = params
+        return self.stream
+
+
+class FakeClient:
+    def __init__(self, stream: FakeStream):
+        self.chat = type("Chat", (), {"completions": FakeCompletions(stream)})()
+
+
+TOOLS = [{"type": "function", "function": {"name": "bash", "parameters": {}}}]
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_dispatched_before_stream_ends(llm: LLM):
+    """Tests that each call is handed out as soon as its JSON is complete."""
+    stream = FakeStream(
+        [
+            make_chunk(content="Running two commands"),
+            make_chunk(tool_calls=[tool_delta(0, '{"cmd": ', "call_a", "bash")]),
+            make_chunk(tool_calls=[tool_delta(0, '"ls"}')]),
+            make_chunk(tool_calls=[tool_delta(1, '{"cmd": "pwd"}', "call_b", "bash")]),
+            make_chunk(content=None),
+        ]
+    )
+    llm.client = FakeClient(stream)
+    dispatched = []
+
+    def on_tool_call(tool_call):
+        dispatched.append((tool_call.id, stream.consumed))
+
+    response = await llm.ask_tool_stream(
+        [Message.user_message("hi")], tools=TOOLS, on_tool_call=on_tool_call
+    )
+
+    assert dispatched == [("call_a", 3), ("call_b", 4)]
+    assert llm.client.chat.completions.params["stream"] is True
+    assert response.content == "Running two commands"
+    assert [call.function.arguments for call in response.tool_calls] == [
+        '{"cmd": "ls"}',
+        '{"cmd": "pwd"}',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_callback_is_awaited(llm: LLM):
+    """Tests that coroutine callbacks are awaited."""
+    llm.client = FakeClient(
+        FakeStream([make_chunk(tool_calls=[tool_delta(0, "{}", "call", "bash")])])
+    )
+    seen = []
+
+    async def on_tool_call(tool_call):
+        seen.append(tool_call.id)
+
+    await llm.ask_tool_stream(
+        [Message.user_message("hi")], tools=TOOLS, on_tool_call=on_tool_call
+    )
+
+    assert seen == ["call"]
+
+
+def test_accumulator_completes_on_next_index_and_finish():
+    """Tests that non-JSON arguments still complete on index change or end."""
+    accumulator = ToolCallAccumulator()
+    deltas = [
+        make_chunk(tool_calls=[tool_delta(0, "not json", "a", "bash")]),
+        make_chunk(tool_calls=[tool_delta(1, "also not", "b", "bash")]),
+    ]
+
+    first = accumulator.add(deltas[0].choices[0].delta.tool_calls)
+    second = accumulator.add(deltas[1].choices[0].delta.tool_calls)
+    remaining = accumulator.finish()
+
+    assert first == []
+    assert [call.id for call in second] == ["a"]
+    assert [call.id for call in remaining] == ["b"]
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from app.compaction import SUMMARY_PREFIX, ContextCompactor
+from app.config import CompactionSettings
+from app.llm import LLM
+from app.schema import Memory, Message, ToolCall
+
+
+def tool_turn(i: int, output: str) -> list:
+    call = ToolCall(
+        id=f"call_{i}", function={"name": "bash", "arguments": f'{{"step": {i}}}'}
+    )
+    return [
+        Message.from_tool_calls(tool_calls=[call], content=f"step {i}"),
+        Message.tool_message(output, name="bash", tool_call_id=f"call_{i}"),
+    ]
+
+
+def make_memory(turns: int, output: str = "ok") -> Memory:
+    memory = Memory(
+        messages=[Message.system_message("sys"), Message.user_message("task")]
+    )
+    for i in range(turns):
+        memory.add_messages(tool_turn(i, output))
+    return memory
+
+
+def assert_pairs_intact(messages: list) -> None:
+    called = set()
+    for message in messages:
+        if message.tool_calls:
+            called.update(call.id for call in message.tool_calls)
+        if message.role == "tool":
+            assert message.tool_call_id in called
+
+
+def test_memory_limit_keeps_tool_pairs():
+    """Tests that max_messages never leaves a tool result without its call."""
+    memory = Memory(max_messages=5)
+    for i in range(4):
+        memory.add_messages(tool_turn(i, "ok"))
+
+    assert memory.messages[0].role == "assistant"
+    assert_pairs_intact(memory.messages)
+
+
+@pytest.mark.asyncio
+async def test_old_screenshots_are_dropped(llm: LLM):
+    """Tests that only the newest screenshots stay in memory."""
+    memory = Memory()
+    for i in range(4):
+        memory.add_message(Message.user_message(f"shot {i}", base64_image="QUJD"))
+    compactor = ContextCompactor(llm, CompactionSettings(keep_screenshots=2))
+
+    await compactor.compact(memory)
+
+    assert [m.base64_image is not None for m in memory.messages] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_old_tool_outputs_are_elided(llm: LLM):
+    """Tests that tool outputs outside the recent window are shortened."""
+    memory = make_memory(6, output="word " * 200)
+    compactor = ContextCompactor(
+        llm,
+        CompactionSettings(
+            max_context_tokens=1000,
+            keep_recent_messages=4,
+            max_tool_output_chars=20,
+            summarize=False,
+        ),
+    )
+
+    await compactor.compact(memory)
+
+    outputs = [m.content for m in memory.messages if m.role == "tool"]
+    assert all("characters elided]" in output for output in outputs[:-2])
+    assert all("elided" not in output for output in outputs[-2:])
+    assert len(memory.messages) == 14
+
+
+@pytest.mark.asyncio
+async def test_oldest_turns_dropped_atomically(llm: LLM):
+    """Tests that dropping over budget removes whole tool-call turns."""
+    memory = make_memory(10, output="word " * 50)
+    compactor = ContextCompactor(
+        llm,
+        CompactionSettings(
+            max_context_tokens=400,
+            keep_recent_messages=3,
+            max_tool_output_chars=10000,
+            summarize=False,
+        ),
+    )
+
+    await compactor.compact(memory)
+
+    assert memory.messages[0].content == "sys"
+    assert memory.messages[1].content == "task"
+    assert memory.messages[2].role == "assistant"
+    assert compactor.count_tokens(memory.messages) <= 400
+    assert compactor.get_stats()["messages_dropped"] > 0
+    assert_pairs_intact(memory.messages)
+
+
+@pytest.mark.asyncio
+async def test_summary_replaces_older_turns(llm: LLM, monkeypatch):
+    """Tests that a background summary is spliced in on the next compaction."""
+    requests = []
+
+    async def fake_ask(messages, **kwargs):
+        requests.append(messages[0].content)
+        return "did steps 0 to 3"
+
+    monkeypatch.setattr(llm, "ask", fake_ask)
+    memory = make_memory(5, output="word " * 20)
+    compactor = ContextCompactor(
+        llm,
+        CompactionSettings(
+            max_context_tokens=10000, keep_recent_messages=2, summarize_ratio=0
+        ),
+    )
+
+    await compactor.compact(memory)
+    await asyncio.sleep(0)
+    await compactor.compact(memory)
+
+    assert "bash" in requests[0]
+    assert memory.messages[2].content == f"{SUMMARY_PREFIX}\ndid steps 0 to 3"
+    assert [m.content for m in memory.messages[3:]] == ["step 4", "word " * 20]
+    assert compactor.get_stats()["messages_summarized"] == 8
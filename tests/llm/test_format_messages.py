@@ -0,0 +1,50 @@
+from app.llm import LLM
+from app.schema import Message
+
+
+def test_message_wire_dict_is_reused():
+    """Tests that repeated formatting returns the same wire dicts."""
+    message = Message.user_message("look", base64_image="QUJD")
+
+    first = LLM.format_messages([message], supports_images=True)
+    second = LLM.format_messages([message], supports_images=True)
+
+    assert first[0] is second[0]
+    assert first[0]["content"][-1]["image_url"]["url"].endswith("QUJD")
+    assert "base64_image" not in first[0]
+
+
+def test_wire_cache_is_per_image_support():
+    """Tests that text-only and multimodal formats are cached separately."""
+    message = Message.user_message("look", base64_image="QUJD")
+
+    assert LLM.format_messages([message])[0] == {"role": "user", "content": "look"}
+    assert isinstance(LLM.format_messages([message], True)[0]["content"], list)
+
+
+def test_wire_cache_invalidated_on_change():
+    """Tests that assigning a field rebuilds the wire dict."""
+    message = Message.assistant_message("before")
+    before = message.to_wire()
+
+    message.content = "after"
+
+    assert message.to_wire() is not before
+    assert message.to_wire()["content"] == "after"
+
+
+def test_copies_do_not_share_wire_dicts():
+    """Tests that editing a copy leaves the original's wire dict intact."""
+    message = Message.user_message("original")
+    message.to_wire()
+    copy = message.model_copy()
+
+    copy.content = "edited"
+
+    assert copy.to_wire()["content"] == "edited"
+    assert message.to_wire()["content"] == "original"
+
+
+def test_empty_messages_are_skipped():
+    """Tests that messages without content or tool calls are dropped."""
+    assert LLM.format_messages([Message(role="assistant")]) == []
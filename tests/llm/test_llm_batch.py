@@ -0,0 +1,201 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError
+from openai.types.chat import ChatCompletion
+
+from app.llm import LLM
+from app.schema import Message
+
+
+def make_completion(content: str) -> dict:
+    return {
+        "id": "completion",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+    }
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible files and batches API."""
+
+    files: dict = {}
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, body) -> None:
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def batch(self, batch_id: str, status: str, **files) -> dict:
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+            "created_at": 0,
+            "input_file_id": "file-input",
+            "status": status,
+            **files,
+        }
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            # The upload is multipart; the JSONL lines are its file part
+            lines = [
+                line for line in body.split(b"\r\n") if line.startswith(b'{"custom_id"')
+            ]
+            self.files["file-input"] = b"\n".join(lines).decode()
+            self.reply(
+                {
+                    "id": "file-input",
+                    "object": "file",
+                    "bytes": len(body),
+                    "created_at": 0,
+                    "filename": "batch.jsonl",
+                    "purpose": "batch",
+                }
+            )
+        elif self.path == "/v1/batches":
+            self.process(json.loads(body)["input_file_id"])
+            self.reply(self.batch("batch-1", "validating"))
+
+    def do_GET(self) -> None:
+        if self.path == "/v1/batches/batch-1":
+            self.reply(
+                self.batch(
+                    "batch-1",
+                    "completed",
+                    output_file_id="file-output",
+                    error_file_id="file-errors",
+                )
+            )
+        elif self.path.startswith("/v1/files/") and self.path.endswith("/content"):
+            self.reply(self.files[self.path.split("/")[3]])
+
+    def process(self, file_id: str) -> None:
+        outputs, errors = [], []
+        for line in self.files[file_id].splitlines():
+            request = json.loads(line)
+            content = request["body"]["messages"][-1]["content"]
+            if content == "fail":
+                errors.append(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 400,
+                            "body": {"error": {"message": "bad request"}},
+                        },
+                    }
+                )
+            else:
+                outputs.append(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": make_completion(f"echo: {content}"),
+                        },
+                    }
+                )
+        # Results are not in request order, as with the real API
+        self.files["file-output"] = "\n".join(
+            json.dumps(record) for record in reversed(outputs)
+        )
+        self.files["file-errors"] = "\n".join(json.dumps(record) for record in errors)
+
+
+@pytest.fixture
+def batch_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BatchStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_ask_many_bounds_concurrency_and_keeps_order(llm: LLM):
+    """Tests ordered results, the concurrency bound and per-item failures."""
+    running, peak = 0, 0
+
+    class Completions:
+        async def create(self, messages, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            content = messages[-1]["content"]
+            if content == "fail":
+                request = httpx.Request("POST", "https://api.test/v1/chat")
+                raise BadRequestError(
+                    "bad request",
+                    response=httpx.Response(400, request=request),
+                    body=None,
+                )
+            return ChatCompletion.model_validate(make_completion(f"echo: {content}"))
+
+    llm.client = type("Client", (), {"chat": type("Chat", (), {})()})()
+    llm.client.chat.completions = Completions()
+    requests = [[Message.user_message(str(i))] for i in range(6)]
+    requests[3] = {"messages": [Message.user_message("fail")], "temperature": 0.5}
+
+    result = await llm.ask_many(requests, max_concurrency=2, retries=0)
+
+    assert peak == 2
+    assert result.results == [
+        "echo: 0",
+        "echo: 1",
+        "echo: 2",
+        None,
+        "echo: 4",
+        "echo: 5",
+    ]
+    assert not result.ok
+    assert [item.index for item in result.failed] == [3]
+    assert result.failed[0].error.startswith("BadRequestError")
+
+
+@pytest.mark.asyncio
+async def test_ask_many_offline_batch(llm: LLM, batch_server):
+    """Tests the offline mode against a local /v1/batches stub."""
+    llm.client = AsyncOpenAI(
+        api_key="test",
+        base_url=batch_server,
+        http_client=httpx.AsyncClient(trust_env=False),
+    )
+    requests = [
+        [Message.user_message("a")],
+        [Message.user_message("fail")],
+        [{"role": "unknown", "content": "b"}],
+        [Message.user_message("c")],
+    ]
+
+    result = await llm.ask_many(requests, offline=True, poll_interval=0)
+
+    assert result.results == ["echo: a", None, None, "echo: c"]
+    assert "bad request" in result.items[1].error
+    assert result.items[2].error.startswith("ValueError: Invalid role")
+    assert llm.total_input_tokens == 20
+    assert llm.total_completion_tokens == 4
@@ -0,0 +1,89 @@
+import sys
+
+import pytest
+
+from app.config import LLMSettings
+from app.llm_pool import LLMClientPool
+
+
+def settings(**overrides) -> LLMSettings:
+    values = {
+        "model": "gpt-4o",
+        "base_url": "https://api.example.com/v1",
+        "api_key": "key-a",
+        "max_tokens": 1024,
+        "temperature": 0.0,
+        "api_type": "openai",
+        "api_version": "",
+    }
+    return LLMSettings(**{**values, **overrides})
+
+
+@pytest.mark.asyncio
+async def test_same_endpoint_and_credentials_share_a_client():
+    """Tests that clients are shared by key, not by model or LLM config name."""
+    pool = LLMClientPool()
+
+    first = pool.get_client(settings())
+    second = pool.get_client(settings(model="gpt-4o-mini", temperature=1.0))
+    other_key = pool.get_client(settings(api_key="key-b"))
+    other_url = pool.get_client(settings(base_url="https://other.example.com/v1"))
+
+    assert first is second
+    assert other_key is not first and other_url is not first
+    assert pool.get_rate_limiter(settings()) is pool.get_rate_limiter(
+        settings(model="gpt-4o-mini")
+    )
+    stats = pool.get_stats()
+    assert stats["clients"] == 3
+    assert stats["handouts_by_endpoint"]["openai:https://api.example.com/v1"] == 3
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_limits_and_timeouts_come_from_the_config():
+    pool = LLMClientPool()
+
+    client = pool.get_client(
+        settings(
+            max_connections=7,
+            max_keepalive_connections=3,
+            keepalive_expiry=12.0,
+            connect_timeout=2.0,
+            request_timeout=33.0,
+        )
+    )
+
+    connections = client._client._transport._pool
+    assert connections._max_connections == 7
+    assert connections._max_keepalive_connections == 3
+    assert connections._keepalive_expiry == 12.0
+    assert client.timeout.connect == 2.0
+    assert client.timeout.read == 33.0
+    # Retries belong to LLM's retry policy, not the SDK
+    assert client.max_retries == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_http2_falls_back_to_http1_without_h2(monkeypatch):
+    monkeypatch.setitem(sys.modules, "h2", None)  # Makes `import h2` fail
+    pool = LLMClientPool()
+
+    client = pool.get_client(settings(http2=True))
+
+    assert client._client._transport._pool._http2 is False
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_close_closes_clients_and_starts_over():
+    pool = LLMClientPool()
+    client = pool.get_client(settings())
+
+    await pool.close()
+
+    assert client.is_closed()
+    assert pool.get_stats()["clients"] == 0
+    assert pool.get_client(settings()) is not client
+    await pool.close()
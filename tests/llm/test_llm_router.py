@@ -0,0 +1,90 @@
+import pytest
+
+from app.config import LLMRoutingSettings, config
+from app.llm import LLM
+from app.llm_router import LLMRouter, TaskClass
+
+
+def fake_ask(llm: LLM, answer: str = None, error: Exception = None):
+    """Replaces llm.ask with a stub that records token usage."""
+
+    async def ask(messages, **kwargs):
+        llm.update_token_count(1000, 100)
+        if error:
+            raise error
+        return answer
+
+    llm.ask = ask
+
+
+@pytest.fixture
+def tiers(llm: LLM, monkeypatch):
+    """The main LLM and a cheap "small" tier, both with stubbed calls."""
+    monkeypatch.setitem(config.llm, "small", config.llm["default"])
+    small = LLM(config_name="small")
+    small.input_cost_per_million_tokens = 1.0
+    small.output_cost_per_million_tokens = 10.0
+    fake_ask(llm, "main answer")
+    return llm, small
+
+
+def make_router(enabled: bool = True) -> LLMRouter:
+    return LLMRouter(LLMRoutingSettings(enabled=enabled, tiers={"classify": "small"}))
+
+
+@pytest.mark.asyncio
+async def test_unrouted_calls_use_main_model(tiers):
+    """Tests that task classes without a tier run on the caller's model."""
+    main, small = tiers
+    fake_ask(small, "small answer")
+    router = make_router()
+
+    assert await router.ask(TaskClass.PLAN, [], fallback=main) == "main answer"
+    assert await make_router(False).ask(TaskClass.CLASSIFY, [], main) == "main answer"
+    assert router.get_stats()["main"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_routed_call_records_cost(tiers):
+    """Tests that a routed call uses the tier and records its usage."""
+    main, small = tiers
+    fake_ask(small, "small answer")
+    router = make_router()
+
+    assert await router.ask(TaskClass.CLASSIFY, [], fallback=main) == "small answer"
+
+    stats = router.get_stats()["small"]
+    assert stats["calls"] == 1
+    assert stats["input_tokens"] == 1000
+    assert stats["cost"] == pytest.approx(0.002)
+    assert "main" not in router.get_stats()
+
+
+@pytest.mark.asyncio
+async def test_failed_tier_falls_back(tiers):
+    """Tests that an error on the tier is retried on the main model."""
+    main, small = tiers
+    fake_ask(small, error=RuntimeError("tier down"))
+    router = make_router()
+
+    assert await router.ask(TaskClass.CLASSIFY, [], fallback=main) == "main answer"
+
+    stats = router.get_stats()
+    assert stats["small"]["failures"] == 1
+    assert stats["small"]["fallbacks"] == 1
+    assert stats["main"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_result_falls_back(tiers):
+    """Tests that a low-confidence tier answer is replaced by the main model's."""
+    main, small = tiers
+    fake_ask(small, "   ")
+    router = make_router()
+
+    answer = await router.ask(
+        TaskClass.CLASSIFY, [], fallback=main, accept=lambda text: bool(text.strip())
+    )
+
+    assert answer == "main answer"
+    assert router.get_stats()["small"]["rejected"] == 1
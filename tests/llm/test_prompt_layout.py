@@ -0,0 +1,93 @@
+from openai.types import CompletionUsage
+
+from app.llm import LLM
+from app.schema import Message
+
+
+def make_tool(name: str) -> dict:
+    return {"type": "function", "function": {"name": name, "parameters": {}}}
+
+
+def test_volatile_messages_go_after_history(llm: LLM):
+    """Tests that step prompts follow the history and leave its prefix intact."""
+    llm.stable_prompt_prefix = True
+    history = [Message.user_message("task"), Message.assistant_message("working")]
+    system = [Message.system_message("you are an agent")]
+
+    first, _ = llm._build_tool_params(
+        history, system, 300, None, "auto", None, [Message.user_message("step 1")]
+    )
+    history.append(Message.tool_message("result", name="bash", tool_call_id="1"))
+    second, _ = llm._build_tool_params(
+        history, system, 300, None, "auto", None, [Message.user_message("step 2")]
+    )
+
+    assert first["messages"][-1]["content"] == "step 1"
+    assert second["messages"][:3] == first["messages"][:3]
+    assert second["messages"][-1]["content"] == "step 2"
+
+
+def test_tools_are_sorted_in_stable_mode(llm: LLM):
+    """Tests that tool schemas are sent in a deterministic order."""
+    tools = [make_tool("terminate"), make_tool("bash"), make_tool("browser")]
+
+    llm.stable_prompt_prefix = False
+    unsorted, _ = llm._build_tool_params([], None, 300, tools, "auto", None)
+    llm.stable_prompt_prefix = True
+    ordered, _ = llm._build_tool_params([], None, 300, tools, "auto", None)
+
+    assert [t["function"]["name"] for t in unsorted["tools"]] == [
+        "terminate",
+        "bash",
+        "browser",
+    ]
+    assert [t["function"]["name"] for t in ordered["tools"]] == [
+        "bash",
+        "browser",
+        "terminate",
+    ]
+
+
+def test_cache_breakpoint_marks_end_of_prefix(llm: LLM):
+    """Tests that the breakpoint lands on the last stable message only."""
+    llm.prompt_cache_control = True
+    history = [Message.user_message("task")]
+
+    params, _ = llm._build_tool_params(
+        history, None, 300, None, "auto", None, [Message.user_message("step")]
+    )
+
+    assert params["messages"][0]["content"] == [
+        {"type": "text", "text": "task", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert params["messages"][1]["content"] == "step"
+    # The message's cached wire dict is not modified
+    assert history[0].to_wire()["content"] == "task"
+
+
+def test_cached_tokens_are_recorded(llm: LLM):
+    """Tests that cached prompt tokens are read from OpenAI and gateway usage."""
+    llm.update_token_count_from_usage(
+        CompletionUsage.model_validate(
+            {
+                "prompt_tokens": 100,
+                "completion_tokens": 10,
+                "total_tokens": 110,
+                "prompt_tokens_details": {"cached_tokens": 64},
+            }
+        )
+    )
+    llm.update_token_count_from_usage(
+        CompletionUsage.model_validate(
+            {
+                "prompt_tokens": 50,
+                "completion_tokens": 5,
+                "total_tokens": 55,
+                "cache_read_input_tokens": 32,
+            }
+        )
+    )
+
+    assert llm.total_input_tokens == 150
+    assert llm.total_completion_tokens == 15
+    assert llm.total_cached_tokens == 96
@@ -0,0 +1,173 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import BadRequestError, RateLimitError
+from openai.types.chat import ChatCompletion
+
+import app.llm_rate_limit as rate_limit_module
+from app.exceptions import EmptyResponseError, TokenLimitExceeded
+from app.llm import LLM
+from app.llm_rate_limit import (
+    RateLimiter,
+    is_retryable_error,
+    parse_duration,
+    parse_retry_after,
+)
+from app.schema import Message
+
+
+class FakeClock:
+    """Clock advanced only by the limiter's own sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay: float) -> None:
+        clock.now += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(rate_limit_module.asyncio, "sleep", fake_sleep)
+    return clock
+
+
+def make_error(cls, status_code: int, headers: dict = None):
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return cls("error", response=response, body=None)
+
+
+def make_completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "completion",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_token_budget_throttles(clock: FakeClock):
+    """Tests that requests wait for the input token budget to refill."""
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock)
+
+    await limiter.acquire(600)
+    limiter.release()
+    await limiter.acquire(100)
+    limiter.release()
+
+    assert clock.now == pytest.approx(1010.0)
+    assert limiter.get_stats()["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callers_are_admitted_in_order(clock: FakeClock):
+    """Tests that queued callers get slots in arrival order."""
+    limiter = RateLimiter(
+        requests_per_minute=60, max_concurrent_requests=1, clock=clock
+    )
+    order = []
+
+    async def call(i: int) -> None:
+        async with limiter.limit():
+            order.append(i)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(call(i) for i in range(5)))
+
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_headers_pause_until_reset(clock: FakeClock):
+    """Tests that an exhausted provider budget pauses until its reset time."""
+    limiter = RateLimiter(clock=clock)
+    limiter.update_from_headers(
+        {
+            "x-ratelimit-limit-requests": "100",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        }
+    )
+
+    await limiter.acquire()
+
+    assert clock.now >= 1002.0
+    assert limiter.get_stats()["requests_per_minute"] == 100
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_error_pauses_all_callers(clock: FakeClock):
+    """Tests that a 429 blocks later requests for the retry-after period."""
+    limiter = RateLimiter(clock=clock)
+
+    with pytest.raises(RateLimitError):
+        async with limiter.limit():
+            raise make_error(RateLimitError, 429, {"retry-after": "3"})
+    await limiter.acquire()
+
+    assert clock.now == pytest.approx(1003.0)
+    assert limiter.get_stats()["rate_limited"] == 1
+
+
+def test_header_parsing():
+    """Tests reset durations and retry-after formats."""
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("soon") is None
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({"retry-after": "4"}) == 4.0
+
+
+def test_only_transient_errors_are_retried():
+    """Tests that deterministic failures are not retried."""
+    assert is_retryable_error(make_error(RateLimitError, 429))
+    assert is_retryable_error(EmptyResponseError("Empty response from streaming LLM"))
+    assert not is_retryable_error(ValueError("Invalid tool_choice: sometimes"))
+    assert not is_retryable_error(make_error(BadRequestError, 400))
+    assert not is_retryable_error(TokenLimitExceeded("too long"))
+
+
+@pytest.mark.asyncio
+async def test_ask_retries_after_rate_limit(llm: LLM):
+    """Tests that ask_tool retries a 429 through the limiter."""
+    calls = []
+
+    class Completions:
+        async def create(self, **params):
+            calls.append(params)
+            if len(calls) == 1:
+                raise make_error(RateLimitError, 429, {"retry-after-ms": "10"})
+            return make_completion("done")
+
+    llm.client = type("Client", (), {"chat": type("Chat", (), {})()})()
+    llm.client.chat.completions = Completions()
+    llm.rate_limiter = RateLimiter()
+    llm.response_cache = None
+
+    response = await llm.ask_tool([Message.user_message("hi")], temperature=0.0)
+
+    assert response.content == "done"
+    assert len(calls) == 2
+    assert llm.rate_limiter.get_stats()["rate_limited"] == 1
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from app.llm import LLM
+from app.llm_cache import ResponseCache
+from app.schema import Message
+
+
+def make_completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "completion",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        }
+    )
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return make_completion(f"answer {self.calls}")
+
+
+class CountingClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": CountingCompletions()})()
+
+
+@pytest.fixture
+def cached_llm(llm: LLM) -> LLM:
+    llm.client = CountingClient()
+    llm.response_cache = ResponseCache(max_memory_entries=8)
+    llm.cache_nondeterministic = False
+    return llm
+
+
+def test_memory_tier_is_lru():
+    """Tests that the memory tier evicts the least recently used entry."""
+    cache = ResponseCache(max_memory_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    """Tests that the SQLite tier persists entries and honours the TTL."""
+    path = tmp_path / "cache.sqlite"
+    ResponseCache(path=path, ttl=60).put("key", "value")
+
+    reopened = ResponseCache(path=path, ttl=60)
+    assert reopened.get("key") == "value"
+    assert reopened.get_stats()["disk_hits"] == 1
+
+    expiring = ResponseCache(path=tmp_path / "ttl.sqlite", ttl=1)
+    expiring.put("key", "value")
+    expiring._memory.clear()
+    expiring._db.execute("UPDATE responses SET expires_at = ?", (time.time() - 1,))
+    assert expiring.get("key") is None
+
+
+def test_disk_tier_evicts_by_size(tmp_path):
+    """Tests that the oldest entries are dropped once over the byte budget."""
+    cache = ResponseCache(path=tmp_path / "cache.sqlite", max_disk_bytes=10)
+    cache.put("old", "x" * 6)
+    cache.put("new", "y" * 6)
+    cache._memory.clear()
+
+    assert cache.get("old") is None
+    assert cache.get("new") == "y" * 6
+
+
+@pytest.mark.asyncio
+async def test_deterministic_requests_are_cached(cached_llm: LLM):
+    """Tests that temperature 0 requests only hit the API once."""
+    messages = [Message.user_message("plan this")]
+
+    first = await cached_llm.ask(messages, stream=False, temperature=0)
+    second = await cached_llm.ask(messages, stream=False, temperature=0)
+
+    assert first == second == "answer 1"
+    assert cached_llm.client.chat.completions.calls == 1
+    assert cached_llm.response_cache_stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_nondeterministic_requests_bypass_cache(cached_llm: LLM):
+    """Tests that sampled requests are only cached when forced."""
+    messages = [Message.user_message("write a poem")]
+
+    await cached_llm.ask(messages, stream=False, temperature=0.7)
+    await cached_llm.ask(messages, stream=False, temperature=0.7)
+    assert cached_llm.client.chat.completions.calls == 2
+
+    await cached_llm.ask(messages, stream=False, temperature=0.7, cache=True)
+    await cached_llm.ask(messages, stream=False, temperature=0.7, cache=True)
+    assert cached_llm.client.chat.completions.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_ask_tool_round_trips_message(cached_llm: LLM):
+    """Tests that cached tool responses come back as ChatCompletionMessage."""
+    messages = [Message.user_message("use a tool")]
+
+    first = await cached_llm.ask_tool(messages, temperature=0)
+    second = await cached_llm.ask_tool(messages, temperature=0)
+
+    assert second == first
+    assert cached_llm.client.chat.completions.calls == 1
@@ -0,0 +1,99 @@
+import pytest
+
+from app.llm import TokenCounter
+
+
+class WhitespaceTokenizer:
+    """Deterministic stand-in for a tiktoken encoding."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text: str) -> list:
+        self.calls += 1
+        return text.split()
+
+
+@pytest.fixture
+def counter() -> TokenCounter:
+    return TokenCounter(WhitespaceTokenizer())
+
+
+def test_cached_count_matches_uncached(counter: TokenCounter):
+    """Tests that cached totals equal a fresh per-message count."""
+    messages = [
+        {"role": "system", "content": "you are helpful"},
+        {"role": "user", "content": "hello there"},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {"id": "1", "function": {"name": "bash", "arguments": '{"a": 1}'}}
+            ],
+        },
+        {"role": "tool", "content": "ok", "name": "bash", "tool_call_id": "1"},
+    ]
+    expected = TokenCounter.FORMAT_TOKENS + sum(
+        TokenCounter(WhitespaceTokenizer()).count_single_message(m) for m in messages
+    )
+
+    assert counter.count_message_tokens(messages) == expected
+    assert counter.count_message_tokens(messages) == expected
+
+
+def test_only_new_messages_are_tokenized(counter: TokenCounter):
+    """Tests that appending to history only encodes the appended message."""
+    history = [{"role": "user", "content": f"message {i}"} for i in range(10)]
+    counter.count_message_tokens(history)
+    calls_before = counter.tokenizer.calls
+
+    history.append({"role": "assistant", "content": "a new reply"})
+    counter.count_message_tokens(history)
+
+    stats = counter.get_cache_stats()
+    assert stats["hits"] == 10
+    assert stats["misses"] == 11
+    # role + content for the single new message
+    assert counter.tokenizer.calls - calls_before == 2
+
+
+def test_image_key_ignores_url(counter: TokenCounter):
+    """Tests that images with different payloads share a cache entry."""
+
+    def image_message(data: str) -> dict:
+        return {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "screenshot"},
+                {"type": "image_url", "image_url": {"url": data}},
+            ],
+        }
+
+    first = counter.count_message_tokens([image_message("data:a")])
+    second = counter.count_message_tokens([image_message("data:b")])
+
+    assert first == second
+    assert counter.get_cache_stats()["hits"] == 1
+
+
+def test_tool_schema_counts_are_cached(counter: TokenCounter):
+    """Tests that repeated tool schema lists are tokenized once."""
+    tools = [
+        {"type": "function", "function": {"name": "bash", "parameters": {}}},
+        {"type": "function", "function": {"name": "terminate", "parameters": {}}},
+    ]
+    first = counter.count_tools_tokens(tools)
+    tokens_encoded = counter.tokens_encoded
+
+    assert counter.count_tools_tokens([dict(tool) for tool in tools]) == first
+    assert counter.tokens_encoded == tokens_encoded
+    assert counter.count_tools_tokens(None) == 0
+
+
+def test_cache_is_bounded(counter: TokenCounter):
+    """Tests that the least recently used entries are evicted."""
+    counter.MAX_CACHE_ENTRIES = 3
+    for i in range(5):
+        counter.count_message_tokens([{"role": "user", "content": str(i)}])
+
+    assert counter.get_cache_stats()["cached_messages"] == 3
@@ -0,0 +1,99 @@
+"""Tests for the DockerSession output reader, against a local shell."""
+
+import asyncio
+import socket
+import subprocess
+
+import pytest
+import pytest_asyncio
+
+import app.sandbox.core.terminal as terminal_module
+from app.sandbox.core.terminal import CommandOutput, DockerSession
+
+
+@pytest_asyncio.fixture
+async def session(monkeypatch):
+    """A session whose socket is connected to a local bash instead of a container."""
+    monkeypatch.setattr(terminal_module, "APIClient", lambda: None)
+    ours, theirs = socket.socketpair()
+    shell = subprocess.Popen(
+        ["bash", "--norc", "--noprofile"],
+        stdin=theirs,
+        stdout=theirs,
+        stderr=subprocess.STDOUT,
+    )
+    theirs.close()
+    ours.setblocking(False)
+
+    session = DockerSession("local", max_output=100)
+    session.socket = ours
+    await session._read_output(await session._send_marker())
+    try:
+        yield session
+    finally:
+        ours.close()
+        shell.kill()
+        shell.wait()
+
+
+def test_framer_handles_markers_split_across_chunks():
+    """Tests that output is framed correctly however the stream is chunked."""
+    stream = b"line one\r\nline two\r\n\r\n__END__:3\r\n"
+    for size in range(1, len(stream) + 1):
+        output = CommandOutput(b"__END__:")
+        for start in range(0, len(stream), size):
+            output.feed(stream[start : start + size])
+        assert output.done
+        assert output.exit_code == 3
+        assert output.text == "line one\nline two\n\n"
+
+
+def test_framer_keeps_start_and_end_of_long_output():
+    """Tests that output beyond the cap is left out from the middle."""
+    output = CommandOutput(b"__END__:", max_output=10)
+    output.feed(b"0123456789" * 100 + b"abcde\n__END__:0\n")
+
+    assert output.text == "01234\n... [996 characters omitted] ...\nbcde\n"
+
+
+@pytest.mark.asyncio
+async def test_execute_returns_output_and_exit_code(session):
+    """Tests that commands run in one shell and report their exit codes."""
+    assert await session.execute("cd /tmp && echo hi") == "hi"
+    assert await session.execute("pwd") == "/tmp"
+    assert session.last_exit_code == 0
+
+    assert await session.execute("printf 'a\\n\\nb'; false") == "a\n\nb"
+    assert session.last_exit_code == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_streams_output(session):
+    """Tests that output is passed to the callback as it is read."""
+    pieces = []
+
+    result = await session.execute("seq 1 3", on_output=pieces.append)
+
+    assert result == "1\n2\n3"
+    assert "".join(pieces).strip() == result
+
+
+@pytest.mark.asyncio
+async def test_timed_out_command_does_not_leak_into_the_next(session):
+    """Tests that output of a timed-out command is skipped, not returned later."""
+    with pytest.raises(TimeoutError):
+        await session.execute("sleep 0.5; echo late", timeout=0.1)
+
+    assert await session.execute("echo next") == "next"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_command_does_not_leak_into_the_next(session):
+    """Tests that a cancelled command is stopped and its later output skipped."""
+    task = asyncio.create_task(session.execute("sleep 0.5; echo late"))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert await session.execute("echo next") == "next"
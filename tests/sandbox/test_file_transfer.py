@@ -0,0 +1,154 @@
+"""Tests for streaming file transfer, against a directory standing in for a container."""
+
+import io
+import os
+import subprocess
+import tarfile
+from types import SimpleNamespace
+
+import pytest
+from docker.errors import NotFound
+
+import app.sandbox.core.sandbox as sandbox_module
+from app.config import SandboxSettings
+from app.sandbox.core.sandbox import DockerSandbox
+from app.sandbox.core.transfer import TarEntry, open_stream, tar_stream
+
+
+class DirectoryContainer:
+    """Implements the archive calls of a container on a host directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.execs = []
+        self.archived = []
+
+    def _host(self, path: str) -> str:
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def put_archive(self, path: str, data) -> bool:
+        if not os.path.isdir(self._host(path)):
+            raise NotFound(f"{path} not found")
+        with open_stream(data) as tar:
+            for member in tar:
+                self.archived.append(member.name)
+                tar.extract(member, self._host(path), filter="data")
+        return True
+
+    def get_archive(self, path: str, chunk_size: int):
+        if not os.path.exists(self._host(path)):
+            raise NotFound(f"{path} not found")
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            tar.add(self._host(path), arcname=os.path.basename(path))
+        data = buffer.getvalue()
+        chunks = (data[i : i + chunk_size] for i in range(0, len(data), chunk_size))
+        return chunks, {}
+
+    def exec_run(self, cmd, stream: bool = False, demux: bool = False):
+        self.execs.append(cmd[0])
+        cmd = [self._host(arg) if arg.startswith("/") else arg for arg in cmd]
+        if not stream:
+            return SimpleNamespace(exit_code=subprocess.run(cmd).returncode)
+        completed = subprocess.run(cmd, capture_output=True)
+        return SimpleNamespace(
+            exit_code=None, output=iter([(completed.stdout, completed.stderr or None)])
+        )
+
+
+@pytest.fixture
+def sandbox(monkeypatch, tmp_path) -> DockerSandbox:
+    monkeypatch.setattr(sandbox_module.docker, "from_env", lambda: None)
+    sandbox = DockerSandbox(SandboxSettings(work_dir="/workspace"))
+    sandbox.container = DirectoryContainer(str(tmp_path))
+    os.makedirs(tmp_path / "workspace")
+    return sandbox
+
+
+async def chunks_of(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def test_tar_stream_is_a_valid_archive():
+    """Tests that a generated archive holds the entries, padded to tar blocks."""
+    archive = b"".join(
+        tar_stream(
+            [TarEntry("dir", mode=0o755), TarEntry("dir/a.txt", 3, [b"a", b"bc"])]
+        )
+    )
+
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert tar.getnames() == ["dir", "dir/a.txt"]
+        assert tar.extractfile("dir/a.txt").read() == b"abc"
+    assert len(archive) % tarfile.BLOCKSIZE == 0
+
+
+def test_tar_stream_rejects_content_of_the_wrong_size():
+    with pytest.raises(ValueError, match="expected 5 bytes, got 3"):
+        b"".join(tar_stream([TarEntry("a.txt", 5, [b"abc"])]))
+
+
+@pytest.mark.asyncio
+async def test_stream_round_trip_creates_parent_directories(sandbox):
+    """Tests chunked writes and reads, with one shell command for the parents."""
+    data = os.urandom(3 * 1024 + 17)
+
+    await sandbox.write_stream("data/raw/blob.bin", chunks_of(data, 1000), len(data))
+    received = [chunk async for chunk in sandbox.read_stream("data/raw/blob.bin", 512)]
+
+    assert b"".join(received) == data
+    assert max(len(chunk) for chunk in received) <= 512
+    assert sandbox.container.execs == ["mkdir"]
+
+
+@pytest.mark.asyncio
+async def test_existing_directories_are_left_alone(sandbox, tmp_path):
+    """Tests that archives hold no entries for parents, which would reset their mode."""
+    (tmp_path / "workspace" / "private").mkdir(mode=0o700)
+
+    await sandbox.write_file("top.txt", "no parents to create")
+    assert sandbox.container.execs == []
+    await sandbox.write_file("private/key.txt", "secret")
+
+    assert sandbox.container.archived == ["top.txt", "private/key.txt"]
+    assert (tmp_path / "workspace" / "private").stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.asyncio
+async def test_text_files_and_missing_files(sandbox):
+    await sandbox.write_file("/workspace/notes/hello.txt", "héllo")
+
+    assert await sandbox.read_file("notes/hello.txt") == "héllo"
+    with pytest.raises(FileNotFoundError, match="not found"):
+        await sandbox.read_file("missing.txt")
+
+
+@pytest.mark.asyncio
+async def test_batch_put_and_get_in_one_archive(sandbox, tmp_path):
+    """Tests copying several files and directories each way in one archive."""
+    source = tmp_path / "host"
+    (source / "reports").mkdir(parents=True)
+    (source / "reports" / "summary.md").write_text("# Summary")
+    (source / "data.csv").write_text("a,b\n1,2\n")
+
+    await sandbox.put_files(
+        {str(source / "data.csv"): "input/data.csv", str(source / "reports"): "out"}
+    )
+    await sandbox.get_files(["input", "out/summary.md"], str(tmp_path / "back"))
+
+    assert (tmp_path / "back" / "input" / "data.csv").read_text() == "a,b\n1,2\n"
+    assert (tmp_path / "back" / "out" / "summary.md").read_text() == "# Summary"
+
+
+@pytest.mark.asyncio
+async def test_copy_outside_the_working_directory(sandbox, tmp_path):
+    """Tests that paths outside the working directory get their parent created."""
+    source = tmp_path / "local.txt"
+    source.write_text("content")
+
+    await sandbox.copy_to(str(source), "/data/copied.txt")
+    await sandbox.copy_from("/data/copied.txt", str(tmp_path / "out" / "copy.txt"))
+
+    assert (tmp_path / "out" / "copy.txt").read_text() == "content"
+    assert sandbox.container.execs == ["mkdir"]
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+import pytest
+import pytest_asyncio
+
+import app.sandbox.client as client_module
+from app.config import SandboxPoolSettings, SandboxSettings
+from app.sandbox.client import LocalSandboxClient
+from app.sandbox.core.pool import SandboxBackend, SandboxPool
+
+
+class ProcessSandbox:
+    """Stand-in for a container: a temporary directory and local shell commands."""
+
+    def __init__(self):
+        self.work_dir = tempfile.mkdtemp(prefix="sandbox_pool_")
+
+    async def run_command(self, cmd: str, timeout: float = 10) -> str:
+        process = await asyncio.create_subprocess_shell(
+            cmd, cwd=self.work_dir, stdout=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return stdout.decode()
+
+    async def cleanup(self) -> None:
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class ProcessBackend(SandboxBackend):
+    def __init__(self):
+        self.created = []
+
+    async def create(self, config: SandboxSettings) -> ProcessSandbox:
+        await asyncio.sleep(0.01)  # Container start
+        sandbox = ProcessSandbox()
+        self.created.append(sandbox)
+        return sandbox
+
+    async def reset(self, sandbox: ProcessSandbox) -> None:
+        for name in os.listdir(sandbox.work_dir):
+            os.remove(os.path.join(sandbox.work_dir, name))
+
+
+@pytest_asyncio.fixture
+async def pool():
+    backend = ProcessBackend()
+    pool = SandboxPool(
+        backend, SandboxPoolSettings(enabled=True, size=1, reset_on_return=True)
+    )
+    try:
+        yield pool
+    finally:
+        await pool.close()
+        for sandbox in backend.created:
+            assert not os.path.exists(sandbox.work_dir)
+
+
+async def settle(pool: SandboxPool) -> None:
+    while pool._tasks:
+        await asyncio.gather(*pool._tasks)
+
+
+@pytest.mark.asyncio
+async def test_checkout_is_served_from_prestarted_sandboxes(pool):
+    """Tests that warmed and refilled sandboxes are handed out without creating."""
+    pool.warm()
+    await settle(pool)
+
+    first = await pool.acquire()
+    await settle(pool)
+    second = await pool.acquire()
+
+    assert first is not second
+    assert await first.run_command("echo ok") == "ok\n"
+    assert pool.get_stats()["hits"] == 2
+    assert pool.get_stats()["misses"] == 0
+    pool.release(first)
+    pool.release(second)
+
+
+@pytest.mark.asyncio
+async def test_released_sandbox_is_wiped_and_reused(pool):
+    """Tests that a returned sandbox comes back with an empty working directory."""
+    sandbox = await pool.acquire()
+    await sandbox.run_command("echo secret > notes.txt")
+    await settle(pool)
+    spare = await pool.acquire()
+
+    pool.release(sandbox)
+    await settle(pool)
+    reused = await pool.acquire()
+
+    assert reused is sandbox
+    assert await reused.run_command("ls") == ""
+    assert pool.get_stats()["reset"] == 1
+    pool.release(spare)
+    pool.release(reused)
+
+
+@pytest.mark.asyncio
+async def test_dirty_and_expired_sandboxes_are_discarded(pool):
+    """Tests that dirty or too old sandboxes are never handed out again."""
+    pool.settings.max_age = 0.05
+    dirty = await pool.acquire()
+    pool.release(dirty, dirty=True)
+    await settle(pool)
+
+    await asyncio.sleep(0.1)
+    fresh = await pool.acquire()
+
+    assert fresh is not dirty
+    assert not os.path.exists(dirty.work_dir)
+    assert pool.get_stats()["misses"] == 2
+    pool.release(fresh)
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_pooled_separately(pool):
+    """Tests that a sandbox is only reused for the configuration it was made with."""
+    small = SandboxSettings(memory_limit="256m")
+    sandbox = await pool.acquire(small)
+    pool.release(sandbox)
+    await settle(pool)
+
+    other = await pool.acquire(SandboxSettings())
+
+    assert other is not sandbox
+    pool.release(other)
+
+
+@pytest.mark.asyncio
+async def test_client_discards_a_sandbox_after_a_timed_out_command(pool, monkeypatch):
+    """Tests that a sandbox a command failed in is not handed out again."""
+    monkeypatch.setattr(client_module, "get_sandbox_pool", lambda: pool)
+    client = LocalSandboxClient()
+    await client.create()
+    sandbox = client.sandbox
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.run_command("sleep 5", timeout=0.1)
+    await client.cleanup()
+    await settle(pool)
+
+    assert not os.path.exists(sandbox.work_dir)
+    assert pool.get_stats()["reset"] == 0
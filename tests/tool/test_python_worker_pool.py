@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+import pytest_asyncio
+
+from app.config import PythonExecuteSettings
+from app.session import Session
+from app.tool.python_worker_pool import PythonWorker, PythonWorkerPool
+
+
+PID = "import os; print(os.getpid())"
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = PythonWorkerPool(
+        PythonExecuteSettings(
+            mode="pool", pool_size=1, preload_modules=["json"], cpu_time_limit=5
+        )
+    )
+    pool.start()
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_calls_reuse_a_warm_worker_with_a_fresh_namespace(pool):
+    """Tests that workers are reused, without leaking variables between calls."""
+    first = await pool.run(f"x = 1\n{PID}", timeout=10)
+    second = await pool.run(PID, timeout=10)
+    leaked = await pool.run("print(x)", timeout=10)
+
+    assert first == second
+    assert first["success"]
+    assert leaked == {"observation": "name 'x' is not defined", "success": False}
+    assert pool.get_stats()["started"] == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_replaces_the_worker(pool):
+    """Tests that a call running too long is stopped and the pool recovers."""
+    before = await pool.run(PID, timeout=10)
+
+    result = await pool.run("while True: pass", timeout=0.5)
+    after = await pool.run(PID, timeout=10)
+
+    assert result == {
+        "observation": "Execution timeout after 0.5 seconds",
+        "success": False,
+    }
+    assert after["success"]
+    assert after != before
+
+
+@pytest.mark.asyncio
+async def test_worker_is_recycled_after_max_executions(pool):
+    """Tests that a worker is replaced after its configured number of calls."""
+    pool.settings.max_executions_per_worker = 2
+
+    pids = [(await pool.run(PID, timeout=10))["observation"] for _ in range(3)]
+
+    assert pids[0] == pids[1] != pids[2]
+    assert pool.get_stats()["recycled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_session_keeps_its_variables_in_a_pinned_worker(pool):
+    """Tests that a session's calls share state, and closing it stops the worker."""
+    session = Session()
+
+    await pool.run("total = 40", timeout=10, session=session)
+    result = await pool.run("total += 2\nprint(total)", timeout=10, session=session)
+    other = await pool.run("print(total)", timeout=10, session=Session())
+    worker = session.get_state("python_execute.worker", None)
+    await session.close()
+
+    assert result == {"observation": "42\n", "success": True}
+    assert not other["success"]
+    assert not worker.alive
+
+
+@pytest.mark.asyncio
+async def test_workers_start_and_stop_off_the_event_loop(pool, monkeypatch):
+    """Tests that process starts and joins don't block other coroutines."""
+    threads = []
+    for name in ("start", "close"):
+        method = getattr(PythonWorker, name)
+
+        def record(self, *args, method=method, **kwargs):
+            threads.append(threading.current_thread())
+            return method(self, *args, **kwargs)
+
+        monkeypatch.setattr(PythonWorker, name, record)
+    pool.settings.max_executions_per_worker = 1
+
+    # The second call finds no idle worker and the pool has no room for it after
+    results = await asyncio.gather(pool.run(PID, 10), pool.run(PID, 10))
+    await pool.run("while True: pass", timeout=0.5)
+
+    assert all(result["success"] for result in results)
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Any, Dict
+
+import pytest
+
+from app.tool.sandbox.sb_shell_tool import SandboxShellTool
+
+
+class ScriptedTmux:
+    """Answers the tool's sandbox commands, the pane log growing a chunk per read."""
+
+    def __init__(self, *chunks: str):
+        self.chunks = list(chunks)
+        self.log = ""
+        self.commands = []
+
+    async def execute(self, command: str) -> Dict[str, Any]:
+        self.commands.append(command)
+        output = ""
+        if "send-keys" in command:
+            output = "offset=0\n"
+        elif "tail -c" in command:
+            if self.chunks:
+                self.log += self.chunks.pop(0)
+            offset = int(re.search(r"tail -c \+(\d+)", command).group(1)) - 1
+            output = f"{len(self.log)}\n{self.log[offset:]}"
+        return {"output": output, "exit_code": 0}
+
+
+@pytest.fixture
+def shell(monkeypatch):
+    def use(tmux: ScriptedTmux) -> SandboxShellTool:
+        async def ensure_sandbox(self):
+            return None
+
+        monkeypatch.setattr(SandboxShellTool, "_ensure_sandbox", ensure_sandbox)
+        monkeypatch.setattr(
+            SandboxShellTool,
+            "_execute_raw_command",
+            lambda self, command: tmux.execute(command),
+        )
+        return SandboxShellTool()
+
+    return use
+
+
+async def run(tool: SandboxShellTool, action: str, **kwargs) -> Dict[str, Any]:
+    result = await tool.execute(action, kwargs.pop("command", ""), **kwargs)
+    return json.loads(result.output)
+
+
+@pytest.mark.asyncio
+async def test_blocking_command_returns_output_without_the_marker(shell):
+    tmux = ScriptedTmux("hello\r\n", "\r\n__OPENMANUS_DONE__:3\r\n")
+    tool = shell(tmux)
+
+    result = await run(
+        tool,
+        "execute_command",
+        command="echo hello; exit 3",
+        session_name="build",
+        blocking=True,
+    )
+
+    assert result["output"] == "hello\n"
+    assert result["exit_code"] == 3
+    assert result["completed"]
+    assert "tmux kill-session -t build" in tmux.commands[-1]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_command_is_followed_from_its_offset(shell):
+    """Tests that a marker split across reads is neither returned nor lost."""
+    tmux = ScriptedTmux("step 1\r\n\r\n__OPENMAN", "US_DONE__:0\r\n")
+    tool = shell(tmux)
+
+    started = await run(
+        tool,
+        "execute_command",
+        command="make",
+        session_name="build",
+        blocking=True,
+        timeout=0,
+    )
+    followed = await run(
+        tool, "follow_command_output", session_name="build", offset=started["offset"]
+    )
+
+    assert started["output"] == "step 1\n"
+    assert not started["completed"]
+    assert followed["output"] == ""
+    assert followed["exit_code"] == 0
+    assert followed["completed"]
+
+
+@pytest.mark.asyncio
+async def test_session_names_are_never_put_in_commands_unchecked(shell):
+    tmux = ScriptedTmux()
+    tool = shell(tmux)
+
+    result = await tool.execute(
+        "terminate_command", "", session_name="x; rm -rf /workspace"
+    )
+
+    assert result.error
+    assert tmux.commands == []
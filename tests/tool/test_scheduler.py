@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.exceptions import ToolError
+from app.tool.scheduler import ToolConcurrency, ToolScheduler
+
+
+class Recorder:
+    """Records the start and end order of fake tool calls."""
+
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.peak = 0
+
+    def call(self, label: str, delay: float = 0.01):
+        async def run():
+            self.events.append(f"start {label}")
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(delay)
+            self.running -= 1
+            self.events.append(f"end {label}")
+            return label
+
+        return run
+
+
+@pytest.mark.asyncio
+async def test_writes_to_same_resource_run_in_issue_order():
+    """Tests that conflicting calls are serialized and others run in parallel."""
+    recorder = Recorder()
+    scheduler = ToolScheduler()
+    edit = ToolConcurrency(resource="file:/a.py")
+
+    tasks = [
+        scheduler.submit("editor", edit, recorder.call("edit 1", 0.02)),
+        scheduler.submit("editor", edit, recorder.call("edit 2")),
+        scheduler.submit(
+            "editor", ToolConcurrency(resource="file:/b.py"), recorder.call("other")
+        ),
+    ]
+
+    assert await asyncio.gather(*tasks) == ["edit 1", "edit 2", "other"]
+    events = recorder.events
+    assert events.index("end edit 1") < events.index("start edit 2")
+    assert events.index("start other") < events.index("end edit 1")
+
+
+@pytest.mark.asyncio
+async def test_reads_share_a_resource_until_a_write():
+    """Tests that reads run together and a later write waits for them."""
+    recorder = Recorder()
+    scheduler = ToolScheduler()
+    read = ToolConcurrency(resource="browser", write=False)
+
+    tasks = [
+        scheduler.submit("browser", read, recorder.call("read 1")),
+        scheduler.submit("browser", read, recorder.call("read 2")),
+        scheduler.submit(
+            "browser", ToolConcurrency(resource="browser"), recorder.call("click")
+        ),
+    ]
+    await asyncio.gather(*tasks)
+
+    assert recorder.events[:2] == ["start read 1", "start read 2"]
+    assert recorder.events[-2:] == ["start click", "end click"]
+
+
+@pytest.mark.asyncio
+async def test_max_parallel_limits_a_tool():
+    """Tests that no more than max_parallel calls of a tool run at once."""
+    recorder = Recorder()
+    scheduler = ToolScheduler()
+    limited = ToolConcurrency(max_parallel=2)
+
+    await asyncio.gather(
+        *(scheduler.submit("search", limited, recorder.call(str(i))) for i in range(5))
+    )
+
+    assert recorder.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_does_not_block_later_calls():
+    """Tests that a failed call raises its error and its successor still runs."""
+    recorder = Recorder()
+    scheduler = ToolScheduler()
+
+    async def fail():
+        raise ToolError("boom")
+
+    failed = scheduler.submit("bash", ToolConcurrency(resource="bash"), fail)
+    after = scheduler.submit(
+        "bash", ToolConcurrency(resource="bash"), recorder.call("next")
+    )
+
+    with pytest.raises(ToolError, match="boom"):
+        await failed
+    assert await after == "next"
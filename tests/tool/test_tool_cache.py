@@ -0,0 +1,101 @@
+from typing import Optional
+
+import pytest
+
+import app.tool.base as base_module
+from app.config import ToolCacheSettings
+from app.llm_cache import ResponseCache
+from app.tool.base import BaseTool, CachedToolResult, ToolResult
+from app.tool.cache import ToolResultCache, file_fingerprint
+
+
+class LookupTool(BaseTool):
+    name: str = "lookup"
+    description: str = "Looks up a value."
+    cache_ttl: Optional[int] = 60
+    calls: int = 0
+
+    async def execute(self, query: str) -> ToolResult:
+        self.calls += 1
+        if query == "broken":
+            return ToolResult(error="lookup failed")
+        return ToolResult(output=f"value of {query}")
+
+
+class FileTool(LookupTool):
+    name: str = "read"
+
+    def cache_key(self, path: str) -> Optional[dict]:
+        version = file_fingerprint(path)
+        return {"path": path, "version": version} if version else None
+
+    async def execute(self, path: str) -> ToolResult:
+        self.calls += 1
+        with open(path) as f:
+            return ToolResult(output=f.read())
+
+
+@pytest.fixture
+def tool_cache(monkeypatch) -> ToolResultCache:
+    settings = ToolCacheSettings(enabled=True, ttl={"disabled": 0})
+    cache = ToolResultCache(ResponseCache(max_memory_bytes=1024), settings)
+    monkeypatch.setattr(base_module, "get_tool_cache", lambda: cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_repeated_call_is_served_from_cache(tool_cache):
+    """Tests that a repeat returns a marked cached result without executing."""
+    tool = LookupTool()
+
+    first = await tool(query="python")
+    second = await tool(query="python")
+
+    assert tool.calls == 1
+    assert not isinstance(first, CachedToolResult)
+    assert isinstance(second, CachedToolResult)
+    assert str(second) == "[cached result]\nvalue of python"
+    stats = tool_cache.get_stats()["tools"]["lookup"]
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_errors_and_disabled_tools_are_not_cached(tool_cache):
+    """Tests that failures are re-run and a zero TTL override disables caching."""
+    tool = LookupTool()
+    disabled = LookupTool(name="disabled")
+
+    for _ in range(2):
+        await tool(query="broken")
+        await disabled(query="python")
+
+    assert tool.calls == 2
+    assert disabled.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_file_change_invalidates_cached_view(tool_cache, tmp_path):
+    """Tests that a file-based key misses once the file is modified."""
+    path = tmp_path / "notes.txt"
+    path.write_text("one")
+    tool = FileTool()
+
+    assert (await tool(path=str(path))).output == "one"
+    assert (await tool(path=str(path))).output == "one"
+    path.write_text("three")
+
+    assert (await tool(path=str(path))).output == "three"
+    assert tool.calls == 2
+
+
+def test_memory_tier_respects_size_budget():
+    """Tests that the LRU evicts by total size, not only by entry count."""
+    cache = ResponseCache(max_memory_entries=100, max_memory_bytes=10)
+
+    for key in "abc":
+        cache.put(key, "x" * 4)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "xxxx"
+    assert cache.get_stats()["memory_bytes"] == 8
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.config import ToolLimitSettings, ToolPolicySettings
+from app.tool.base import BaseTool, ToolResult, ToolTimeout
+from app.tool.policy import ToolBudget
+from app.tool.tool_collection import ToolCollection
+
+
+class SleepTool(BaseTool):
+    name: str = "sleep"
+    description: str = "Sleeps for the given seconds."
+    cancelled: bool = False
+
+    async def execute(self, seconds: float = 0) -> ToolResult:
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return ToolResult(output="done")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_timed_out_call_is_cancelled_and_reported():
+    """Tests that a call past its per-tool timeout is cancelled inside the tool."""
+    tool = SleepTool()
+    settings = ToolPolicySettings(tools={"sleep": ToolLimitSettings(timeout=0.01)})
+    budget = ToolBudget(settings)
+
+    result = await ToolCollection(tool).execute(
+        name="sleep", tool_input={"seconds": 1}, budget=budget
+    )
+
+    assert isinstance(result, ToolTimeout)
+    assert "timed out after 0.01s" in result.error
+    assert tool.cancelled
+    assert budget.get_stats()["timeouts"] == 1
+
+
+class RemoteTool(BaseTool):
+    name: str = "remote"
+    description: str = "Calls a service that times out."
+
+    async def execute(self) -> ToolResult:
+        raise TimeoutError("remote timed out")
+
+
+@pytest.mark.asyncio
+async def test_timeout_raised_by_the_tool_is_not_a_policy_timeout():
+    """Tests that a tool's own timeout error is not reported as the policy's."""
+    settings = ToolPolicySettings(tools={"remote": ToolLimitSettings(timeout=10)})
+    budget = ToolBudget(settings)
+
+    with pytest.raises(TimeoutError, match="remote timed out"):
+        await ToolCollection(RemoteTool()).execute(name="remote", budget=budget)
+    assert budget.get_stats()["timeouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_raised_by_the_tool_without_a_policy_timeout():
+    budget = ToolBudget(ToolPolicySettings())
+
+    with pytest.raises(TimeoutError, match="remote timed out"):
+        await ToolCollection(RemoteTool()).execute(name="remote", budget=budget)
+
+
+@pytest.mark.asyncio
+async def test_call_budgets_refuse_extra_calls():
+    """Tests the per-run and per-tool call-count budgets."""
+    tools = ToolCollection(SleepTool())
+    budget = ToolBudget(
+        ToolPolicySettings(max_calls=3, tools={"sleep": ToolLimitSettings(max_calls=2)})
+    )
+
+    results = [
+        await tools.execute(name="sleep", tool_input={}, budget=budget)
+        for _ in range(3)
+    ]
+
+    assert [result.output for result in results] == ["done", "done", None]
+    assert "budget of 2 calls of 'sleep'" in results[2].error
+    assert budget.get_stats()["refused"] == 1
+
+
+def test_wall_clock_budget_caps_timeouts():
+    """Tests that timeouts shrink to the time left and calls stop when it is gone."""
+    clock = FakeClock()
+    budget = ToolBudget(ToolPolicySettings(timeout=60, max_seconds=100), clock=clock)
+
+    clock.now = 70
+    assert budget.admit("sleep") is None
+    assert budget.timeout("sleep") == 30
+
+    clock.now = 100
+    assert "time budget of 100s" in budget.admit("sleep")
@@ -0,0 +1,86 @@
+from typing import ClassVar
+
+import pytest
+
+from app.tool import ToolCollection
+from app.tool.base import BaseTool, ToolResult
+from app.tool.registry import LazyTool, ToolSpec, lazy_tool, register_tool
+
+
+class CountingTool(BaseTool):
+    name: str = "counting"
+    description: str = "Counts its instances."
+    instances: ClassVar[int] = 0
+    cleaned: bool = False
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        CountingTool.instances += 1
+
+    async def execute(self, value: str) -> ToolResult:
+        return ToolResult(output=value.upper())
+
+    def status(self) -> str:
+        return "ready"
+
+    async def cleanup(self) -> None:
+        self.cleaned = True
+
+
+@pytest.fixture
+def counting_tool() -> LazyTool:
+    CountingTool.instances = 0
+    register_tool(
+        ToolSpec(
+            name="counting",
+            target=f"{__name__}:CountingTool",
+            description="Counts its instances.",
+            parameters={"type": "object", "properties": {"value": {"type": "string"}}},
+        )
+    )
+    return lazy_tool("counting")
+
+
+def test_schema_is_available_without_loading(counting_tool):
+    """Tests that offering the tool to the LLM does not build it."""
+    params = ToolCollection(counting_tool).to_params()
+
+    assert params[0]["function"]["name"] == "counting"
+    assert "value" in params[0]["function"]["parameters"]["properties"]
+    assert not counting_tool.loaded
+    assert CountingTool.instances == 0
+
+
+@pytest.mark.asyncio
+async def test_first_call_builds_the_tool_once(counting_tool):
+    """Tests that calls and attribute lookups share one real instance."""
+    collection = ToolCollection(counting_tool)
+
+    assert (
+        await collection.execute(name="counting", tool_input={"value": "a"})
+    ).output == "A"
+    assert (
+        await collection.execute(name="counting", tool_input={"value": "b"})
+    ).output == "B"
+    assert counting_tool.status() == "ready"
+
+    assert CountingTool.instances == 1
+
+
+@pytest.mark.asyncio
+async def test_cleanup_of_unused_tool_does_not_load_it(counting_tool):
+    """Tests that cleanup is a no-op until the tool has been used."""
+    await counting_tool.cleanup()
+    assert not counting_tool.loaded
+
+    await counting_tool(value="x")
+    await counting_tool.cleanup()
+    assert counting_tool.load().cleaned
+
+
+def test_browser_tool_is_registered():
+    """Tests that the browser tool's schema is registered statically."""
+    tool = lazy_tool("browser_use")
+
+    assert tool.to_param()["function"]["parameters"]["required"] == ["action"]
+    assert not tool.loaded
@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+
+from app.utils.workspace_snapshot import WorkspaceSnapshot
+
+
+class MemoryFileSystem:
+    """Stand-in for a sandbox file system, counting downloads."""
+
+    def __init__(self, files: Dict[str, bytes]):
+        self.files = dict(files)
+        self.mod_times: Dict[str, int] = {path: 0 for path in files}
+        self.downloads: List[str] = []
+
+    def write(self, path: str, data: bytes) -> None:
+        self.files[path] = data
+        self.mod_times[path] = self.mod_times.get(path, 0) + 1
+
+    def list_files(self, path: str):
+        prefix = path.rstrip("/") + "/"
+        entries = {}
+        for file_path, data in self.files.items():
+            if not file_path.startswith(prefix):
+                continue
+            name, _, rest = file_path[len(prefix) :].partition("/")
+            entries[name] = SimpleNamespace(
+                name=name,
+                is_dir=bool(rest),
+                size=0 if rest else len(data),
+                mod_time=None if rest else self.mod_times[file_path],
+            )
+        return list(entries.values())
+
+    def download_file(self, path: str) -> bytes:
+        self.downloads.append(path)
+        return self.files[path]
+
+
+@pytest.fixture
+def fs() -> MemoryFileSystem:
+    return MemoryFileSystem(
+        {
+            "/workspace/main.py": b"print('hi')\n",
+            "/workspace/src/app/util.py": b"X = 1\n",
+            "/workspace/node_modules/lib/index.js": b"module.exports = {}\n",
+            "/workspace/logo.png": b"\x89PNG",
+            "/workspace/report.pdf": b"%PDF",
+            "/workspace/data.bin.txt": b"abc\0def",
+            "/workspace/big.csv": b"a" * 100,
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_snapshot_reads_only_text_files(fs):
+    """Tests that the tree is walked and binary, large and excluded files skipped."""
+    snapshot = WorkspaceSnapshot(max_file_size=50)
+
+    diff = await snapshot.refresh(fs)
+
+    assert diff.added == ["main.py", "src/app/util.py"]
+    assert snapshot.to_dict()["src/app/util.py"]["content"] == "X = 1\n"
+    # Only the NUL byte check needs a download to recognise a binary file
+    assert sorted(fs.downloads) == [
+        "/workspace/data.bin.txt",
+        "/workspace/main.py",
+        "/workspace/src/app/util.py",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_are_not_downloaded_again(fs):
+    snapshot = WorkspaceSnapshot(max_file_size=50)
+    await snapshot.refresh(fs)
+    fs.downloads.clear()
+
+    diff = await snapshot.refresh(fs)
+
+    assert not diff
+    assert fs.downloads == []
+    assert snapshot.get_stats()["cached"] == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_returns_changes_since_the_last_one(fs):
+    """Tests that touched files with unchanged content are not reported."""
+    snapshot = WorkspaceSnapshot(max_file_size=50)
+    await snapshot.refresh(fs)
+
+    fs.write("/workspace/main.py", b"print('bye')\n")
+    fs.write("/workspace/src/app/util.py", b"X = 1\n")
+    fs.write("/workspace/src/new.py", b"")
+    del fs.files["/workspace/data.bin.txt"]
+    fs.write("/workspace/big.csv", b"a,b\n")
+    fs.downloads.clear()
+    diff = await snapshot.refresh(fs)
+
+    assert diff.added == ["big.csv", "src/new.py"]
+    assert diff.modified == ["main.py"]
+    assert diff.deleted == []
+    assert len(fs.downloads) == 4
+
+    fs.write("/workspace/main.py", b"\0")
+    del fs.files["/workspace/src/new.py"]
+    diff = await snapshot.refresh(fs)
+
+    assert diff.deleted == ["main.py", "src/new.py"]
+    assert sorted(snapshot.files) == ["big.csv", "src/app/util.py"]